@@ -1,8 +1,90 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from api.middlewares.shared_router import router
+from storage.async_database import AsyncDatabase
+from storage.indexes import ensure_indexes_async
+from repositories.async_directory_repository import AsyncDirectoryRepository
+from utils.helpers import get_current_time, rename_metadata_directories
+from api.dependencies import request_token
+from utils.session import bind_session_token, unbind_session_token
+from utils.metrics import enable_metrics, get_metrics, observe_request
+import api.routes.file_routes
+import api.routes.user_routes
+import api.routes.metrics_routes
+
+
+# Before any database client exists, so that their pools are tracked too.
+enable_metrics()
+
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Legacy directories are migrated first: they would break the unique path index.
+    # Failures are logged rather than raised so the API still starts.
+    if os.getenv("ENSURE_INDEXES", "true").lower() == "true":
+        try:
+            renames = await AsyncDirectoryRepository().migrate_legacy(get_current_time())
+            await asyncio.to_thread(rename_metadata_directories, renames)
+        except Exception:
+            logger.exception("Could not migrate legacy directories")
+        try:
+            await ensure_indexes_async(AsyncDatabase().get_mongo_db("vault"))
+        except Exception:
+            logger.exception("Could not create MongoDB indexes")
+    yield
+    await AsyncDatabase().close_connections()
 
 
 app = FastAPI(
     title="Vault API",
     description="A secure file management system",
     version="1.0.0",
+    lifespan=lifespan,
 )
+
+
+
+@app.middleware("http")
+async def bind_session(request: Request, call_next):
+    """
+    Make the request's session token available to the services.
+    Requests never fall back to the server's own CLI session file.
+    """
+    reset = bind_session_token(request_token(request))
+    try:
+        return await call_next(request)
+    finally:
+        unbind_session_token(reset)
+
+
+@app.middleware("http")
+async def record_request(request: Request, call_next):
+    """
+    Time each request until its response starts, labelled by route template
+    rather than raw path so that IDs and file names do not become labels.
+    """
+    metrics = get_metrics()
+    if metrics is None:
+        return await call_next(request)
+    started = time.perf_counter()
+    status = 500
+    in_progress = metrics.requests_in_progress.labels(request.method)
+    in_progress.inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        in_progress.dec()
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        observe_request(request.method, route, status, time.perf_counter() - started)
+
+
+app.include_router(router)
@@ -1,6 +1,18 @@
-from services.file_service import FileService
-from storage.models import CreateFileOrFolderModel
-from fastapi import HTTPException
+from services.async_file_service import AsyncFileService
+from services.thumbnail_service import ThumbnailService
+from repositories.async_file_repository import AsyncFileRepository
+from storage.models import BatchFilesModel, CreateFileOrFolderModel
+from utils.http import content_disposition, parse_range, etag_matches
+from utils.helpers import metadata_cache_stats
+from utils.context import RequestContext
+from fastapi import HTTPException, Response
+from fastapi.responses import StreamingResponse
+import asyncio
+import mimetypes
+import os
+
+
+thumbnail_cache_max_age = int(os.getenv("THUMBNAIL_CACHE_MAX_AGE", 7 * 24 * 3600))
 
 
 class FileController:
@@ -10,20 +22,22 @@ class FileController:
     """
 
     @staticmethod
-    def upload_file_or_directory(data: CreateFileOrFolderModel, user_id: str):
+    async def upload_file_or_directory(data: CreateFileOrFolderModel, context: RequestContext):
         """
         Upload a file or create a directory.
-        
+
         :param file_name: Name of the file or directory.
         :param data: Data to be uploaded (if applicable).
         :param directory_name: Name of the directory where the file should be stored.
-        :param user_id: ID of the user uploading the file.
+        :param context: Request context of the user uploading the file.
         :return: Confirmation message or error response.
         """
+        service = AsyncFileService(context)
+        user_id = context.user_id
         if data.type in ['file', 'image']:
             file_data = data.to_file_data()
             try:
-                result = FileService.upload_file(file_data['file_name'], file_data['data'], user_id, data.directory_name)
+                result = await service.upload_file(file_data['file_name'], file_data['data'], user_id, data.directory_name or 'root')
                 if isinstance(result, str):
                     return {
                         "message": f"File '{file_data['file_name']}' uploaded successfully.",
@@ -37,13 +51,10 @@ class FileController:
         elif data.type == 'folder':
             folder_data = data.to_folder_data()
             try:
-                parent = FileService().get_directory(data.parent_name)
-                if not parent:
-                    raise ValueError(f"Parent directory '{data.parent_name}' does not exist.")
-                
-                directory_path = f"{data.parent_name}/{folder_data['directory_name']}"
+                parent = await service.get_directory(data.parent_name or 'root', user_id=user_id)
+                directory_path = f"{parent['directory_path']}/{folder_data['folder_name']}"
 
-                result = FileService.create_directory(folder_data['directory_name'], parent.id, directory_path)
+                result = await service.create_directory(directory_path, user_id=user_id)
                 if isinstance(result, str):
                     return {
                         "message": f"Directory '{folder_data['folder_name']}' created successfully.",
@@ -61,15 +72,16 @@ class FileController:
             )
 
     @staticmethod
-    def get_file(file_name: str):
+    async def get_file(file_name: str, context: RequestContext):
         """
         Retrieve a file by its name.
-        
+
         :param file_name: Name of the file to retrieve.
+        :param context: Request context of the caller.
         :return: File content or error response.
         """
         try:
-            metadata = FileService.read_metadata(file_name)
+            metadata = await AsyncFileService(context).read_metadata(file_name)
             if not metadata:
                 raise HTTPException(
                     status_code=404,
@@ -86,40 +98,41 @@ class FileController:
             )
 
     @staticmethod
-    def get_all_files():
+    async def get_all_files(context: RequestContext, **options):
         """
-        Retrieve all files.
-        
-        :return: List of files or error response.
+        Retrieve one page of the files visible to the caller.
+
+        :param context: Request context of the caller.
+        :param options: Filters, sort order, page size and cursor; see ``AsyncFileService.list_files``.
+        :return: The page of files and the cursor of the next page, or error response.
         """
         try:
-            files = FileService.list_files()
-            if not files or not isinstance(files, dict):
-                raise HTTPException(
-                    status_code=404,
-                    detail="No files found."
-                )
-            return {
-                "message": "Files retrieved successfully.",
-                "data": files,
-                "status": 200
-            }
+            page = await AsyncFileService(context).list_files(**options)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Internal server error: {str(e)}"
             )
+        return {
+            "message": "Files retrieved successfully.",
+            "data": page["files"],
+            "next_cursor": page["next_cursor"],
+            "status": 200
+        }
 
     @staticmethod
-    def publish_file(file_name: str):
+    async def publish_file(file_name: str, context: RequestContext):
         """
         Publish a file to make it accessible to other users.
-        
+
         :param file_name: Name of the file to publish.
+        :param context: Request context of the caller.
         :return: Confirmation message or error response.
         """
         try:
-            result = FileService.publish_file(file_name)
+            result = await AsyncFileService(context).publish_file(file_name)
             if isinstance(result, dict):
                 return {
                     "message": f"File '{file_name}' published successfully.",
@@ -136,17 +149,18 @@ class FileController:
                 status_code=500,
                 detail=f"Internal server error: {str(e)}"
             )
-        
+
     @staticmethod
-    def unpublish_file(file_name: str):
+    async def unpublish_file(file_name: str, context: RequestContext):
         """
         Unpublish a file to restrict its visibility.
-        
+
         :param file_name: Name of the file to unpublish.
+        :param context: Request context of the caller.
         :return: Confirmation message or error response.
         """
         try:
-            result = FileService.unpublish_file(file_name)
+            result = await AsyncFileService(context).unpublish_file(file_name)
             if isinstance(result, dict):
                 return {
                     "message": f"File '{file_name}' unpublished successfully.",
@@ -165,27 +179,165 @@ class FileController:
             )
 
     @staticmethod
-    def get_file_data(file_name: str):
+    async def batch_files(action: str, data: BatchFilesModel, context: RequestContext):
         """
-        Retrieve file data by its name.
-        
-        :param file_name: Name of the file to retrieve data for.
-        :return: File data or error response.
+        Publish, unpublish or delete many files in one request.
+
+        :param action: 'publish', 'unpublish' or 'delete'.
+        :param data: Selection of files.
+        :param context: Request context of the caller.
+        :return: Counts of matched and changed files and the names not found, or error response.
         """
+        service = AsyncFileService(context)
+        selection = (data.files, data.directory_name, data.recursive)
         try:
-            data = FileService.read_file(file_name)
-            if not data:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"File data for '{file_name}' not found."
+            if action == 'delete':
+                result = await service.delete_files(*selection)
+            else:
+                result = await service.set_visibility_many(
+                    'public' if action == 'publish' else 'private', *selection
                 )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Internal server error: {str(e)}"
+            )
+        return {
+            "message": f"Batch {action} completed.",
+            "data": result,
+            "status": 200
+        }
+
+    @staticmethod
+    async def get_file_thumbnail(file_name: str, context: RequestContext, size: int = 128, format: str = None, if_none_match: str = None):
+        """
+        Serve a thumbnail of a file, generating it on demand if missing.
+
+        :param file_name: Name of the file to retrieve the thumbnail for.
+        :param context: Request context of the caller.
+        :param size: Requested size in pixels; snapped to a configured size.
+        :param format: 'webp' or the file's native format.
+        :param if_none_match: Value of the request's If-None-Match header, if any.
+        :return: Thumbnail image or error response.
+        """
+        try:
+            metadata = await AsyncFileService(context).get_readable_metadata(file_name)
+            thumbnail = await asyncio.to_thread(
+                ThumbnailService().get_thumbnail, metadata["file_id"], file_name, size, format
+            )
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except PermissionError as e:
+            raise HTTPException(status_code=403, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Internal server error: {str(e)}"
+            )
+        if not thumbnail:
+            raise HTTPException(status_code=404, detail=f"Thumbnail for '{file_name}' not found.")
+
+        scope = 'public' if metadata.get("visibility") == 'public' else 'private'
+        headers = {
+            "ETag": f'"{thumbnail._id}"',
+            "Cache-Control": f"{scope}, max-age={thumbnail_cache_max_age}",
+        }
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        data = await asyncio.to_thread(thumbnail.read)
+        return Response(content=data, media_type=thumbnail.content_type, headers=headers)
+
+    @staticmethod
+    async def get_dedup_report(scope: str, context: RequestContext):
+        """
+        Report storage saved by content-addressed deduplication.
+
+        :param scope: 'user' for the current user's files, 'global' for all files.
+        :param context: Request context of the caller.
+        :return: Dedup report or error response.
+        """
+        if scope not in ['user', 'global']:
+            raise HTTPException(status_code=400, detail="Scope must be 'user' or 'global'.")
+        if scope == 'global' and not context.is_admin:
+            raise HTTPException(status_code=403, detail="Only administrators can report on all files.")
+        try:
             return {
-                "message": f"File data retrieve successfully",
-                "data": data,
+                "data": await AsyncFileService(context).dedup_report(scope),
                 "status": 200
             }
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Internal server error: {str(e)}"
-            )
\ No newline at end of file
+            )
+
+    @staticmethod
+    async def get_cache_stats():
+        """
+        Report hit/miss counters of the metadata cache.
+
+        :return: Cache statistics.
+        """
+        return {
+            "data": metadata_cache_stats(),
+            "status": 200
+        }
+
+    @staticmethod
+    async def get_file_data(file_name: str, context: RequestContext, range_header: str = None, if_none_match: str = None):
+        """
+        Stream the raw bytes of a file, honouring Range and If-None-Match.
+
+        :param file_name: Name of the file to retrieve data for.
+        :param context: Request context of the caller.
+        :param range_header: Value of the request's Range header, if any.
+        :param if_none_match: Value of the request's If-None-Match header, if any.
+        :return: Streaming response with the file content or error response.
+        """
+        try:
+            metadata, grid_out = await AsyncFileService(context).open_file_stream(file_name)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except PermissionError as e:
+            raise HTTPException(status_code=403, detail=str(e))
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Internal server error: {str(e)}"
+            )
+
+        size = grid_out.length
+        etag = f'"{metadata.get("checksum") or metadata["file_id"]}"'
+        headers = {
+            "Accept-Ranges": "bytes",
+            "ETag": etag,
+            "Content-Disposition": content_disposition(file_name),
+        }
+        if etag_matches(if_none_match, etag):
+            await grid_out.close()
+            return Response(status_code=304, headers=headers)
+
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            await grid_out.close()
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+        media_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+        if byte_range is None:
+            headers["Content-Length"] = str(size)
+            return StreamingResponse(AsyncFileRepository.iter_file(grid_out), media_type=media_type, headers=headers)
+
+        start, end = byte_range
+        headers["Content-Length"] = str(end - start + 1)
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return StreamingResponse(
+            AsyncFileRepository.iter_file(grid_out, start, end),
+            status_code=206,
+            media_type=media_type,
+            headers=headers
+        )
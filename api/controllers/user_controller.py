@@ -1,6 +1,10 @@
-from services.user_service import UserService
-from storage.models import UserModel
-from fastapi import Request, HTTPException
+from services.async_user_service import AsyncUserService
+from storage.models import UserModel, SessionModel, TokenModel
+from utils.helpers import get_current_time
+from utils.context import RequestContext
+from utils.rate_limit import RateLimitExceeded
+from utils.tokens import InvalidToken
+from fastapi import HTTPException
 
 
 class UserController:
@@ -10,25 +14,25 @@ class UserController:
     """
 
     @staticmethod
-    def get_user_id(request: Request):
+    async def get_user_id(context: RequestContext):
         """
         Get the ID of the currently authenticated user.
         
         :return: User ID if authenticated, None otherwise.
         """
-        return UserService.get_user_id()
+        return context.user_id
 
     @staticmethod
-    def is_authenticated():
+    async def is_authenticated(context: RequestContext):
         """
         Check if a user is currently authenticated.
         
         :return: True if authenticated, False otherwise.
         """
-        return UserService.is_authenticated()
+        return context.is_authenticated
 
     @staticmethod
-    def register(user_data):
+    async def register(user_data):
         """
         Register a new user with the provided user data.
         
@@ -39,12 +43,14 @@ class UserController:
             raise ValueError("Username, email, and password must be provided.")
         
         try:
-            result = UserService.create_user(user_data)
+            user = UserModel(**user_data, created_at=get_current_time())
+            result = await AsyncUserService.create_user(user)
             if isinstance(result, UserModel):
-                del result.password
+                user_data = result.to_dict()
+                del user_data['password']
                 return {
                     "message": f"User '{result.username}' registered successfully.",
-                    "user_data": result.to_dict(),
+                    "user_data": user_data,
                     "status": 200
                 }
             else:
@@ -59,23 +65,34 @@ class UserController:
             )
 
     @staticmethod
-    def login(user_data):
+    async def login(user_data, client_ip: str = None):
         """
         Log in a user with the provided credentials.
         
         :param user_data: Dictionary containing user login details.
+        :param client_ip: Address of the client, used for rate limiting.
         :return: Confirmation message or error response.
         """
         if not user_data or len(user_data) < 2 or not all(user_data.values()):
             raise ValueError("Username and password must be provided.")
         
         try:
-            result = UserService.login_user(user_data['username'], user_data['password'])
-            if isinstance(result, UserModel):
-                del result.password
+            result = await AsyncUserService.login_user(user_data['username'], user_data['password'], client_ip)
+            if isinstance(result, SessionModel):
+                session = result.to_dict()
                 return {
-                    "message": f"User '{result.username}' logged in successfully.",
-                    "user_data": result.to_dict(),
+                    "message": f"User '{result.user.username}' logged in successfully.",
+                    "user_data": session["user"],
+                    "token": session["token"],
+                    "expires_in": session["expires_in"],
+                    "status": 200
+                }
+            elif isinstance(result, TokenModel):
+                tokens = result.to_dict()
+                return {
+                    "message": f"User '{result.user.username}' logged in successfully.",
+                    "user_data": tokens.pop("user"),
+                    **tokens,
                     "status": 200
                 }
             else:
@@ -83,6 +100,14 @@ class UserController:
                     status_code=401,
                     detail=f"Error logging in user: {result}"
                 )
+        except RateLimitExceeded as e:
+            raise HTTPException(
+                status_code=429,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500,
@@ -90,14 +115,15 @@ class UserController:
             )
         
     @staticmethod
-    def logout():
+    async def logout(context: RequestContext, refresh_token: str = None):
         """
         Log out the current user.
         
+        :param refresh_token: Refresh token to revoke as well, in token auth mode.
         :return: Confirmation message or error response.
         """
         try:
-            result = UserService.logout_user()
+            result = await AsyncUserService.logout_user(context.token, refresh_token)
             return {
                 "message": result,
                 "status": 200
@@ -109,18 +135,67 @@ class UserController:
             )
 
     @staticmethod
-    def get_current_user():
+    async def refresh(refresh_token: str):
+        """
+        Exchange a refresh token for a new access and refresh token.
+        
+        :param refresh_token: Refresh token issued at login.
+        :return: New tokens or error response.
+        """
+        try:
+            result = await AsyncUserService.refresh_tokens(refresh_token)
+            return {
+                **result.to_dict(),
+                "status": 200
+            }
+        except InvalidToken as e:
+            raise HTTPException(
+                status_code=401,
+                detail=str(e),
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Internal server error: {str(e)}"
+            )
+
+    @staticmethod
+    async def logout_all(context: RequestContext):
+        """
+        Log the current user out of every session.
+        
+        :return: Confirmation message or error response.
+        """
+        user_id = context.user_id
+        if not user_id:
+            raise HTTPException(status_code=401, detail="Not authenticated.")
+        try:
+            revoked = await AsyncUserService.revoke_user_sessions(user_id)
+            return {
+                "message": f"Logged out of {revoked} session(s).",
+                "status": 200
+            }
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Internal server error: {str(e)}"
+            )
+
+    @staticmethod
+    async def get_current_user(context: RequestContext):
         """
         Get the current logged-in user.
         
         :return: User information or error response.
         """
         try:
-            user = UserService.get_current_user()
-            if user:
-                del user.password
+            user = await AsyncUserService.get_current_user(context.token) if context.is_authenticated else None
+            if isinstance(user, UserModel):
+                user_data = user.to_dict()
+                del user_data['password']
                 return {
-                    "user_data": user.to_dict(),
+                    "user_data": user_data,
                     "status": 200
                 }
             else:
@@ -0,0 +1,42 @@
+from fastapi import Depends, HTTPException, Request
+from services.async_user_service import AsyncUserService
+from utils.context import RequestContext
+from utils.session import bearer_token
+
+
+def request_token(request: Request):
+    """
+    Get the session token sent with a request.
+
+    :return: Token from the Authorization (Bearer) or X-Session-Token header, or None.
+    """
+    return bearer_token(request.headers.get("authorization")) or request.headers.get("x-session-token")
+
+
+async def get_request_context(request: Request) -> RequestContext:
+    """
+    Resolve the caller's identity once per request.
+    FastAPI caches dependencies per request, so every route parameter and
+    controller sharing this dependency sees the same context.
+
+    :return: RequestContext with the user ID resolved.
+    """
+    token = request_token(request)
+    if not token:
+        return RequestContext(user_id=None)
+    return await AsyncUserService.get_context(token)
+
+
+async def require_user(context: RequestContext = Depends(get_request_context)) -> RequestContext:
+    """
+    Reject requests without a valid session or access token.
+
+    :return: RequestContext of an authenticated user.
+    """
+    if not context.is_authenticated:
+        raise HTTPException(
+            status_code=401,
+            detail="Not authenticated.",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return context
@@ -1,12 +1,16 @@
-from controllers.file_controller import FileController
-from middlewares.shared_router import router
-from storage.models import CreateFileOrFolderModel
+from api.controllers.file_controller import FileController
+from api.dependencies import get_request_context, require_user
+from api.middlewares.shared_router import router
+from storage.models import BatchFilesModel, CreateFileOrFolderModel
+from utils.context import RequestContext
+from fastapi import Depends, Query, Request
+from typing import Literal, Optional
 
 
 
 
 @router.post('/api/files')
-async def create(data: CreateFileOrFolderModel):
+async def create(data: CreateFileOrFolderModel, context: RequestContext = Depends(require_user)):
     """
     Create a new file or folder with the provided file data.
     
@@ -14,22 +18,46 @@ async def create(data: CreateFileOrFolderModel):
     :return: Confirmation message or error response.
     """
     
-    return FileController.upload_file_or_directory(data)
+    return await FileController.upload_file_or_directory(data, context)
 
 
 @router.get('/api/files')
-async def get_all_files():
+async def get_all_files(
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    sort: Literal['name', 'size', 'created_at'] = 'created_at',
+    order: Literal['asc', 'desc'] = 'asc',
+    owner: Optional[str] = None,
+    visibility: Optional[Literal['public', 'private']] = None,
+    type: Optional[str] = None,
+    directory: Optional[str] = None,
+    recursive: bool = False,
+    context: RequestContext = Depends(get_request_context),
+):
     """
-    Retrieve all files.
+    Retrieve one page of files, newest last by default.
+    Pass the returned ``next_cursor`` back as ``cursor`` to get the next page.
     
-    :return: List of files or error response.
+    :param owner: 'me' for your own files, or a user ID for that user's public files.
+    :return: Page of files or error response.
     """
     
-    return FileController.get_all_files()
+    return await FileController.get_all_files(
+        context,
+        owner=owner,
+        visibility=visibility,
+        file_type=type,
+        directory_name=directory,
+        recursive=recursive,
+        sort=sort,
+        descending=order == 'desc',
+        limit=limit,
+        cursor=cursor,
+    )
 
 
 @router.get('/api/files/{file_name}')
-async def get_file(file_name: str):
+async def get_file(file_name: str, context: RequestContext = Depends(get_request_context)):
     """
     Retrieve a file by its name.
     
@@ -37,35 +65,50 @@ async def get_file(file_name: str):
     :return: File content or error response.
     """
     
-    return FileController.get_file(file_name)
+    return await FileController.get_file(file_name, context)
 
 
 @router.get('/api/files/{file_name}/data')
-async def get_file_data(file_name: str):
+async def get_file_data(file_name: str, request: Request, context: RequestContext = Depends(get_request_context)):
     """
-    Retrieve file data by its name.
+    Stream file data by its name.
+    Supports Range requests for partial and resumed downloads and
+    If-None-Match for cache revalidation.
     
     :param file_name: Name of the file to retrieve data for.
-    :return: File data or error response.
+    :return: Raw file bytes or error response.
     """
     
-    return FileController.get_file_data(file_name)
+    return await FileController.get_file_data(
+        file_name,
+        context,
+        range_header=request.headers.get('range'),
+        if_none_match=request.headers.get('if-none-match')
+    )
 
 
 @router.get('/api/file/{file_name}/thumbnail')
-async def get_file_thumbnail(file_name: str):
+async def get_file_thumbnail(file_name: str, request: Request, size: int = 128, format: str = None, context: RequestContext = Depends(get_request_context)):
     """
     Retrieve a thumbnail for the specified file.
     
     :param file_name: Name of the file to retrieve the thumbnail for.
+    :param size: Requested size in pixels; snapped to a configured size.
+    :param format: 'webp' or the file's native format.
     :return: Thumbnail image or error response.
     """
     
-    return FileController.get_file_thumbnail(file_name)
+    return await FileController.get_file_thumbnail(
+        file_name,
+        context,
+        size=size,
+        format=format,
+        if_none_match=request.headers.get('if-none-match')
+    )
 
 
 @router.patch('/api/files/{file_name}/publish')
-async def publish_file(file_name: str):
+async def publish_file(file_name: str, context: RequestContext = Depends(require_user)):
     """
     Publish a file to make it accessible to other users.
     
@@ -73,11 +116,11 @@ async def publish_file(file_name: str):
     :return: Confirmation message or error response.
     """
     
-    return FileController.publish_file(file_name)
+    return await FileController.publish_file(file_name, context)
 
 
 @router.patch('/api/files/{file_name}/unpublish')
-async def unpublish_file(file_name: str):
+async def unpublish_file(file_name: str, context: RequestContext = Depends(require_user)):
     """
     Unpublish a file to restrict its access.
     
@@ -85,4 +128,64 @@ async def unpublish_file(file_name: str):
     :return: Confirmation message or error response.
     """
     
-    return FileController.unpublish_file(file_name)
\ No newline at end of file
+    return await FileController.unpublish_file(file_name, context)
+
+
+@router.post('/api/files/batch/publish')
+async def publish_files(data: BatchFilesModel, context: RequestContext = Depends(require_user)):
+    """
+    Publish many files at once.
+    
+    :param data: File names, glob patterns and/or a directory.
+    :return: Counts of matched and changed files or error response.
+    """
+    
+    return await FileController.batch_files('publish', data, context)
+
+
+@router.post('/api/files/batch/unpublish')
+async def unpublish_files(data: BatchFilesModel, context: RequestContext = Depends(require_user)):
+    """
+    Unpublish many files at once.
+    
+    :param data: File names, glob patterns and/or a directory.
+    :return: Counts of matched and changed files or error response.
+    """
+    
+    return await FileController.batch_files('unpublish', data, context)
+
+
+@router.post('/api/files/batch/delete')
+async def delete_files(data: BatchFilesModel, context: RequestContext = Depends(require_user)):
+    """
+    Delete many files at once.
+    
+    :param data: File names, glob patterns and/or a directory.
+    :return: Counts of matched and deleted files or error response.
+    """
+    
+    return await FileController.batch_files('delete', data, context)
+
+
+@router.get('/api/cache/metadata')
+async def get_cache_stats(context: RequestContext = Depends(require_user)):
+    """
+    Report hit/miss counters of the metadata cache.
+    
+    :return: Cache statistics.
+    """
+    
+    return await FileController.get_cache_stats()
+
+
+
+@router.get('/api/storage/dedup')
+async def get_dedup_report(scope: str = 'user', context: RequestContext = Depends(require_user)):
+    """
+    Report storage saved by content-addressed deduplication.
+    
+    :param scope: 'user' for the current user's files, 'global' for all files (administrators only).
+    :return: Dedup report or error response.
+    """
+    
+    return await FileController.get_dedup_report(scope, context)
@@ -0,0 +1,16 @@
+from api.middlewares.shared_router import router
+from fastapi import HTTPException, Response
+from utils.metrics import get_metrics, latest_metrics
+
+
+@router.get('/metrics', include_in_schema=False)
+async def metrics():
+    """
+    Expose the API metrics in the Prometheus text format.
+    
+    :return: Metrics payload, or 404 when METRICS_ENABLED is false.
+    """
+    if get_metrics() is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    payload, content_type = latest_metrics()
+    return Response(content=payload, media_type=content_type)
@@ -1,9 +1,12 @@
-from middlewares.shared_router import router
+from api.middlewares.shared_router import router
 from api.controllers.user_controller import UserController
-from storage.models import RegisterModel, LoginModel
+from api.dependencies import get_request_context
+from utils.context import RequestContext
+from fastapi import Depends, Request
+from storage.models import RegisterModel, LoginModel, RefreshModel
 
 
-@router.post('api/register')
+@router.post('/api/register')
 async def register(user_data: RegisterModel):
     """
     Register a new user with the provided user data.
@@ -12,11 +15,11 @@ async def register(user_data: RegisterModel):
     :return: Confirmation message or error response.
     """
    
-    return UserController.register(user_data.to_dict())
+    return await UserController.register(user_data.to_dict())
 
 
 @router.post('/api/login')
-async def login(user_data: LoginModel):
+async def login(user_data: LoginModel, request: Request):
     """
     Log in a user with the provided credentials.
     
@@ -24,24 +27,45 @@ async def login(user_data: LoginModel):
     :return: Confirmation message or error response.
     """
     
-    return UserController.login(user_data.to_dict())
+    return await UserController.login(user_data.to_dict(), request.client.host if request.client else None)
+
+@router.post('/api/token/refresh')
+async def refresh_token(data: RefreshModel):
+    """
+    Exchange a refresh token for a new access and refresh token.
+    
+    :param data: Refresh token issued at login.
+    :return: New tokens or error response.
+    """
+    
+    return await UserController.refresh(data.refresh_token)
 
 @router.get('/api/logout')
-async def logout():
+async def logout(request: Request, context: RequestContext = Depends(get_request_context)):
     """
     Log out the current user.
     
     :return: Confirmation message or error response.
     """
     
-    return UserController.logout()
+    return await UserController.logout(context, request.headers.get('x-refresh-token'))
+
+@router.post('/api/logout/all')
+async def logout_all(context: RequestContext = Depends(get_request_context)):
+    """
+    Log the current user out of every session.
+    
+    :return: Confirmation message or error response.
+    """
+    
+    return await UserController.logout_all(context)
 
 @router.get('/api/users/me')
-async def get_current_user():
+async def get_current_user(context: RequestContext = Depends(get_request_context)):
     """
     Get the current logged-in user.
     
     :return: User information or error response.
     """
     
-    return UserController.get_current_user()
+    return await UserController.get_current_user(context)
@@ -0,0 +1,106 @@
+"""
+Track CLI startup cost per command with ``python -X importtime``.
+
+For every registered command a fresh interpreter imports the CLI and loads
+that one command, exactly as dispatching it would; the import time of that
+process and the heavy backends it pulled in are reported. ``--help-runs``
+also times ``vault <command> help`` end to end. Nothing connects to MongoDB
+or Redis, so the numbers isolate import cost.
+
+Usage: python -m benchmarks.cli_startup [--runs N] [--help-runs N] [--json PATH] [command ...]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Dependencies worth flagging when a command imports them.
+HEAVY_MODULES = ["pymongo", "gridfs", "redis", "bcrypt", "celery", "PIL", "pydantic", "fastapi"]
+
+
+def parse_importtime(stderr):
+    """
+    Parse ``-X importtime`` output.
+
+    :param stderr: Captured standard error of the interpreter.
+    :return: Tuple of the total import time in microseconds and the set of imported module names.
+    """
+    total, modules = 0, set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        # Top-level imports are not indented; their cumulative times add up to the total.
+        if not name[1:].startswith(" "):
+            total += int(cumulative)
+    return total, modules
+
+
+def measure_imports(command):
+    """
+    Import the CLI and load one command in a fresh interpreter.
+
+    :return: Tuple of the import time in microseconds and the imported module names.
+    """
+    code = "import cli.cli\nfrom cli.command_router import load_command\n"
+    if command:
+        code += f"load_command({command!r})\n"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def measure_help(command):
+    """
+    Time ``vault <command> help`` end to end.
+
+    :return: Wall time in seconds.
+    """
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "main.py", "vault", command, "help"],
+        cwd=ROOT, capture_output=True, check=True,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("commands", nargs="*", help="Commands to measure (default: all)")
+    parser.add_argument("--runs", type=int, default=3, help="Import measurements per command; the median is kept")
+    parser.add_argument("--help-runs", type=int, default=0, help="End-to-end 'help' runs per command")
+    parser.add_argument("--json", help="Write the results to this file for tracking over time")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from cli.command_router import COMMANDS
+    commands = args.commands or sorted(COMMANDS)
+
+    results = {}
+    base, base_modules = measure_imports(None)
+    print(f"{'command':<12} {'import ms':>10} {'help ms':>8}  heavy modules")
+    print(f"{'(cli only)':<12} {base / 1000:>10.1f} {'':>8}  {', '.join(m for m in HEAVY_MODULES if m in base_modules)}")
+    for command in commands:
+        samples = [measure_imports(command) for _ in range(max(1, args.runs))]
+        import_us = statistics.median(total for total, _ in samples)
+        heavy = [module for module in HEAVY_MODULES if module in samples[0][1]]
+        help_s = statistics.median(measure_help(command) for _ in range(args.help_runs)) if args.help_runs else None
+        results[command] = {"import_ms": import_us / 1000, "help_ms": help_s * 1000 if help_s else None, "heavy": heavy}
+        help_text = f"{help_s * 1000:>8.1f}" if help_s else f"{'-':>8}"
+        print(f"{command:<12} {import_us / 1000:>10.1f} {help_text}  {', '.join(heavy)}")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"python": sys.version.split()[0], "cli_ms": base / 1000, "commands": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare thumbnail throughput of the one-task-per-file path with the batch
+worker mode.
+
+Both strategies render the same configured sizes from the same synthetic
+JPEGs held in memory, so the numbers isolate decode/encode cost and
+process-pool parallelism; broker and GridFS round trips are not included.
+
+Usage: python -m benchmarks.thumbnail_batch [--count N] [--width W] [--height H] [--workers N]
+"""
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+import argparse
+import io
+import os
+import time
+
+
+def make_images(count, width, height):
+    """
+    Build ``count`` distinct JPEG images in memory.
+    """
+    images = []
+    for index in range(count):
+        image = Image.new("RGB", (width, height), ((index * 37) % 256, (index * 91) % 256, 128))
+        output = io.BytesIO()
+        image.save(output, "JPEG", quality=90)
+        images.append(output.getvalue())
+    return images
+
+
+def render_per_task(data):
+    """
+    One file per invocation, as generate_thumbnail does: import and open
+    Pillow state afresh and decode at full resolution.
+    """
+    from PIL import Image
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    rendered = 0
+    from services.thumbnail_service import THUMBNAIL_SIZES
+    for size in THUMBNAIL_SIZES:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size))
+        thumbnail.save(io.BytesIO(), "JPEG")
+        rendered += 1
+    return rendered
+
+
+def render_batched(data):
+    """
+    The batch worker's per-item path: draft decoding and cascaded sizes.
+    """
+    from services.thumbnail_service import ThumbnailService
+    return len(ThumbnailService.render_source(io.BytesIO(data), "image.jpg", webp=False))
+
+
+def run(label, images, function, workers=None):
+    start = time.perf_counter()
+    if workers:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            total = sum(pool.map(function, images, chunksize=max(1, len(images) // (workers * 4))))
+    else:
+        total = sum(function(data) for data in images)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(images) / elapsed:8.1f} files/s  {total / elapsed:8.1f} thumbnails/s  ({elapsed:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--width", type=int, default=3000)
+    parser.add_argument("--height", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    images = make_images(args.count, args.width, args.height)
+    print(f"{args.count} JPEGs of {args.width}x{args.height}, {args.workers} workers")
+    run("one task per file", images, render_per_task)
+    run("batch, single process", images, render_batched)
+    run("batch, process pool", images, render_batched, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
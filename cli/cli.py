@@ -1,4 +1,5 @@
 import click
+from cli import daemon
 from cli.command_router import route_command
 
 @click.group()
@@ -9,18 +10,31 @@ def cli():
     """
     pass
 
-@cli.command(name='vault')
+@cli.command(name='vault', context_settings={"ignore_unknown_options": True})
 @click.argument('command_name')
-@click.argument('args', nargs=-1)
+@click.argument('args', nargs=-1, type=click.UNPROCESSED)
 def execute_command(command_name, args):
     """
     Execute a command by its name.
-    
+    Commands are forwarded to the local daemon when one is running.
+
     :param command_name: The name of the command to execute.
     :param args: Additional arguments for the command.
     """
     try:
-        result = route_command(command_name, *args)
-        click.echo(f"Command '{command_name}' executed successfully: \n{result}")
+        connection = None
+        if daemon.daemon_enabled and command_name not in daemon.LOCAL_COMMANDS:
+            connection = daemon.connect()
+        if connection:
+            from utils.session import load_session_token
+            result = daemon.forward(connection, command_name, args, load_session_token())
+        else:
+            result = route_command(command_name, *args)
+        if not hasattr(result, '__next__'):
+            click.echo(f"Command '{command_name}' executed successfully: \n{result}")
+            return
+        # Commands that page through results yield their output as it arrives.
+        for chunk in result:
+            click.echo(chunk)
     except ValueError as e:
-        click.echo(f"Error: {e}")
\ No newline at end of file
+        click.echo(f"Error: {e}")
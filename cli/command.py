@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import glob
 
 class Command(ABC):
     """
@@ -6,6 +7,9 @@ class Command(ABC):
     Provides a common interface for command operations.
     """
 
+    # RequestContext of the invoking user, set by the command router.
+    context = None
+
     @abstractmethod
     def execute(self, *args):
         """
@@ -13,6 +17,47 @@ class Command(ABC):
         """
         pass
 
+    @staticmethod
+    def parse_options(args, options=(), flags=()):
+        """
+        Split command arguments into options, flags and positional arguments.
+
+        :param args: Raw command arguments.
+        :param options: Names of options taking a value, e.g. '--sort' (``--sort name`` or ``--sort=name``).
+        :param flags: Names of boolean flags, e.g. '-r'.
+        :return: Tuple of a dictionary of the given options and flags (keyed by name
+                 without leading dashes) and the list of positional arguments.
+        """
+        values, positional = {}, []
+        args = iter(args)
+        for arg in args:
+            name, _, value = arg.partition('=')
+            if name in options:
+                value = value or next(args, None)
+                if value is None:
+                    raise ValueError(f"Option '{name}' needs a value.")
+                values[name.lstrip('-').replace('-', '_')] = value
+            elif arg in flags:
+                values[arg.lstrip('-').replace('-', '_')] = True
+            else:
+                positional.append(arg)
+        return values, positional
+
+    @classmethod
+    def parse_selection(cls, args):
+        """
+        Parse the file selection of commands that act on one or many files.
+
+        :param args: Raw command arguments: names or glob patterns, ``--dir <directory>`` and ``-r``.
+        :return: Tuple of the targets, the directory (or None), the recursive flag and
+                 whether more than a single named file is selected.
+        """
+        options, targets = cls.parse_options(args, ('--dir',), flags=('-r',))
+        directory_name = options.get('dir')
+        recursive = options.get('r', False)
+        bulk = bool(options) or len(targets) != 1 or any(glob.has_magic(target) for target in targets)
+        return targets, directory_name, recursive, bulk
+
     @abstractmethod
     def help(self):
         """
@@ -1,50 +1,71 @@
-from cli.commands.test import TestCommand
-from cli.commands.upload import UploadCommand
-from cli.commands.list import ListCommand
-from cli.commands.read import ReadCommand
-from cli.commands.metadata import MetadataCommand
-from cli.commands.delete import DeleteCommand
-from cli.commands.register import RegisterCommand
-from cli.commands.login import LoginCommand
-from cli.commands.logout import LogoutCommand
-from cli.commands.whoami import WhoamiCommand
-from cli.commands.publish import PublishCommand
-from cli.commands.unpublish import UnpublishCommand
-from cli.commands.mkdir import MkdirCommand
-from cli.commands.ls import LsCommand
+# Command registry. Commands are named by "module:Class" and imported only when
+# dispatched, so running one command never loads the dependencies of the others.
+from importlib import import_module
 
 
 COMMANDS = {
-    "test": TestCommand,
-    "upload": UploadCommand,
-    "list": ListCommand,
-    "read": ReadCommand,
-    "metadata": MetadataCommand,
-    "delete": DeleteCommand,
-    "register": RegisterCommand,
-    "login": LoginCommand,
-    "logout": LogoutCommand,
-    "whoami": WhoamiCommand,
-    "publish": PublishCommand,
-    "unpublish": UnpublishCommand,
-    "mkdir": MkdirCommand,
-    "ls": LsCommand,
+    "test": "cli.commands.test:TestCommand",
+    "upload": "cli.commands.upload:UploadCommand",
+    "list": "cli.commands.list:ListCommand",
+    "read": "cli.commands.read:ReadCommand",
+    "metadata": "cli.commands.metadata:MetadataCommand",
+    "delete": "cli.commands.delete:DeleteCommand",
+    "register": "cli.commands.register:RegisterCommand",
+    "login": "cli.commands.login:LoginCommand",
+    "logout": "cli.commands.logout:LogoutCommand",
+    "whoami": "cli.commands.whoami:WhoamiCommand",
+    "publish": "cli.commands.publish:PublishCommand",
+    "unpublish": "cli.commands.unpublish:UnpublishCommand",
+    "mkdir": "cli.commands.mkdir:MkdirCommand",
+    "ls": "cli.commands.ls:LsCommand",
+    "dedup": "cli.commands.dedup:DedupCommand",
+    "mvdir": "cli.commands.mvdir:MvdirCommand",
+    "du": "cli.commands.du:DuCommand",
+    "indexes": "cli.commands.indexes:IndexesCommand",
+    "get": "cli.commands.get:GetCommand",
+    "sync": "cli.commands.sync:SyncCommand",
+    "daemon": "cli.commands.daemon:DaemonCommand",
+    "batch": "cli.commands.batch:BatchCommand",
 }
 
-def route_command(command_name, *args):
+_loaded = {}
+
+
+def load_command(command_name):
+    """
+    Import the class of a registered command.
+
+    :param command_name: The name of the command.
+    :return: The command class.
+    """
+    command_class = _loaded.get(command_name)
+    if command_class is None:
+        target = COMMANDS.get(command_name)
+        if not target:
+            raise ValueError(f"Command '{command_name}' not found.")
+        module_name, _, class_name = target.partition(':')
+        command_class = _loaded[command_name] = getattr(import_module(module_name), class_name)
+    return command_class
+
+
+def route_command(command_name, *args, context=None):
     """
     Route the command to the appropriate command class.
     
     :param command_name: The name of the command to execute.
     :param args: Positional arguments for the command.
+    :param context: RequestContext to run the command with; resolved from the current session if omitted.
     :return: The result of the command execution.
     """
-    command_class = COMMANDS.get(command_name)
-    if not command_class:
-        raise ValueError(f"Command '{command_name}' not found.")
+    command_class = load_command(command_name)
     
     if args and args[0] == "help":
         return command_class().help()
 
+    if context is None:
+        from services.user_service import UserService
+        context = UserService.get_context()
+
     command_instance = command_class()
-    return command_instance.execute(args)
\ No newline at end of file
+    command_instance.context = context
+    return command_instance.execute(args)
@@ -0,0 +1,208 @@
+from cli.command import Command
+from cli.command_router import route_command
+from cli.daemon import LOCAL_COMMANDS
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, redirect_stdout
+import io
+import json
+import shlex
+import sys
+import threading
+import time
+
+
+class ThreadStdout:
+    """
+    Stand-in for sys.stdout while a batch runs. Threads capturing a command's
+    output write to their own buffer; everything else reaches the real stream.
+    """
+
+    def __init__(self, stream):
+        """
+        :param stream: The real standard output.
+        """
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        return (getattr(self.local, "buffer", None) or self.stream).write(text)
+
+    def flush(self):
+        (getattr(self.local, "buffer", None) or self.stream).flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+@contextmanager
+def capture_stdout():
+    """
+    Capture what the current thread prints.
+
+    :return: Context manager yielding the StringIO buffer that receives the output.
+    """
+    buffer = io.StringIO()
+    stdout = sys.stdout
+    if not isinstance(stdout, ThreadStdout):
+        with redirect_stdout(buffer):
+            yield buffer
+        return
+    stdout.local.buffer = buffer
+    try:
+        yield buffer
+    finally:
+        stdout.local.buffer = None
+
+
+def parse_line(line):
+    """
+    Parse one line of a batch script.
+
+    :param line: Either a shell-style command (``ls -r photos``, optionally prefixed
+                 with ``vault``), a JSON array (``["ls", "-r", "photos"]``) or a JSON
+                 object (``{"command": "ls", "args": ["-r", "photos"]}``).
+    :return: Tuple of the command name and its arguments, or None for blank lines and comments.
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line[0] in '[{':
+        try:
+            parsed = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON command: {str(e)}")
+        words = [parsed.get("command"), *parsed.get("args", [])] if isinstance(parsed, dict) else parsed
+    else:
+        try:
+            words = shlex.split(line)
+        except ValueError as e:
+            raise ValueError(f"Invalid command line: {str(e)}")
+    if words and words[0] == 'vault':
+        words = words[1:]
+    if not words or not all(isinstance(word, str) for word in words):
+        raise ValueError("A command must be a name followed by string arguments.")
+    return words[0], words[1:]
+
+
+def run_line(number, line, context):
+    """
+    Run one line of a batch script and capture its outcome.
+
+    :param number: Line number in the script.
+    :param line: Raw line.
+    :param context: RequestContext shared by every command of the batch.
+    :return: Result dictionary, or None for blank lines and comments.
+    """
+    started = time.perf_counter()
+    result = {"line": number, "command": None, "args": [], "status": "ok", "output": None, "error": None}
+    try:
+        parsed = parse_line(line)
+        if parsed is None:
+            return None
+        result["command"], result["args"] = parsed
+        if result["command"] in LOCAL_COMMANDS:
+            raise ValueError(f"Command '{result['command']}' cannot run in a batch.")
+        with capture_stdout() as printed:
+            output = route_command(result["command"], *result["args"], context=context)
+            if hasattr(output, '__next__'):
+                output = [str(chunk) for chunk in output]
+        if isinstance(output, bool):
+            output = None
+        elif output is not None and not isinstance(output, (str, dict, list)):
+            output = str(output)
+        if printed.getvalue():
+            # Anything a command printed belongs to its result, not the JSON stream.
+            output = printed.getvalue() if output is None else [printed.getvalue(), output]
+        result["output"] = output
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+class BatchCommand(Command):
+    """
+    Command to run many vault commands in one process.
+    Commands share the database connections and the resolved session, and
+    each one produces a JSON line with its outcome.
+    """
+
+    def execute(self, args):
+        """
+        Execute the batch command.
+
+        :param script: File with one command per line; '-' or omitted reads standard input.
+        """
+        options, args = self.parse_options(args, ('--workers',), flags=('--stop-on-error',))
+        if len(args) > 1:
+            raise ValueError("Usage: vault batch [script|-] [--workers N] [--stop-on-error]")
+        workers = options.get('workers', '1')
+        if not workers.isdigit() or int(workers) < 1:
+            raise ValueError("--workers must be at least 1.")
+        workers = int(workers)
+        if workers > 1 and options.get('stop_on_error'):
+            raise ValueError("--stop-on-error runs commands in order and cannot be combined with --workers.")
+        script = args[0] if args else '-'
+        if script != '-':
+            try:
+                source = open(script, encoding='utf-8')
+            except OSError as e:
+                raise ValueError(f"Error reading batch script: {str(e)}")
+        else:
+            source = sys.stdin
+        return self.run(source, workers, options.get('stop_on_error', False))
+
+    def run(self, source, workers, stop_on_error):
+        """
+        Run every line of a script and yield one JSON line per command, then a summary.
+        Concurrent batches report commands as they finish; use the line
+        number to match results to the script.
+        """
+        started = time.perf_counter()
+        totals = {"ok": 0, "error": 0}
+        lines = enumerate(source, start=1)
+        executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        stdout, sys.stdout = sys.stdout, ThreadStdout(sys.stdout)
+        try:
+            if executor is None:
+                results = (run_line(number, line, self.context) for number, line in lines)
+            else:
+                results = (future.result() for future in as_completed([
+                    executor.submit(run_line, number, line, self.context) for number, line in lines
+                ]))
+            for result in results:
+                if result is None:
+                    continue
+                totals[result["status"]] += 1
+                yield json.dumps(result, default=str)
+                if stop_on_error and result["status"] == "error":
+                    break
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+            sys.stdout = stdout
+            if source is not sys.stdin:
+                source.close()
+        elapsed = time.perf_counter() - started
+        commands = totals["ok"] + totals["error"]
+        yield json.dumps({"summary": {
+            "commands": commands,
+            "ok": totals["ok"],
+            "errors": totals["error"],
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "commands_per_second": round(commands / max(elapsed, 1e-6), 1),
+        }})
+
+    def help(self):
+        """
+        Display help information for the batch command.
+        """
+        return (
+            "Usage: vault batch [script|-] [--workers N] [--stop-on-error] - run one command per line "
+            "from a file or standard input in a single process.\n"
+            "Lines are shell-style ('ls -r photos'), JSON arrays (['ls', '-r', 'photos']) or JSON objects "
+            "({'command': 'ls', 'args': ['-r']}); blank lines and '#' comments are skipped.\n"
+            "Each command prints a JSON line with its line number, status, output and timing, followed by a "
+            "summary. With --workers N, up to N commands run at once, so only batch independent commands."
+        )
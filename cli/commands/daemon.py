@@ -0,0 +1,45 @@
+from cli.command import Command
+from cli import daemon
+
+
+class DaemonCommand(Command):
+    """
+    Command to run or control the local CLI daemon.
+    While the daemon runs, other vault commands are forwarded to it and reuse
+    its warm database connections and caches.
+    """
+
+    def execute(self, args):
+        """
+        Execute the daemon command.
+
+        :param action: 'serve' to run the daemon in the foreground, 'status' or 'stop'.
+        """
+        action = args[0] if args else 'status'
+        if action == 'serve':
+            daemon.serve()
+            return "Daemon stopped."
+        if action not in ['status', 'stop']:
+            raise ValueError("Usage: vault daemon [serve|status|stop]")
+
+        reply = daemon.request(action)
+        if reply is None:
+            return f"No daemon is listening on {daemon.socket_path}."
+        if action == 'stop':
+            return "Daemon is stopping."
+        return (
+            f"\nPID: {reply['pid']}\nSocket: {reply['socket']}"
+            f"\nUptime (s): {reply['uptime']}\nCommands served: {reply['served']}"
+        )
+
+    def help(self):
+        """
+        Display help information for the daemon command.
+        """
+        return (
+            "Usage: vault daemon serve - run the daemon in the foreground (e.g. in the background with '&').\n"
+            "       vault daemon status|stop - show or stop the running daemon.\n"
+            "While it runs, vault commands execute in the daemon over a Unix socket (VAULT_SOCKET) "
+            "with warm connections; set VAULT_DAEMON=off to always run in process. The daemon uses "
+            "its own environment, so start it with the same settings as the CLI."
+        )
@@ -0,0 +1,35 @@
+from cli.command import Command
+from services.file_service import FileService
+
+
+class DedupCommand(Command):
+    """
+    Command to report storage deduplication.
+    Shows how many bytes are saved by storing identical content once.
+    """
+
+    def execute(self, args):
+        """
+        Execute the dedup command.
+
+        :param scope: 'user' (default) for your files or 'global' for all files.
+        """
+        scope = args[0] if args else 'user'
+        if scope not in ['user', 'global']:
+            raise ValueError("Usage: vault dedup [user|global]")
+
+        report = FileService(self.context).dedup_report(scope)
+        return (
+            f"\nFiles: {report['files']}\nUnique blobs: {report['blobs']}"
+            f"\nLogical size (bytes): {report['logical_bytes']}\nStored size (bytes): {report['stored_bytes']}"
+            f"\nSaved (bytes): {report['saved_bytes']}\nDedup ratio: {report['dedup_ratio']:.2f}"
+        )
+
+    def help(self):
+        """
+        Display help information for the dedup command.
+        """
+        return (
+            "Usage: vault dedup [user|global] - report storage saved by deduplication "
+            "('global' covers all files and is limited to ADMIN_USER_IDS)."
+        )
@@ -1,6 +1,5 @@
 from cli.command import Command
 from services.file_service import FileService
-from services.user_service import UserService
 
 
 class DeleteCommand(Command):
@@ -15,18 +14,29 @@ class DeleteCommand(Command):
 
         :param file_path: Path to the file to delete.
         """
-        if not args or not isinstance(args[0], str) or not args[0].strip():
+        targets, directory_name, recursive, bulk = self.parse_selection(args)
+        if bulk:
+            result = FileService(self.context).delete_files(targets, directory_name, recursive)
+            summary = f"Matched {result['matched']} file(s), deleted {result['deleted']}."
+            if result['missing']:
+                summary += f"\nNot found: {', '.join(result['missing'])}"
+            return summary
+        if not targets[0].strip():
             raise ValueError("File path must be provided and cannot be empty.")
         
-        user = UserService.get_user_id()
+        user = self.context.user_id
         if not user:
             raise ValueError("No user session found. Cannot delete file.")
 
-        file_path = args[0]
-        return FileService().delete_file(file_path)
+        file_path = targets[0]
+        return FileService(self.context).delete_file(file_path)
 
     def help(self):
         """
         Display help information for the delete command.
         """
-        return FileService().help()
\ No newline at end of file
+        return (
+            "Usage: vault delete <file_name> - delete a file.\n"
+            "       vault delete <name|glob>... [--dir <directory> [-r]] - delete many files at once; "
+            "--dir on its own deletes every file in the directory."
+        )
\ No newline at end of file
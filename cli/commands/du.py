@@ -0,0 +1,27 @@
+from cli.command import Command
+from services.file_service import FileService
+
+
+class DuCommand(Command):
+    """
+    Command to report the recursive size of a directory.
+    """
+
+    def execute(self, args):
+        """
+        Execute the du command.
+
+        :param directory_path: Directory to measure (default: root).
+        """
+        directory_name = args[0] if args else 'root'
+        usage = FileService(self.context).directory_usage(directory_name)
+        return (
+            f"\nDirectory: {usage['path']}\nSubdirectories: {max(usage['directories'] - 1, 0)}"
+            f"\nFiles: {usage['files']}\nSize (bytes): {usage['bytes']}"
+        )
+
+    def help(self):
+        """
+        Display help information for the du command.
+        """
+        return "Usage: vault du [directory_path] - show the number of files and bytes under a directory."
@@ -0,0 +1,99 @@
+from cli.command import Command
+from services.file_service import FileService
+import time
+
+
+def stream_downloads(service, plan, workers=None):
+    """
+    Download planned files and report progress as each one finishes.
+
+    :param service: FileService of the caller.
+    :param plan: List of (metadata, local path) tuples.
+    :param workers: Number of concurrent downloads.
+    :return: Generator of output lines.
+    """
+    if not plan:
+        yield "No files found."
+        return
+    started = time.monotonic()
+    totals = {"downloaded": 0, "resumed": 0, "skipped": 0, "failed": 0}
+    size = received = 0
+    for result in service.download_many(plan, workers):
+        totals[result["status"]] += 1
+        size += result["size"]
+        received += result["received"]
+        line = f"{result['status']:<11}{result['file_name']} -> {result['path']}"
+        yield f"{line}: {result['error']}" if result["error"] else line
+
+    elapsed = max(time.monotonic() - started, 1e-6)
+    files = sum(totals.values())
+    yield (
+        f"\nFiles: {files} (downloaded {totals['downloaded']}, resumed {totals['resumed']}, "
+        f"skipped {totals['skipped']}, failed {totals['failed']})"
+        f"\nSize (bytes): {size}\nReceived (bytes): {received}\nElapsed (s): {elapsed:.2f}"
+        f"\nThroughput: {files / elapsed:.1f} files/s, {received / elapsed / 1024 / 1024:.2f} MiB/s"
+    )
+
+
+def workers_option(options):
+    """
+    Read the --workers option.
+    """
+    workers = int(options['workers']) if 'workers' in options else None
+    if workers is not None and workers < 1:
+        raise ValueError("--workers must be at least 1.")
+    return workers
+
+
+class GetCommand(Command):
+    """
+    Command to download files to local disk.
+    Downloads one file, a directory or every file matching a listing filter.
+    """
+
+    def execute(self, args):
+        """
+        Execute the get command.
+
+        :param name: File name, or directory path with -r; omitted when filtering.
+        :param destination: Local directory to download into (default: current directory).
+        """
+        options, args = self.parse_options(
+            args, ('--dir', '--owner', '--visibility', '--type', '--workers'), flags=('-r',)
+        )
+        filters = {key: options[key] for key in ('owner', 'visibility') if key in options}
+        if 'type' in options:
+            filters['file_type'] = options['type']
+        service = FileService(self.context)
+
+        if filters or 'dir' in options:
+            if len(args) > 1:
+                raise ValueError("Usage: vault get [--dir <directory>] [-r] [--owner ...] [--type ...] [destination]")
+            destination = self.context.local_path(args[0] if args else '.')
+            plan = service.plan_downloads(
+                destination, directory_name=options.get('dir'), recursive=options.get('r', False), **filters
+            )
+        elif options.get('r'):
+            if not args or len(args) > 2:
+                raise ValueError("Usage: vault get -r <directory> [destination]")
+            destination = self.context.local_path(args[1] if len(args) > 1 else '.')
+            plan = service.plan_downloads(destination, directory_name=args[0])
+        else:
+            if not args or len(args) > 2:
+                raise ValueError("Usage: vault get <file_name> [destination]")
+            destination = self.context.local_path(args[1] if len(args) > 1 else '.')
+            plan = service.plan_downloads(destination, file_name=args[0])
+        return stream_downloads(service, plan, workers_option(options))
+
+    def help(self):
+        """
+        Display help information for the get command.
+        """
+        return (
+            "Usage: vault get <file_name> [destination] - download a file.\n"
+            "       vault get -r <directory> [destination] - download a directory and its subdirectories.\n"
+            "       vault get [--dir <directory> [-r]] [--owner me|<user_id>] [--visibility public|private] "
+            "[--type <type>] [destination] - download every matching file.\n"
+            "Add --workers N to set the number of parallel downloads. Files that already match "
+            "locally are skipped and interrupted downloads resume."
+        )
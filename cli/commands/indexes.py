@@ -0,0 +1,40 @@
+from cli.command import Command
+from services.index_service import IndexService
+
+
+class IndexesCommand(Command):
+    """
+    Command to create the MongoDB indexes and check query plans.
+    """
+
+    def execute(self, args):
+        """
+        Execute the indexes command.
+
+        :param action: 'ensure' (default) to create missing indexes, or 'check'
+                       to explain every repository query and flag collection scans.
+        """
+        action = args[0] if args else 'ensure'
+        if action not in ['ensure', 'check']:
+            raise ValueError("Usage: vault indexes [ensure|check]")
+
+        service = IndexService()
+        if action == 'ensure':
+            created = service.ensure()
+            return "\n".join(f"{collection}: {', '.join(names)}" for collection, names in created.items())
+
+        report = service.check()
+        lines = []
+        for plan in report:
+            status = "COLLSCAN" if plan['collscan'] else "ok"
+            used = ', '.join(plan['indexes']) or '-'
+            lines.append(f"{status:<8} {plan['query']} ({plan['collection']}): {' > '.join(plan['stages'])} [{used}]")
+        scans = sum(1 for plan in report if plan['collscan'])
+        lines.append(f"\n{scans} of {len(report)} queries scan a whole collection.")
+        return "\n".join(lines)
+
+    def help(self):
+        """
+        Display help information for the indexes command.
+        """
+        return "Usage: vault indexes [ensure|check] - create MongoDB indexes or check queries for collection scans."
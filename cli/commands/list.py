@@ -1,36 +1,68 @@
 from cli.command import Command
+from cli.output import get_writer, stream_pages
 from services.file_service import FileService
 
+
+LIST_OPTIONS = ('--sort', '--owner', '--visibility', '--type', '--dir', '--limit', '--page-size', '--cursor', '--format')
+
+
+# Table columns as (heading, field, width), and the fields of the machine-readable formats.
+FILE_COLUMNS = [("ID", "file_id", 24), ("File Name", "file_name", 12), ("Size (bytes)", "file_size", 12), ("Uploaded At", "created_at", 20)]
+DIRECTORY_COLUMN = ("Directory", "directory_name", 24)
+FILE_FIELDS = ["file_id", "file_name", "directory_name", "file_size", "type", "visibility", "user_id", "created_at", "checksum"]
+
+
+def stream_files(service, options, with_directory=False):
+    """
+    Fetch and write a listing one page at a time.
+
+    :param service: FileService of the caller.
+    :param options: Parsed command options.
+    :param with_directory: Add a directory column to the table.
+    :return: Generator of output chunks.
+    """
+    limit = int(options.pop('limit')) if 'limit' in options else None
+    page_size = int(options.pop('page_size')) if 'page_size' in options else None
+    columns = [DIRECTORY_COLUMN, *FILE_COLUMNS] if with_directory else FILE_COLUMNS
+    writer = get_writer(options.get('format', 'table'), columns, FILE_FIELDS, noun="file")
+    pages = service.iter_files(
+        limit=limit,
+        page_size=page_size,
+        cursor=options.get('cursor'),
+        owner=options.get('owner'),
+        visibility=options.get('visibility'),
+        file_type=options.get('type'),
+        directory_name=options.get('dir'),
+        recursive=options.get('r', False),
+        sort=options.get('sort', 'created_at'),
+        descending=options.get('desc', False),
+    )
+    return stream_pages(pages, writer, "files")
+
+
 class ListCommand(Command):
     """
     Command to list files.
-    This command is used to list files in the specified directory.
+    Lists the files visible to the current user, fetching them page by page.
     """
 
     def execute(self, args):
         """
         Execute the list command.
-        :param args: Additional arguments (not used).
-        """
 
-        
-        metadata = FileService().list_files()
-        if not metadata:
-            return ("No files found.")
-        if metadata:
-            table = f"{'ID':<24}| {'File Name':<12}| {'Size (bytes)':<9}| {'Uploaded At':<20} \n{'-'*24}| {'-'*12}| {'-'*12}| {'-'*20}"
-    
-            for key, data in metadata.items():
-                file_name = data.get("file_name", "Unknown")
-                file_size = data.get("file_size", "Unknown")
-                created_at = data.get("created_at", "Unknown")
-                id = data.get("file_id", "Unknown")
-                file_row = f"{id:<20}| {file_name:<12}| {file_size:<12}| {created_at:<20}"
-                table += f"\n{file_row}"
-        return (f'\n{table}')
+        :param args: Listing options; see ``help``.
+        """
+        options, _ = self.parse_options(args, LIST_OPTIONS, flags=('--desc', '-r'))
+        return stream_files(FileService(self.context), options)
 
     def help(self):
         """
         Display help information for the list command.
         """
-        return FileService().help()
+        return (
+            "Usage: vault list [--sort name|size|created_at] [--desc] [--owner me|<user_id>] "
+            "[--visibility public|private] [--type <type>] [--dir <path> [-r]] [--limit N] "
+            "[--page-size N] [--cursor <cursor>] [--format table|json|ndjson|csv] - list files page by page.\n"
+            "Output is written as each page arrives. With --limit, json reports where to continue "
+            "in 'next_cursor' and ndjson in a final {'next_cursor': ...} line."
+        )
@@ -1,7 +1,8 @@
 from cli.cli import click
 from services.user_service import UserService
 from cli.command import Command
-from storage.models import UserModel
+from storage.models import SessionModel
+from utils.session import save_session_token
 
 
 class LoginCommand(Command):
@@ -27,11 +28,11 @@ class LoginCommand(Command):
             raise ValueError("Username and password cannot be empty.")
         
         result = UserService().login_user(username, password)
-        if isinstance(result, UserModel):
-            del result.password
+        if isinstance(result, SessionModel):
+            save_session_token(result.token)
             return {
-                "message": f"User '{result.username}' logged in successfully.",
-                "user_data": result.to_dict(),
+                "message": f"User '{result.user.username}' logged in successfully.",
+                "user_data": result.to_dict()["user"],
                 "status": 200
             }
         else:
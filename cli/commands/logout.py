@@ -1,5 +1,6 @@
 from cli.command import Command
 from services.user_service import UserService
+from utils.session import clear_session_token
 
 
 class LogoutCommand(Command):
@@ -12,12 +13,22 @@ class LogoutCommand(Command):
         """
         Execute the logout command.
         
-        :param args: Additional arguments (not used).
+        :param scope: 'all' to end every session of the user, not just this one.
         """
-        return UserService().logout_user()
+        if args and args[0] == 'all':
+            user_id = self.context.user_id
+            if not user_id:
+                raise ValueError("No user session found.")
+            revoked = UserService.revoke_user_sessions(user_id)
+            clear_session_token()
+            return f"Logged out of {revoked} session(s)."
+
+        result = UserService().logout_user()
+        clear_session_token()
+        return result
 
     def help(self):
         """
         Display help information for the logout command.
         """
-        return "Use this command to log out of your account."
+        return "Usage: vault logout [all] - log out of this session, or of every session with 'all'."
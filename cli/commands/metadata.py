@@ -1,6 +1,5 @@
 from cli.command import Command
 from services.file_service import FileService
-from services.user_service import UserService
 
 
 class MetadataCommand(Command):
@@ -19,14 +18,15 @@ class MetadataCommand(Command):
             raise ValueError("File name must be provided and cannot be empty.")
 
         file_path = args[0]
-        metadata = FileService().read_metadata(file_path)
-        if metadata:
-            print(f"\nMetadata for {file_path}:\n")
-            print(f"File Name: {metadata.get('file_name', None)}\nFile ID: {metadata.get('file_id', None)}\nFile Size: {metadata.get('file_size', None)}\nFile Path: {metadata.get("file_path", None)}\nVisibility: {metadata.get("visibility", None)}\nCreated At: {metadata.get('created_at', None)}\n")
-
-        else:
-            print(f"No metadata found for {file_path}.")
-        return True
+        metadata = FileService(self.context).read_metadata(file_path)
+        if not metadata:
+            return f"No metadata found for {file_path}."
+        return (
+            f"\nMetadata for {file_path}:\n\n"
+            f"File Name: {metadata.get('file_name', None)}\nFile ID: {metadata.get('file_id', None)}\n"
+            f"File Size: {metadata.get('file_size', None)}\nFile Path: {metadata.get('file_path', None)}\n"
+            f"Visibility: {metadata.get('visibility', None)}\nCreated At: {metadata.get('created_at', None)}\n"
+        )
 
     def help(self):
         """
@@ -8,27 +8,20 @@ class MkdirCommand(Command):
     """
 
     def help(self):
-        return "Create a new directory."
+        return "Usage: vault mkdir [-p] <directory_path> [parent_path] - create a directory; -p also creates missing parents."
     
     def execute(self, args):
+        parents = '-p' in args
+        args = [arg for arg in args if arg != '-p']
         if len(args) < 1:
-            return "Usage: mkdir <directory_name>"
+            return "Usage: mkdir [-p] <directory_path> [parent_path]"
         
         directory_name = args[0]
         parent_name = args[1] if len(args) > 1 else None
-        parent_id = None
-        directory_path = directory_name
-        if not directory_name:
+        if not directory_name.strip('/'):
             return "Directory name cannot be empty."
-        if parent_name:
-            parent = FileService().get_directory(parent_name)
-            if not parent:
-                return f"Parent directory '{parent_name}' does not exist."
-            else:
-                parent_id = parent.id
-            directory_path = f"{parent_name}/{directory_name}"
+        directory_path = f"{parent_name}/{directory_name}" if parent_name else directory_name
         try:
-            FileService.create_directory(directory_name, parent_id, directory_path)
-            return f"Directory '{directory_name}' created successfully."
+            return FileService(self.context).create_directory(directory_path, parents=parents)
         except Exception as e:
-            return f"Error creating directory: {str(e)}"
\ No newline at end of file
+            return f"Error creating directory: {str(e)}"
@@ -0,0 +1,26 @@
+from cli.command import Command
+from services.file_service import FileService
+
+
+class MvdirCommand(Command):
+    """
+    Command to move or rename a directory.
+    The whole subtree moves with it.
+    """
+
+    def execute(self, args):
+        """
+        Execute the mvdir command.
+
+        :param source: Path of the directory to move.
+        :param destination: New path of the directory.
+        """
+        if len(args) != 2:
+            raise ValueError("Usage: vault mvdir <source_path> <destination_path>")
+        return FileService(self.context).move_directory(args[0], args[1])
+
+    def help(self):
+        """
+        Display help information for the mvdir command.
+        """
+        return "Usage: vault mvdir <source_path> <destination_path> - move or rename a directory and everything in it."
@@ -14,11 +14,18 @@ class PublishCommand(Command):
         
         :param file_path: Name of the file to unpublish.
         """
-        if not args or not isinstance(args[0], str) or not args[0].strip():
+        targets, directory_name, recursive, bulk = self.parse_selection(args)
+        if bulk:
+            result = FileService(self.context).publish_files(targets, directory_name, recursive)
+            summary = f"Matched {result['matched']} file(s), published {result['changed']}."
+            if result['missing']:
+                summary += f"\nNot found: {', '.join(result['missing'])}"
+            return summary
+        if not targets[0].strip():
             raise ValueError("File name must be provided and cannot be empty.")
         
-        file_name = args[0]
-        result = FileService().publish_file(file_name)
+        file_name = targets[0]
+        result = FileService(self.context).publish_file(file_name)
         if isinstance(result, dict):
             return f"File '{file_name}' published successfully."
         else:
@@ -28,4 +35,8 @@ class PublishCommand(Command):
         """
         Display help information for the unpublish command.
         """
-        return FileService().help()
\ No newline at end of file
+        return (
+            "Usage: vault publish <file_name> - publish a file.\n"
+            "       vault publish <name|glob>... [--dir <directory> [-r]] - publish many files at once; "
+            "--dir on its own selects every file in the directory."
+        )
\ No newline at end of file
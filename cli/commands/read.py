@@ -1,6 +1,5 @@
 from cli.command import Command
 from services.file_service import FileService
-from services.user_service import UserService
 
 
 class ReadCommand(Command):
@@ -19,8 +18,7 @@ class ReadCommand(Command):
             raise ValueError("File name must be provided and cannot be empty.")
         
         file_path = args[0]
-        print(FileService().read_file(file_path))
-        return True
+        return FileService(self.context).read_file(file_path)
 
     def help(self):
         """
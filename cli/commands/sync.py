@@ -0,0 +1,35 @@
+from cli.command import Command
+from cli.commands.get import stream_downloads, workers_option
+from services.file_service import FileService
+
+
+class SyncCommand(Command):
+    """
+    Command to bring a local directory up to date with a vault directory.
+    Only files that are missing or differ locally are transferred.
+    """
+
+    def execute(self, args):
+        """
+        Execute the sync command.
+
+        :param directory_path: Vault directory to sync (default: root).
+        :param destination: Local directory to sync into (default: current directory).
+        """
+        options, args = self.parse_options(args, ('--workers',))
+        if len(args) > 2:
+            raise ValueError("Usage: vault sync [directory_path] [destination]")
+        directory_name = args[0] if args else 'root'
+        service = FileService(self.context)
+        destination = self.context.local_path(args[1] if len(args) > 1 else '.')
+        plan = service.plan_downloads(destination, directory_name=directory_name)
+        return stream_downloads(service, plan, workers_option(options))
+
+    def help(self):
+        """
+        Display help information for the sync command.
+        """
+        return (
+            "Usage: vault sync [directory_path] [destination] [--workers N] - download a directory tree, "
+            "skipping files whose local size and checksum already match."
+        )
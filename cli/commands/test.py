@@ -12,7 +12,7 @@ class TestCommand(Command):
         Execute the test command.
         """
         # Validation ...
-        TestService().run_test()
+        return TestService().run_test()
 
     def help(self):
         """
@@ -1,7 +1,8 @@
 from cli.command import Command
 from services.file_service import FileService
-from services.user_service import UserService
+import glob
 import os
+import time
 
 
 class UploadCommand(Command):
@@ -16,14 +17,21 @@ class UploadCommand(Command):
         
         :param file_path: Path to the file to upload.
         """
-        user_id = UserService.get_user_id()
+        user_id = self.context.user_id
         if not user_id:
             raise ValueError("No user session found. Cannot upload file.")
-        if len(args) > 2:
-            raise ValueError("Usage: vault upload <file_name> <directory_name>")
 
-        file_path = args[0] if args else None
-        directory_name = args[1] if len(args) > 1 else 'root'
+        # Bulk mode is only chosen explicitly, so the second argument of a
+        # single upload is always a vault directory, whatever exists locally.
+        options, paths = self.parse_options(args, ('--dir', '--workers'), flags=('--bulk',))
+        local_paths = [self.context.local_path(path) for path in paths]
+        if options:
+            return self.upload_many(local_paths, options)
+        if len(paths) > 2:
+            raise ValueError("Usage: vault upload <file_name> <directory_name>; use --bulk to upload several paths.")
+
+        file_path = local_paths[0] if paths else None
+        directory_name = paths[1] if len(paths) > 1 else 'root'
 
         if not file_path:
             raise ValueError("File path must be provided.")
@@ -31,17 +39,52 @@ class UploadCommand(Command):
             raise ValueError("File path must be a string.")
         if not file_path.strip():
             raise ValueError("File path cannot be empty or whitespace.")
+        if os.path.isdir(file_path) or glob.has_magic(file_path):
+            raise ValueError(f"Not a single file: {file_path}; use --bulk to upload directories and globs.")
         if not os.path.isfile(file_path):
             raise ValueError(f"File does not exist: {file_path}")
 
-        file_name = file_path.split('/')[-1]
+        file_name = os.path.basename(file_path)
         with open(file_path, 'rb') as f:
-            data = f.read()
+            return FileService(self.context).upload_file_stream(file_name, f, directory_name=directory_name, user_id=user_id)
+
+    def upload_many(self, paths, options):
+        """
+        Upload every file under the given paths and report progress as files finish.
+        """
+        if not paths:
+            raise ValueError("At least one file, directory or glob must be provided.")
+        workers = int(options['workers']) if 'workers' in options else None
+        if workers is not None and workers < 1:
+            raise ValueError("--workers must be at least 1.")
+
+        started = time.monotonic()
+        totals = {"uploaded": 0, "linked": 0, "skipped": 0, "failed": 0}
+        size = sent = 0
+        for result in FileService(self.context).upload_many(paths, options.get('dir', 'root'), workers):
+            totals[result["status"]] += 1
+            size += result["size"]
+            sent += result["sent"]
+            line = f"{result['status']:<9}{result['path']} -> {result['directory']}"
+            yield f"{line}: {result['error']}" if result["error"] else line
 
-        return FileService().upload_file(file_name, data, directory_name=directory_name, user_id=user_id)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        files = sum(totals.values())
+        yield (
+            f"\nFiles: {files} (uploaded {totals['uploaded']}, linked {totals['linked']}, "
+            f"skipped {totals['skipped']}, failed {totals['failed']})"
+            f"\nSize (bytes): {size}\nSent (bytes): {sent}\nElapsed (s): {elapsed:.2f}"
+            f"\nThroughput: {files / elapsed:.1f} files/s, {sent / elapsed / 1024 / 1024:.2f} MiB/s"
+        )
 
     def help(self):
         """
         Display help information for the upload command.
         """
-        return FileService().help()
+        return (
+            "Usage: vault upload <file_path> [directory_name] - upload one file.\n"
+            "       vault upload --bulk <path|glob>... [--dir <directory>] [--workers N] - upload files, "
+            "directories (recursively, mirroring subdirectories) and glob matches in parallel; "
+            "files already stored with the same name and content are skipped. "
+            "--dir or --workers also select bulk mode."
+        )
@@ -14,7 +14,7 @@ class WhoamiCommand(Command):
         
         :param args: Additional arguments (not used).
         """
-        current_user = UserService().get_current_user()
+        current_user = UserService.get_current_user(self.context.token)
         if not current_user or isinstance(current_user, str):
             raise ValueError("No user session found.")
         
@@ -0,0 +1,227 @@
+# Optional long-lived CLI daemon. It listens on a Unix socket and runs commands
+# with warm database pools and caches; the CLI forwards to it when it is running
+# and executes in process otherwise. Messages are JSON lines.
+from pathlib import Path
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+
+socket_path = Path(os.getenv("VAULT_SOCKET", Path.home() / ".vault" / "daemon.sock"))
+daemon_enabled = os.getenv("VAULT_DAEMON", "auto").lower() not in ("off", "false", "0")
+
+# Commands that read the terminal or manage the daemon itself always run in the client.
+LOCAL_COMMANDS = {"register", "login", "daemon", "batch"}
+
+
+def connect(path=None):
+    """
+    Connect to the daemon.
+
+    :param path: Socket path; defaults to VAULT_SOCKET.
+    :return: Connected socket, or None if no daemon is listening.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(str(path or socket_path))
+        return client
+    except (FileNotFoundError, ConnectionRefusedError):
+        client.close()
+        return None
+
+
+def send(connection, message):
+    connection.sendall(json.dumps(message).encode('utf-8') + b"\n")
+
+
+def raise_error(message):
+    """
+    Re-raise an error reported by the daemon in the client.
+    """
+    if message.get("type") == "ValueError":
+        raise ValueError(message["error"])
+    raise RuntimeError(f"Daemon error: {message['error']}")
+
+
+def forward(connection, command_name, args, token=None):
+    """
+    Run a command in the daemon.
+
+    :param connection: Socket returned by ``connect``.
+    :param command_name: The name of the command to execute.
+    :param args: Arguments for the command.
+    :param token: Session token of the caller.
+    :return: The command result, or a generator of output chunks for streaming commands.
+    """
+    send(connection, {"op": "run", "command": command_name, "args": list(args), "token": token, "cwd": os.getcwd()})
+    messages = _receive(connection)
+    first = next(messages)
+    if "result" in first:
+        connection.close()
+        return first["result"]
+    return _stream(connection, first, messages)
+
+
+def request(op, path=None):
+    """
+    Send a control request (status or stop) to the daemon.
+
+    :return: Reply dictionary, or None if no daemon is listening.
+    """
+    connection = connect(path)
+    if connection is None:
+        return None
+    with connection:
+        send(connection, {"op": op})
+        return next(_receive(connection))
+
+
+def _receive(connection):
+    with connection.makefile('rb') as reader:
+        for line in reader:
+            message = json.loads(line)
+            if "error" in message:
+                raise_error(message)
+            yield message
+    raise ValueError("Lost connection to the vault daemon.")
+
+
+def _stream(connection, first, messages):
+    try:
+        message = first
+        while "end" not in message:
+            yield message["chunk"]
+            message = next(messages)
+    finally:
+        connection.close()
+
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    """
+    Serve one client connection: a single command or control request.
+    """
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            message = json.loads(line)
+            op = message.get("op")
+            if op == "run":
+                self.server.served += 1
+                self.run(message)
+            elif op == "status":
+                self.reply(self.server.status())
+            elif op == "stop":
+                self.reply({"stopping": True})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                raise ValueError(f"Unknown daemon request '{op}'.")
+        except BrokenPipeError:
+            pass
+        except Exception as e:
+            try:
+                self.reply({"error": str(e), "type": type(e).__name__})
+            except OSError:
+                pass
+
+    def reply(self, message):
+        self.wfile.write(json.dumps(message).encode('utf-8') + b"\n")
+        self.wfile.flush()
+
+    def run(self, message):
+        """
+        Execute a forwarded command and write back its result or output chunks.
+        The caller's token is bound for the duration of the command, so the
+        daemon acts as whoever invoked the CLI, and local paths resolve
+        against the caller's working directory.
+        """
+        from cli.command_router import route_command
+        from services.user_service import UserService
+        from utils.session import bind_session_token, unbind_session_token
+
+        command_name, args = message["command"], message.get("args", [])
+        if command_name in LOCAL_COMMANDS:
+            raise ValueError(f"Command '{command_name}' cannot run in the daemon.")
+        reset = bind_session_token(message.get("token"))
+        try:
+            context = UserService.get_context()
+            context.cwd = message.get("cwd")
+            result = route_command(command_name, *args, context=context)
+            if not hasattr(result, '__next__'):
+                self.reply({"result": result if result is None else str(result)})
+                return
+            for chunk in result:
+                self.reply({"chunk": str(chunk)})
+            self.reply({"end": True})
+        finally:
+            unbind_session_token(reset)
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Threaded Unix socket server running CLI commands.
+    Commands share the process-wide Database pools and caches. The daemon
+    never changes directory; commands resolve local paths through their
+    context instead.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path=None):
+        """
+        :param path: Socket path; defaults to VAULT_SOCKET.
+        """
+        self.path = Path(path or socket_path)
+        self.started = time.time()
+        self.served = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            live = connect(self.path)
+            if live:
+                live.close()
+                raise ValueError(f"A vault daemon is already listening on {self.path}.")
+            self.path.unlink()
+        # Only the owner may connect: the daemon runs commands as whoever sends them.
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(self.path), CommandHandler)
+        finally:
+            os.umask(umask)
+
+    def status(self):
+        return {
+            "pid": os.getpid(),
+            "socket": str(self.path),
+            "uptime": round(time.time() - self.started, 1),
+            "served": self.served,
+        }
+
+    def server_close(self):
+        super().server_close()
+        self.path.unlink(missing_ok=True)
+
+
+def serve(path=None, preload=True):
+    """
+    Run the daemon in the foreground until it is stopped.
+
+    :param path: Socket path; defaults to VAULT_SOCKET.
+    :param preload: Import every command up front so the first calls are fast.
+    """
+    from cli.command_router import COMMANDS, load_command
+
+    if preload:
+        for command_name in COMMANDS:
+            load_command(command_name)
+    server = DaemonServer(path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
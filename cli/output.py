@@ -0,0 +1,194 @@
+# Streaming output writers for CLI listings. Every writer renders one page of
+# records at a time and keeps at most one row back, so memory stays constant
+# however many pages a listing has.
+import csv
+import io
+import json
+
+
+FORMATS = ("table", "json", "ndjson", "csv")
+
+
+class OutputWriter:
+    """
+    Base class for output writers.
+    ``rows`` renders a page of records into one chunk of text and ``end``
+    yields whatever has to follow the last page.
+    """
+
+    def __init__(self, fields):
+        """
+        :param fields: Record fields to output, in order.
+        """
+        self.fields = fields
+
+    def select(self, record):
+        return {field: record.get(field) for field in self.fields}
+
+    def rows(self, records):
+        """
+        Render a page of records.
+
+        :param records: Iterable of record dictionaries.
+        :return: Text chunk, or an empty string when there is nothing to print.
+        """
+        raise NotImplementedError
+
+    def end(self, count, next_cursor):
+        """
+        Finish the output.
+
+        :param count: Number of records written.
+        :param next_cursor: Cursor of the next page, or None if the listing is complete.
+        :return: Iterable of text chunks.
+        """
+        return ()
+
+
+class TableWriter(OutputWriter):
+    """
+    Fixed-width table for people, with the column headings above the first row.
+    """
+
+    def __init__(self, columns, noun="record"):
+        """
+        :param columns: List of (heading, field, width) tuples.
+        :param noun: What a row is, for the summary line.
+        """
+        super().__init__([field for _, field, _ in columns])
+        self.columns = columns
+        self.noun = noun
+        self.started = False
+
+    def rows(self, records):
+        lines = [
+            "| ".join(f"{str(record.get(field, 'Unknown')):<{width}}" for _, field, width in self.columns)
+            for record in records
+        ]
+        if lines and not self.started:
+            self.started = True
+            lines[:0] = [
+                "\n" + "| ".join(f"{heading:<{width}}" for heading, _, width in self.columns),
+                "| ".join("-" * width for _, _, width in self.columns),
+            ]
+        return "\n".join(lines)
+
+    def end(self, count, next_cursor):
+        if not count:
+            yield f"No {self.noun}s found."
+            return
+        yield f"\n{count} {self.noun}(s)."
+        if next_cursor:
+            yield f"More {self.noun}s available; continue with --cursor {next_cursor}"
+
+
+class JsonWriter(OutputWriter):
+    """
+    A single JSON document: ``{"<key>": [...], "next_cursor": ...}``, one record per line.
+    """
+
+    def __init__(self, fields, key="records"):
+        """
+        :param fields: Record fields to output, in order.
+        :param key: Name of the list holding the records.
+        """
+        super().__init__(fields)
+        self.key = key
+        self.pending = None
+
+    def rows(self, records):
+        # Each row is held back until the next one arrives, so only the last gets no comma.
+        lines = [] if self.pending is not None else [f"{{{json.dumps(self.key)}: ["]
+        for record in records:
+            if self.pending is not None:
+                lines.append(f"{self.pending},")
+            self.pending = json.dumps(self.select(record), default=str)
+        return "\n".join(lines) if self.pending is not None else ""
+
+    def end(self, count, next_cursor):
+        if self.pending is None:
+            yield f"{{{json.dumps(self.key)}: [], \"next_cursor\": {json.dumps(next_cursor)}}}"
+            return
+        yield self.pending
+        yield f"], \"next_cursor\": {json.dumps(next_cursor)}}}"
+
+
+class NdjsonWriter(OutputWriter):
+    """
+    One JSON object per line. When the listing stops early, a final
+    ``{"next_cursor": ...}`` line tells where to continue.
+    """
+
+    def rows(self, records):
+        return "\n".join(json.dumps(self.select(record), default=str) for record in records)
+
+    def end(self, count, next_cursor):
+        if next_cursor:
+            yield json.dumps({"next_cursor": next_cursor})
+
+
+class CsvWriter(OutputWriter):
+    """
+    Comma-separated values with a header row.
+    """
+
+    def __init__(self, fields):
+        super().__init__(fields)
+        self.started = False
+
+    def render(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue().rstrip("\n")
+
+    def rows(self, records):
+        rows = [[record.get(field) for field in self.fields] for record in records]
+        if not self.started:
+            self.started = True
+            rows.insert(0, self.fields)
+        return self.render(rows)
+
+    def end(self, count, next_cursor):
+        if not self.started:
+            yield self.render([self.fields])
+
+
+def get_writer(output_format, columns, fields, noun="record"):
+    """
+    Build the writer for an output format.
+
+    :param output_format: One of ``FORMATS``.
+    :param columns: Table columns as (heading, field, width) tuples.
+    :param fields: Fields written by the machine-readable formats.
+    :param noun: What a record is, for table summaries and the JSON list name.
+    :return: OutputWriter.
+    """
+    if output_format == "table":
+        return TableWriter(columns, noun)
+    if output_format == "json":
+        return JsonWriter(fields, key=f"{noun}s")
+    if output_format == "ndjson":
+        return NdjsonWriter(fields)
+    if output_format == "csv":
+        return CsvWriter(fields)
+    raise ValueError(f"Unknown output format '{output_format}'. Use one of: {', '.join(FORMATS)}.")
+
+
+def stream_pages(pages, writer, key):
+    """
+    Write a paginated listing as it is fetched.
+
+    :param pages: Iterable of pages, each a dictionary with the records under ``key``
+                  (a dictionary of record key to record) and a ``next_cursor``.
+    :param writer: OutputWriter.
+    :param key: Name of the records in each page.
+    :return: Generator of text chunks, one per page plus the ending.
+    """
+    count, next_cursor = 0, None
+    for page in pages:
+        chunk = writer.rows(page[key].values())
+        if chunk:
+            yield chunk
+        count += len(page[key])
+        next_cursor = page["next_cursor"]
+    yield from writer.end(count, next_cursor)
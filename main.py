@@ -1,18 +1,15 @@
 import atexit
+import sys
 from cli.cli import cli
-from storage.database import Database
 
 
 @atexit.register
 def shutdown_db():
-    db = Database()
-    db.close_connections()
-    print("Database connections closed successfully")
+    # Only commands that used a database loaded this module; nothing to close otherwise.
+    database = sys.modules.get("storage.database")
+    if database and any(db.is_connected() for db in list(database.Database._instances.values())):
+        database.Database.close_all()
 
 
 if __name__ == "__main__":
-    db = Database()
-    mongo = db.get_mongo_db("vault")
-    fd = db.fs
-    redis = db.get_redis_db()
-    cli()
\ No newline at end of file
+    cli()
@@ -0,0 +1,104 @@
+from storage.async_database import AsyncDatabase
+from repositories.directory_repository import DirectoryRepository, ROOT, LEGACY_DIRECTORIES, LEGACY_FILES
+from pymongo import ReturnDocument
+
+
+class AsyncDirectoryRepository:
+    """
+    Async repository for the directory tree.
+    Mirrors DirectoryRepository for use from the API's event loop.
+    """
+
+    def __init__(self):
+        self.db = AsyncDatabase()
+        self.mongo_db = self.db.get_mongo_db("vault")
+        self.directories = self.mongo_db.directories
+
+    async def find_by_path(self, user_id, path):
+        """
+        Find a directory by its path.
+        :param user_id: Owner of the directory.
+        :param path: Directory path or name.
+        :return: Directory data if found, otherwise None.
+        """
+        path = DirectoryRepository.normalise_path(path)
+        return await self.directories.find_one({"user_id": user_id, "directory_path": path})
+
+    async def create_directory(self, user_id, path, created_at, parents=False):
+        """
+        Create a directory, and its missing ancestors if ``parents`` is set.
+        :param user_id: Owner of the directory.
+        :param path: Directory path or name.
+        :param created_at: Creation timestamp for new directories.
+        :param parents: Create missing parents instead of failing.
+        :return: The directory data.
+        """
+        path = DirectoryRepository.normalise_path(path)
+        chain = DirectoryRepository.ancestors(path)
+        existing = {
+            directory["directory_path"]: directory
+            async for directory in self.directories.find({"user_id": user_id, "directory_path": {"$in": chain}})
+        }
+        if path in existing:
+            if parents:
+                return existing[path]
+            raise ValueError(f"Directory '{path}' already exists.")
+
+        parent = None
+        for ancestor in chain:
+            directory = existing.get(ancestor)
+            if directory is None:
+                if ancestor != path and ancestor != ROOT and not parents:
+                    raise ValueError(f"Parent directory '{ancestor}' does not exist.")
+                document = DirectoryRepository.new_directory(user_id, ancestor, parent["id"] if parent else None, created_at)
+                directory = await self.directories.find_one_and_update(
+                    {"user_id": user_id, "directory_path": ancestor},
+                    {"$setOnInsert": document},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            parent = directory
+        return parent
+
+    async def get_user_directories(self, user_id):
+        """
+        Retrieve all directories for a specific user, in path order.
+        :param user_id: ID of the user whose directories to retrieve.
+        :return: List of directories for the user.
+        """
+        return await self.directories.find({"user_id": user_id}).sort("directory_path", 1).to_list()
+
+    async def list_children(self, user_id, directory_id):
+        """
+        List the immediate subdirectories of a directory.
+        :param user_id: Owner of the directory.
+        :param directory_id: ID of the parent directory.
+        :return: List of directories.
+        """
+        return await self.directories.find({"user_id": user_id, "parent_id": directory_id}).sort("folder_name", 1).to_list()
+
+    async def migrate_legacy(self, created_at):
+        """
+        Rewrite directories and files written before paths were materialised.
+        See ``DirectoryRepository.migrate_legacy``.
+        :param created_at: Creation timestamp for directories the migration adds.
+        :return: Dictionary mapping (user_id, old directory name) to the new path of renamed files.
+        """
+        legacy = await self.directories.find(LEGACY_DIRECTORIES).to_list()
+        groups = await self.mongo_db.files.aggregate([
+            {"$match": LEGACY_FILES},
+            {"$group": {"_id": {"user_id": "$user_id", "directory_name": "$directory_name"}}},
+        ])
+        file_directories = [(group["_id"]["user_id"], group["_id"].get("directory_name")) async for group in groups]
+        if not legacy and not file_directories:
+            return {}
+        users = list({directory["user_id"] for directory in legacy} | {user_id for user_id, _ in file_directories})
+        existing = await self.directories.find({"user_id": {"$in": users}, "depth": {"$exists": True}}).to_list()
+        operations, renames = DirectoryRepository.plan_legacy_migration(legacy, existing, file_directories, created_at)
+        if operations:
+            await self.directories.bulk_write(operations)
+        for (user_id, old_name), path in renames.items():
+            await self.mongo_db.files.update_many(
+                {"user_id": user_id, "directory_name": old_name}, {"$set": {"directory_name": path}}
+            )
+        return renames
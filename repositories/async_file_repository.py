@@ -0,0 +1,276 @@
+from storage.async_database import AsyncDatabase
+from repositories.file_repository import FileRepository, upload_chunk_size, download_chunk_size
+from bson import ObjectId
+from gridfs import AsyncGridFSBucket
+from pymongo import ReturnDocument, UpdateOne, errors
+from utils.metrics import count_gridfs_bytes, timed
+from collections import Counter
+import asyncio
+import hashlib
+
+
+class AsyncFileRepository:
+    """
+    Async repository for file operations.
+    Mirrors FileRepository for use from the API's event loop.
+    """
+
+    def __init__(self):
+        self.db = AsyncDatabase()
+        self.mongo_db = self.db.get_mongo_db("vault")
+        self.bucket = self.db.bucket
+
+    @timed("mongo")
+    async def save_file(self, file_model):
+        """
+        Save a file to the database.
+        :return: Confirmation of file save.
+        """
+        try:
+            file_data = file_model.to_dict()
+            await self.mongo_db.files.insert_one(file_data)
+            return f"File '{file_data['file_name']}' saved successfully."
+        except Exception as e:
+            return f"Error saving file to database: {str(e)}"
+
+    @timed("gridfs")
+    async def upload_stream(self, stream, file_name, chunk_size=upload_chunk_size):
+        """
+        Upload a file to GridFS from a file object, one chunk at a time.
+        :param stream: Readable binary file object; ``read`` may be sync or async.
+        :param file_name: Name to store the file under.
+        :param chunk_size: Number of bytes to read per iteration.
+        :return: Dictionary with the GridFS file ID, size and SHA-256 checksum.
+        """
+        checksum = hashlib.sha256()
+        size = 0
+        grid_in = self.bucket.open_upload_stream(file_name, metadata={"contentType": 'application/octet-stream'})
+        try:
+            while True:
+                chunk = stream.read(chunk_size)
+                if hasattr(chunk, '__await__'):
+                    chunk = await chunk
+                if not chunk:
+                    break
+                checksum.update(chunk)
+                size += len(chunk)
+                await grid_in.write(chunk)
+        except Exception:
+            await grid_in.abort()
+            raise
+        await grid_in.close()
+        count_gridfs_bytes("in", size)
+        digest = checksum.hexdigest()
+        blob = await self.register_blob(digest, grid_in._id, size)
+        if blob["file_id"] != grid_in._id:
+            await self.bucket.delete(grid_in._id)
+        return {
+            "file_id": blob["file_id"],
+            "file_size": size,
+            "checksum": digest,
+            "deduplicated": blob["file_id"] != grid_in._id,
+        }
+
+    @timed("mongo")
+    async def register_blob(self, checksum, file_id, size):
+        """
+        Add a reference to the content-addressed blob for a checksum.
+        :param checksum: SHA-256 of the content.
+        :param file_id: GridFS ID of the freshly written copy.
+        :param size: Size of the content in bytes.
+        :return: The blob document, whose ``file_id`` is the copy to keep.
+        """
+        for _ in range(2):
+            try:
+                return await self.mongo_db.blobs.find_one_and_update(
+                    {"_id": checksum},
+                    {"$inc": {"refcount": 1}, "$setOnInsert": {"file_id": file_id, "size": size}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            except errors.DuplicateKeyError:
+                continue
+        raise ValueError(f"Could not register blob '{checksum}'.")
+
+    @timed("gridfs")
+    async def release_blob(self, checksum, file_id):
+        """
+        Drop a reference to a blob and delete its content with the last one.
+        :param checksum: SHA-256 of the content, or None for legacy files.
+        :param file_id: GridFS ID of the content.
+        :return: True if the GridFS content was deleted.
+        """
+        if checksum:
+            blob = await self.mongo_db.blobs.find_one_and_update(
+                {"_id": checksum},
+                {"$inc": {"refcount": -1}},
+                return_document=ReturnDocument.AFTER,
+            )
+            if blob is not None:
+                if blob["refcount"] > 0:
+                    return False
+                removed = await self.mongo_db.blobs.delete_one({"_id": checksum, "refcount": {"$lte": 0}})
+                if removed.deleted_count == 0:
+                    return False
+        await self.bucket.delete(ObjectId(file_id))
+        thumbnails = AsyncGridFSBucket(self.mongo_db, bucket_name="thumbnails")
+        async for thumbnail in thumbnails.find({"metadata.source_id": str(file_id)}):
+            await thumbnails.delete(thumbnail._id)
+        return True
+
+    @timed("gridfs")
+    async def open_file(self, file_id):
+        """
+        Open a GridFS file for streaming reads.
+        :param file_id: GridFS ID of the file.
+        :return: AsyncGridOut handle.
+        """
+        return await self.bucket.open_download_stream(ObjectId(file_id))
+
+    @staticmethod
+    async def iter_file(grid_out, start=0, end=None, chunk_size=download_chunk_size):
+        """
+        Yield the bytes of a GridFS file between two offsets.
+        :param grid_out: AsyncGridOut handle returned by ``open_file``.
+        :param start: First byte to yield.
+        :param end: Last byte to yield (inclusive); defaults to the end of the file.
+        :param chunk_size: Maximum number of bytes per yielded chunk.
+        :return: Async generator of byte strings.
+        """
+        end = grid_out.length - 1 if end is None else end
+        remaining = end - start + 1
+        await grid_out.seek(start)
+        try:
+            while remaining > 0:
+                chunk = await grid_out.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                count_gridfs_bytes("out", len(chunk))
+                yield chunk
+        finally:
+            await grid_out.close()
+
+    @timed("mongo")
+    async def delete_file(self, file_name, file_id, checksum=None, user_id=None, directory_name=None):
+        """
+        Delete a file from the database.
+        The stored content is only removed once no other file references it.
+        :param file_name: Name of the file to delete.
+        :param file_id: GridFS ID of the file content.
+        :param checksum: SHA-256 of the content, if known.
+        :param user_id: Owner of the file.
+        :param directory_name: Directory of the file, to tell apart deduplicated copies.
+        :return: Confirmation of deletion.
+        """
+        try:
+            query = FileRepository.file_filter({
+                "file_name": file_name, "file_id": file_id, "user_id": user_id, "directory_name": directory_name,
+            })
+            result = await self.mongo_db.files.delete_one(query)
+            if result.deleted_count > 0:
+                await self.release_blob(checksum, file_id)
+            return None
+        except Exception as e:
+            return f"Error deleting file: {str(e)}"
+
+    @timed("gridfs")
+    async def release_blobs(self, files):
+        """
+        Drop the blob references of several deleted files at once.
+        :param files: File documents or metadata with file_id and checksum.
+        :return: Number of GridFS files deleted.
+        """
+        counts = Counter(file["checksum"] for file in files if file.get("checksum"))
+        if counts:
+            await self.mongo_db.blobs.bulk_write(
+                [UpdateOne({"_id": checksum}, {"$inc": {"refcount": -count}}) for checksum, count in counts.items()],
+                ordered=False,
+            )
+        blobs = {blob["_id"]: blob async for blob in self.mongo_db.blobs.find({"_id": {"$in": list(counts)}})}
+
+        dead = set()
+        for file in files:
+            checksum = file.get("checksum")
+            blob = blobs.get(checksum)
+            if blob is None:
+                dead.add(str(file["file_id"]))
+            elif blob["refcount"] <= 0:
+                removed = await self.mongo_db.blobs.delete_one({"_id": checksum, "refcount": {"$lte": 0}})
+                if removed.deleted_count:
+                    dead.add(str(blob["file_id"]))
+        thumbnails = AsyncGridFSBucket(self.mongo_db, bucket_name="thumbnails")
+        for file_id in dead:
+            await self.bucket.delete(ObjectId(file_id))
+            async for thumbnail in thumbnails.find({"metadata.source_id": file_id}):
+                await thumbnails.delete(thumbnail._id)
+        return len(dead)
+
+    @timed("mongo")
+    async def set_visibility_many(self, files, visibility):
+        """
+        Change the visibility of several files with one bulk write.
+        :param files: Metadata records of the files.
+        :param visibility: Either 'public' or 'private'.
+        :return: Number of modified file documents.
+        """
+        operations = [
+            UpdateOne(FileRepository.file_filter(file), {"$set": {"visibility": visibility}}) for file in files
+        ]
+        if not operations:
+            return 0
+        return (await self.mongo_db.files.bulk_write(operations, ordered=False)).modified_count
+
+    @timed("mongo")
+    async def delete_files(self, files):
+        """
+        Delete several files concurrently, then release the content of those deleted.
+        :param files: Metadata records of the files.
+        :return: Number of deleted file documents.
+        """
+        files = list(files)
+        results = await asyncio.gather(
+            *(self.mongo_db.files.delete_one(FileRepository.file_filter(file)) for file in files)
+        )
+        deleted = [file for file, result in zip(files, results) if result.deleted_count]
+        if deleted:
+            await self.release_blobs(deleted)
+        return len(deleted)
+
+    @timed("mongo")
+    async def dedup_report(self, user_id=None):
+        """
+        Compare logical file sizes with the bytes actually stored.
+        :param user_id: Restrict the report to one user's files; None for all users.
+        :return: Dictionary with file and blob counts, logical and stored bytes and the dedup ratio.
+        """
+        pipeline = FileRepository.dedup_pipeline(user_id)
+        cursor = await self.mongo_db.files.aggregate(pipeline)
+        result = await anext(cursor, None)
+        return FileRepository.summarise_dedup(result)
+
+    @timed("mongo")
+    async def update_file(self, file_name, new_file_data, user_id=None, file_id=None, directory_name=None):
+        """
+        Update a file's metadata in the database.
+        :param file_name: Name of the file to update.
+        :param new_file_data: New data for the file.
+        :param user_id: Owner of the file.
+        :param file_id: GridFS ID of the file content, to tell apart files of the same name.
+        :param directory_name: Directory of the file, to tell apart deduplicated copies.
+        :return: Confirmation of update.
+        """
+        try:
+            query = {"file_name": file_name}
+            if file_id:
+                query["file_id"] = str(file_id)
+            if user_id:
+                query["user_id"] = user_id
+            if directory_name:
+                query["directory_name"] = directory_name
+            result = await self.mongo_db.files.update_one(query, {"$set": new_file_data})
+            if result.modified_count > 0:
+                return f"File '{file_name}' updated successfully."
+            return "No changes made to the file."
+        except Exception as e:
+            return f"Error updating file: {str(e)}"
@@ -0,0 +1,129 @@
+from storage.async_database import AsyncDatabase
+from utils.metrics import timed
+
+
+class AsyncUserRepository:
+    """
+    Async repository for user operations.
+    Mirrors UserRepository for use from the API's event loop.
+    """
+
+    def __init__(self):
+        self.db = AsyncDatabase()
+        self.mongo_db = self.db.get_mongo_db("vault")
+        self.redis = self.db.get_redis_client()
+
+    @timed("mongo")
+    async def find_by_email(self, email):
+        """
+        Find a user by email
+        """
+        try:
+            return await self.mongo_db.users.find_one({"email": email})
+        except Exception as e:
+            return f"Error finding user: {e}"
+
+    @timed("mongo")
+    async def create_user(self, user_data):
+        """
+        Create an entry with the user data in the database
+        """
+        try:
+            await self.mongo_db.users.insert_one(user_data)
+            return None
+        except Exception as e:
+            return f"Error creating user in the database: {e}"
+
+    @timed("mongo")
+    async def find_by_id(self, user_id):
+        """
+        Find user by id from the database
+        """
+        try:
+            return await self.mongo_db.users.find_one({"id": user_id})
+        except Exception as e:
+            return f"Error finding user: {e}"
+
+    @timed("mongo")
+    async def find_by_username(self, username):
+        """
+        Find user by username from the database
+        """
+        try:
+            return await self.mongo_db.users.find_one({"username": username})
+        except Exception as e:
+            return f"Error finding user: {e}"
+
+    @timed("mongo")
+    async def update_password(self, user_id, password_hash):
+        """
+        Replace the stored password hash of a user
+        """
+        try:
+            await self.mongo_db.users.update_one({"id": user_id}, {"$set": {"password": password_hash}})
+            return None
+        except Exception as e:
+            return f"Error updating password: {e}"
+
+    @timed("redis")
+    async def create_session(self, token, session_data, ttl):
+        """
+        Create a user session in Redis keyed by its token.
+        """
+        try:
+            user_sessions = f"user_sessions:{session_data['user_id']}"
+            pipeline = self.redis.pipeline()
+            pipeline.hset(f"session:{token}", mapping=session_data)
+            pipeline.expire(f"session:{token}", ttl)
+            pipeline.sadd(user_sessions, token)
+            pipeline.expire(user_sessions, ttl)
+            await pipeline.execute()
+            return None
+        except Exception as e:
+            return f"Error creating user session: {e}"
+
+    @timed("redis")
+    async def get_session(self, token, ttl):
+        """
+        Get a user session from Redis by token, sliding its expiry forward.
+        """
+        try:
+            pipeline = self.redis.pipeline()
+            pipeline.hgetall(f"session:{token}")
+            pipeline.expire(f"session:{token}", ttl)
+            session, _ = await pipeline.execute()
+            session = {k.decode('utf-8'): v.decode('utf-8') for k, v in session.items()}
+            if session.get("user_id"):
+                await self.redis.expire(f"user_sessions:{session['user_id']}", ttl)
+            return session
+        except Exception as e:
+            return f"Error getting user session: {e}"
+
+    @timed("redis")
+    async def delete_session(self, token):
+        """
+        Delete a session from Redis database
+        """
+        try:
+            user_id = await self.redis.hget(f"session:{token}", "user_id")
+            pipeline = self.redis.pipeline()
+            pipeline.delete(f"session:{token}")
+            if user_id:
+                pipeline.srem(f"user_sessions:{user_id.decode('utf-8')}", token)
+            await pipeline.execute()
+            return None
+        except Exception as e:
+            return f"Error deleting session data: {e}"
+
+    @timed("redis")
+    async def delete_user_sessions(self, user_id):
+        """
+        Delete every session of a user from Redis database
+        """
+        try:
+            user_sessions = f"user_sessions:{user_id}"
+            tokens = [token.decode('utf-8') for token in await self.redis.smembers(user_sessions)]
+            await self.redis.delete(user_sessions, *[f"session:{token}" for token in tokens])
+            return tokens
+        except Exception as e:
+            return f"Error deleting user sessions: {e}"
@@ -0,0 +1,338 @@
+from storage.database import Database
+from storage.metadata_store import replace_path_prefix
+from storage.models import FolderModel
+from pymongo import DeleteOne, InsertOne, ReturnDocument, UpdateOne
+import re
+
+
+ROOT = "root"
+# Directory documents written before paths were materialised have no depth.
+LEGACY_DIRECTORIES = {"depth": {"$exists": False}}
+# Files whose directory is not a materialised path.
+LEGACY_FILES = {"directory_name": {"$not": re.compile(r"^root(/[^/]+)*$")}}
+
+
+class DirectoryRepository:
+    """
+    Repository for the directory tree.
+    Every directory stores its materialised path (e.g. ``root/photos/2024``)
+    and its parent's ID, so path lookups are a single indexed query and a
+    whole subtree is matched by an anchored prefix on the path.
+    """
+
+    def __init__(self):
+        self.db = Database()
+
+    @property
+    def mongo_db(self):
+        """
+        The vault database, connected on first use.
+        """
+        return self.db.get_mongo_db("vault")
+
+    @property
+    def directories(self):
+        """
+        The directories collection.
+        """
+        return self.mongo_db.directories
+
+    @property
+    def files(self):
+        """
+        The files collection.
+        """
+        return self.mongo_db.files
+
+    @staticmethod
+    def normalise_path(path):
+        """
+        Turn a user supplied directory into its materialised path.
+        ``photos/2024``, ``/photos/2024/`` and ``root/photos/2024`` all map to
+        ``root/photos/2024``; an empty path is the root.
+        :param path: Directory path or name.
+        :return: Materialised path.
+        """
+        parts = [part for part in (path or "").strip().split("/") if part and part != "."]
+        if ".." in parts:
+            raise ValueError("Directory paths cannot contain '..'.")
+        if not parts or parts[0] != ROOT:
+            parts.insert(0, ROOT)
+        return "/".join(parts)
+
+    @staticmethod
+    def ancestors(path):
+        """
+        List a path and all of its ancestors, root first.
+        :param path: Materialised path.
+        :return: List of materialised paths.
+        """
+        parts = path.split("/")
+        return ["/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+    @staticmethod
+    def subtree_query(user_id, path, field="directory_path"):
+        """
+        Build a query matching a directory and everything below it.
+        The regex is anchored, so MongoDB turns it into an index range scan.
+        :param user_id: Owner of the tree.
+        :param path: Materialised path of the subtree root.
+        :param field: Field holding the path.
+        :return: MongoDB query.
+        """
+        if path == ROOT:
+            return {"user_id": user_id}
+        return {"user_id": user_id, field: {"$regex": f"^{re.escape(path)}(/|$)"}}
+
+    @staticmethod
+    def new_directory(user_id, path, parent_id, created_at):
+        """
+        Build the document for a directory at a path.
+        """
+        return FolderModel(
+            user_id=user_id,
+            folder_name=path.rsplit("/", 1)[-1],
+            parent_id=parent_id,
+            directory_path=path,
+            depth=path.count("/"),
+            created_at=created_at
+        ).to_dict()
+
+    @classmethod
+    def legacy_path(cls, directory, by_id, visiting=()):
+        """
+        Work out the materialised path of a directory written before paths were materialised.
+        Those directories stored a bare name, ``parent/name`` or ``root/`` as
+        their path; the chain of parent IDs wins when it is available.
+        :param directory: Legacy directory document.
+        :param by_id: Legacy directories of the same user by ID.
+        :param visiting: IDs already on the current parent chain, to break cycles.
+        :return: Materialised path.
+        """
+        name = directory.get("folder_name")
+        visiting = visiting + (directory.get("id"),)
+        parent = by_id.get(directory.get("parent_id"))
+        if parent is not None and parent.get("id") not in visiting:
+            parent_path = cls.legacy_path(parent, by_id, visiting)
+            return cls.normalise_path(f"{parent_path}/{name}")
+        path = cls.normalise_path(directory.get("directory_path"))
+        if name and path.rsplit("/", 1)[-1] != name:
+            path = cls.normalise_path(f"{path}/{name}")
+        return path
+
+    @classmethod
+    def plan_legacy_migration(cls, legacy, existing, file_directories, created_at):
+        """
+        Plan the rewrite of legacy directories and file directory names into materialised paths.
+        Legacy directories that end up on a path that is already taken are
+        merged into the directory holding it, and missing ancestors are created.
+        :param legacy: Legacy directory documents (see ``LEGACY_DIRECTORIES``).
+        :param existing: Materialised directory documents of the same users.
+        :param file_directories: (user_id, directory_name) pairs of legacy files (see ``LEGACY_FILES``).
+        :param created_at: Creation timestamp for new directories.
+        :return: Tuple of the bulk write operations for the directories collection and a
+                 dictionary mapping (user_id, old directory name) to the new path.
+        """
+        operations, renames = [], {}
+        users = {directory["user_id"] for directory in legacy} | {user_id for user_id, _ in file_directories}
+        for user_id in users:
+            directories = [directory for directory in legacy if directory["user_id"] == user_id]
+            by_id = {directory.get("id"): directory for directory in directories if directory.get("id")}
+            paths = {directory["_id"]: cls.legacy_path(directory, by_id) for directory in directories}
+            kept = {directory["directory_path"]: directory for directory in existing if directory["user_id"] == user_id}
+
+            moved = {}
+            for directory in sorted(directories, key=lambda directory: paths[directory["_id"]]):
+                path = paths[directory["_id"]]
+                if path in kept:
+                    operations.append(DeleteOne({"_id": directory["_id"]}))
+                else:
+                    kept[path] = moved[path] = directory
+
+            # Files refer to their directory by its old path or name; ambiguous ones fall back to normalising.
+            names = {}
+            for directory in directories:
+                for name in (directory.get("folder_name"), directory.get("directory_path")):
+                    names.setdefault(name, set()).add(paths[directory["_id"]])
+            lookup = {name: candidates.pop() for name, candidates in names.items() if len(candidates) == 1}
+            for file_user_id, old_name in file_directories:
+                if file_user_id == user_id:
+                    renames[(user_id, old_name)] = lookup.get(old_name) or cls.normalise_path(old_name)
+
+            wanted = set(kept) | {path for (owner, _), path in renames.items() if owner == user_id}
+            for path in sorted({ancestor for path in wanted for ancestor in cls.ancestors(path)}, key=len):
+                parent = kept.get(path.rsplit("/", 1)[0]) if path != ROOT else None
+                parent_id = parent["id"] if parent else None
+                if path in moved:
+                    directory = moved[path]
+                    operations.append(UpdateOne({"_id": directory["_id"]}, {"$set": {
+                        "folder_name": path.rsplit("/", 1)[-1],
+                        "parent_id": parent_id,
+                        "directory_path": path,
+                        "depth": path.count("/"),
+                    }}))
+                elif path not in kept:
+                    kept[path] = cls.new_directory(user_id, path, parent_id, created_at)
+                    operations.append(InsertOne(kept[path]))
+        return operations, renames
+
+    def migrate_legacy(self, created_at):
+        """
+        Rewrite directories and files written before paths were materialised.
+        Must run before the unique (user_id, directory_path) index is built;
+        it does nothing once every document has been migrated.
+        :param created_at: Creation timestamp for directories the migration adds.
+        :return: Dictionary mapping (user_id, old directory name) to the new path of renamed files.
+        """
+        legacy = list(self.directories.find(LEGACY_DIRECTORIES))
+        file_directories = [
+            (group["_id"]["user_id"], group["_id"].get("directory_name"))
+            for group in self.files.aggregate([
+                {"$match": LEGACY_FILES},
+                {"$group": {"_id": {"user_id": "$user_id", "directory_name": "$directory_name"}}},
+            ])
+        ]
+        if not legacy and not file_directories:
+            return {}
+        users = list({directory["user_id"] for directory in legacy} | {user_id for user_id, _ in file_directories})
+        existing = list(self.directories.find({"user_id": {"$in": users}, "depth": {"$exists": True}}))
+        operations, renames = self.plan_legacy_migration(legacy, existing, file_directories, created_at)
+        if operations:
+            self.directories.bulk_write(operations)
+        for (user_id, old_name), path in renames.items():
+            self.files.update_many({"user_id": user_id, "directory_name": old_name}, {"$set": {"directory_name": path}})
+        return renames
+
+    def find_by_path(self, user_id, path):
+        """
+        Find a directory by its path.
+        :param user_id: Owner of the directory.
+        :param path: Directory path or name.
+        :return: Directory data if found, otherwise None.
+        """
+        return self.directories.find_one({"user_id": user_id, "directory_path": self.normalise_path(path)})
+
+    def create_directory(self, user_id, path, created_at, parents=False):
+        """
+        Create a directory, and its missing ancestors if ``parents`` is set.
+        All ancestors are fetched in one query; each missing one is created
+        with an upsert, so concurrent creators agree on a single document.
+        :param user_id: Owner of the directory.
+        :param path: Directory path or name.
+        :param created_at: Creation timestamp for new directories.
+        :param parents: Create missing parents instead of failing.
+        :return: The directory data.
+        """
+        path = self.normalise_path(path)
+        chain = self.ancestors(path)
+        existing = {
+            directory["directory_path"]: directory
+            for directory in self.directories.find({"user_id": user_id, "directory_path": {"$in": chain}})
+        }
+        if path in existing:
+            if parents:
+                return existing[path]
+            raise ValueError(f"Directory '{path}' already exists.")
+
+        parent = None
+        for ancestor in chain:
+            directory = existing.get(ancestor)
+            if directory is None:
+                if ancestor != path and ancestor != ROOT and not parents:
+                    raise ValueError(f"Parent directory '{ancestor}' does not exist.")
+                document = self.new_directory(user_id, ancestor, parent["id"] if parent else None, created_at)
+                directory = self.directories.find_one_and_update(
+                    {"user_id": user_id, "directory_path": ancestor},
+                    {"$setOnInsert": document},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            parent = directory
+        return parent
+
+    def get_user_directories(self, user_id):
+        """
+        Retrieve all directories for a specific user, in path order.
+        :param user_id: ID of the user whose directories to retrieve.
+        :return: List of directories for the user.
+        """
+        return list(self.directories.find({"user_id": user_id}).sort("directory_path", 1))
+
+    def list_children(self, user_id, directory_id):
+        """
+        List the immediate subdirectories of a directory.
+        :param user_id: Owner of the directory.
+        :param directory_id: ID of the parent directory.
+        :return: List of directories.
+        """
+        return list(self.directories.find({"user_id": user_id, "parent_id": directory_id}).sort("folder_name", 1))
+
+    def list_subtree(self, user_id, path):
+        """
+        List a directory and all directories below it, in path order.
+        :param user_id: Owner of the directory.
+        :param path: Materialised path of the subtree root.
+        :return: List of directories.
+        """
+        return list(self.directories.find(self.subtree_query(user_id, path)).sort("directory_path", 1))
+
+    def subtree_usage(self, user_id, path):
+        """
+        Sum the files and bytes stored in a directory and everything below it.
+        :param user_id: Owner of the directory.
+        :param path: Materialised path of the subtree root.
+        :return: Dictionary with file count, total bytes and directory count.
+        """
+        pipeline = [
+            {"$match": self.subtree_query(user_id, path, field="directory_name")},
+            {"$group": {"_id": None, "files": {"$sum": 1}, "bytes": {"$sum": "$file_size"}}},
+        ]
+        result = next(self.files.aggregate(pipeline), None) or {}
+        return {
+            "path": path,
+            "files": result.get("files", 0),
+            "bytes": result.get("bytes", 0),
+            "directories": self.directories.count_documents(self.subtree_query(user_id, path)),
+        }
+
+    def move_directory(self, user_id, old_path, new_path):
+        """
+        Move or rename a directory together with its whole subtree.
+        Directories and files are each re-homed with a single pipeline
+        update over the indexed path prefix.
+        :param user_id: Owner of the directory.
+        :param old_path: Path of the directory to move.
+        :param new_path: Path it should have afterwards.
+        :return: Dictionary with the number of moved directories and files.
+        """
+        old_path, new_path = self.normalise_path(old_path), self.normalise_path(new_path)
+        if old_path == ROOT:
+            raise ValueError("The root directory cannot be moved.")
+        if new_path == old_path or new_path.startswith(f"{old_path}/"):
+            raise ValueError(f"Cannot move '{old_path}' into itself.")
+        directory = self.directories.find_one({"user_id": user_id, "directory_path": old_path})
+        if not directory:
+            raise ValueError(f"Directory '{old_path}' not found.")
+        if self.directories.find_one({"user_id": user_id, "directory_path": new_path}):
+            raise ValueError(f"Directory '{new_path}' already exists.")
+        parent_path = new_path.rsplit("/", 1)[0]
+        parent = self.directories.find_one({"user_id": user_id, "directory_path": parent_path})
+        if parent_path != ROOT and not parent:
+            raise ValueError(f"Parent directory '{parent_path}' does not exist.")
+
+        self.directories.update_one(
+            {"_id": directory["_id"]},
+            {"$set": {"folder_name": new_path.rsplit("/", 1)[-1], "parent_id": parent["id"] if parent else None}}
+        )
+        depth_change = new_path.count("/") - old_path.count("/")
+        moved_directories = self.directories.update_many(self.subtree_query(user_id, old_path), [{"$set": {
+            "directory_path": replace_path_prefix("$directory_path", old_path, new_path),
+            "depth": {"$add": [{"$ifNull": ["$depth", 0]}, depth_change]},
+        }}])
+        moved_files = self.files.update_many(self.subtree_query(user_id, old_path, field="directory_name"), [{"$set": {
+            "directory_name": replace_path_prefix("$directory_name", old_path, new_path),
+        }}])
+        return {
+            "directories": moved_directories.modified_count,
+            "files": moved_files.modified_count,
+        }
@@ -1,4 +1,15 @@
 from storage.database import Database
+from repositories.thumbnail_repository import ThumbnailRepository
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne, errors
+from utils.metrics import count_gridfs_bytes, timed
+from collections import Counter
+import hashlib
+import os
+
+
+upload_chunk_size = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+download_chunk_size = int(os.getenv("DOWNLOAD_CHUNK_SIZE", 255 * 1024))
 
 
 class FileRepository:
@@ -9,9 +20,22 @@ class FileRepository:
     
     def __init__(self):
         self.db =Database()
-        self.mongo_db = self.db.get_mongo_db("vault")
-        self.fs = self.db.fs
 
+    @property
+    def mongo_db(self):
+        """
+        The vault database, connected on first use.
+        """
+        return self.db.get_mongo_db("vault")
+
+    @property
+    def fs(self):
+        """
+        The GridFS store for file content, opened on first use.
+        """
+        return self.db.fs
+
+    @timed("mongo")
     def save_file(self, file_model):
         """
         Save a file to the database.
@@ -24,17 +48,263 @@ class FileRepository:
         except Exception as e:
             return f"Error saving file to database: {str(e)}"
     
+    @timed("gridfs")
     def upload_file(self, file, file_name):
         """
         Upload a file to the GridFS storage.
         """
         try:
             file_id = self.fs.put(file, filename=file_name, content_type='application/octet-stream')
+            if isinstance(file, (bytes, bytearray)):
+                count_gridfs_bytes("in", len(file))
             return file_id 
         except Exception as e:
             return f"Error uploading file: {str(e)}"
 
+    @timed("gridfs")
+    def upload_stream(self, stream, file_name, chunk_size=upload_chunk_size):
+        """
+        Upload a file to GridFS from a file object, one chunk at a time.
+        Memory use is bounded by ``chunk_size`` regardless of the file size.
+        :param stream: Readable binary file object.
+        :param file_name: Name to store the file under.
+        :param chunk_size: Number of bytes to read per iteration.
+        :return: Dictionary with the GridFS file ID, size and SHA-256 checksum.
+        """
+        checksum = hashlib.sha256()
+        size = 0
+        grid_in = self.fs.new_file(filename=file_name, content_type='application/octet-stream')
+        try:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                checksum.update(chunk)
+                size += len(chunk)
+                grid_in.write(chunk)
+        except Exception:
+            grid_in.abort()
+            raise
+        grid_in.close()
+        count_gridfs_bytes("in", size)
+        digest = checksum.hexdigest()
+        blob = self.register_blob(digest, grid_in._id, size)
+        if blob["file_id"] != grid_in._id:
+            self.fs.delete(grid_in._id)
+        return {
+            "file_id": blob["file_id"],
+            "file_size": size,
+            "checksum": digest,
+            "deduplicated": blob["file_id"] != grid_in._id,
+        }
+
+    @timed("mongo")
+    def register_blob(self, checksum, file_id, size):
+        """
+        Add a reference to the content-addressed blob for a checksum.
+        The first upload of some content becomes the blob; later uploads of
+        the same bytes only increment its reference count.
+        :param checksum: SHA-256 of the content.
+        :param file_id: GridFS ID of the freshly written copy.
+        :param size: Size of the content in bytes.
+        :return: The blob document, whose ``file_id`` is the copy to keep.
+        """
+        for _ in range(2):
+            try:
+                return self.mongo_db.blobs.find_one_and_update(
+                    {"_id": checksum},
+                    {"$inc": {"refcount": 1}, "$setOnInsert": {"file_id": file_id, "size": size}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            except errors.DuplicateKeyError:
+                # A concurrent upload inserted the same blob first; retry as an increment.
+                continue
+        raise ValueError(f"Could not register blob '{checksum}'.")
+
+    @timed("mongo")
+    def reference_blob(self, checksum):
+        """
+        Add a reference to an existing blob without uploading its content.
+        :param checksum: SHA-256 of the content.
+        :return: The blob document, or None if no such content is stored.
+        """
+        return self.mongo_db.blobs.find_one_and_update(
+            {"_id": checksum},
+            {"$inc": {"refcount": 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    @timed("mongo")
+    def find_checksums(self, user_id, directory_names):
+        """
+        Get the checksums of a user's files in several directories with one query.
+        :param user_id: Owner of the files.
+        :param directory_names: Materialised directory paths.
+        :return: Dictionary of (directory name, file name) to the set of stored checksums.
+        """
+        checksums = {}
+        documents = self.mongo_db.files.find(
+            {"user_id": user_id, "directory_name": {"$in": list(directory_names)}},
+            {"directory_name": 1, "file_name": 1, "checksum": 1},
+        )
+        for document in documents:
+            key = (document["directory_name"], document["file_name"])
+            checksums.setdefault(key, set()).add(document.get("checksum"))
+        return checksums
+
+    @timed("gridfs")
+    def release_blob(self, checksum, file_id):
+        """
+        Drop a reference to a blob and delete its content with the last one.
+        Files stored before deduplication have no blob and are deleted directly.
+        :param checksum: SHA-256 of the content, or None for legacy files.
+        :param file_id: GridFS ID of the content.
+        :return: True if the GridFS content was deleted.
+        """
+        if checksum:
+            blob = self.mongo_db.blobs.find_one_and_update(
+                {"_id": checksum},
+                {"$inc": {"refcount": -1}},
+                return_document=ReturnDocument.AFTER,
+            )
+            if blob is not None:
+                if blob["refcount"] > 0:
+                    return False
+                removed = self.mongo_db.blobs.delete_one({"_id": checksum, "refcount": {"$lte": 0}})
+                if removed.deleted_count == 0:
+                    return False
+        self.fs.delete(ObjectId(file_id))
+        ThumbnailRepository().delete_thumbnails(file_id)
+        return True
+
+    @staticmethod
+    def dedup_pipeline(user_id=None):
+        """
+        Build the aggregation that sums logical and stored bytes.
+        Files are grouped by checksum, so each shared blob is counted once.
+        :param user_id: Restrict to one user's files; None for all users.
+        :return: Aggregation pipeline for the files collection.
+        """
+        pipeline = [
+            {"$group": {
+                "_id": {"$ifNull": ["$checksum", "$file_id"]},
+                "logical": {"$sum": "$file_size"},
+                "size": {"$first": "$file_size"},
+                "copies": {"$sum": 1},
+            }},
+            {"$group": {
+                "_id": None,
+                "files": {"$sum": "$copies"},
+                "blobs": {"$sum": 1},
+                "logical_bytes": {"$sum": "$logical"},
+                "stored_bytes": {"$sum": "$size"},
+            }},
+        ]
+        if user_id:
+            pipeline.insert(0, {"$match": {"user_id": user_id}})
+        return pipeline
+
+    @staticmethod
+    def summarise_dedup(result):
+        """
+        Turn the dedup aggregation result into a report.
+        :param result: Single document produced by ``dedup_pipeline`` or None.
+        :return: Report dictionary including the dedup ratio and saved bytes.
+        """
+        report = dict(result or {"files": 0, "blobs": 0, "logical_bytes": 0, "stored_bytes": 0})
+        report.pop("_id", None)
+        stored = report["stored_bytes"]
+        report["dedup_ratio"] = report["logical_bytes"] / stored if stored else 1.0
+        report["saved_bytes"] = report["logical_bytes"] - stored
+        return report
+
+    @timed("gridfs")
+    def release_blobs(self, files):
+        """
+        Drop the blob references of several deleted files at once.
+        References are decremented with one bulk write; content is only
+        deleted for blobs whose last reference went away.
+        :param files: File documents or metadata with file_id and checksum.
+        :return: Number of GridFS files deleted.
+        """
+        counts = Counter(file["checksum"] for file in files if file.get("checksum"))
+        if counts:
+            self.mongo_db.blobs.bulk_write(
+                [UpdateOne({"_id": checksum}, {"$inc": {"refcount": -count}}) for checksum, count in counts.items()],
+                ordered=False,
+            )
+        blobs = {blob["_id"]: blob for blob in self.mongo_db.blobs.find({"_id": {"$in": list(counts)}})}
+
+        dead = set()
+        for file in files:
+            checksum = file.get("checksum")
+            blob = blobs.get(checksum)
+            if blob is None:
+                # Stored before deduplication, or the blob is already gone.
+                dead.add(str(file["file_id"]))
+            elif blob["refcount"] <= 0 and self.mongo_db.blobs.delete_one({"_id": checksum, "refcount": {"$lte": 0}}).deleted_count:
+                dead.add(str(blob["file_id"]))
+        thumbnails = ThumbnailRepository()
+        for file_id in dead:
+            self.fs.delete(ObjectId(file_id))
+            thumbnails.delete_thumbnails(file_id)
+        return len(dead)
+
+    @staticmethod
+    def file_filter(file):
+        """
+        Match the files collection entry of a metadata record.
+        Deduplicated copies of a file in other directories share its name and
+        file_id, so the directory is part of the match.
+        """
+        query = {"file_name": file["file_name"], "file_id": str(file["file_id"])}
+        if file.get("user_id"):
+            query["user_id"] = file["user_id"]
+        if file.get("directory_name"):
+            query["directory_name"] = file["directory_name"]
+        return query
+
+    @timed("mongo")
+    def set_visibility_many(self, files, visibility):
+        """
+        Change the visibility of several files with one bulk write.
+        :param files: Metadata records of the files.
+        :param visibility: Either 'public' or 'private'.
+        :return: Number of modified file documents.
+        """
+        operations = [UpdateOne(self.file_filter(file), {"$set": {"visibility": visibility}}) for file in files]
+        if not operations:
+            return 0
+        return self.mongo_db.files.bulk_write(operations, ordered=False).modified_count
+
+    @timed("mongo")
+    def delete_files(self, files):
+        """
+        Delete several files, then release the content of those deleted.
+        Each document is deleted on its own so that only the records this call
+        removed release their blob; an overlapping delete of the same files
+        must not drop the references twice.
+        :param files: Metadata records of the files.
+        :return: Number of deleted file documents.
+        """
+        deleted = [file for file in files if self.mongo_db.files.delete_one(self.file_filter(file)).deleted_count]
+        if deleted:
+            self.release_blobs(deleted)
+        return len(deleted)
+
+    @timed("mongo")
+    def dedup_report(self, user_id=None):
+        """
+        Compare logical file sizes with the bytes actually stored.
+        :param user_id: Restrict the report to one user's files; None for all users.
+        :return: Dictionary with file and blob counts, logical and stored bytes and the dedup ratio.
+        """
+        result = next(self.mongo_db.files.aggregate(self.dedup_pipeline(user_id)), None)
+        return self.summarise_dedup(result)
+
         
+    @timed("mongo")
     def get_file(self, file_name):
         """
         Retrieve a file from the database.
@@ -42,92 +312,91 @@ class FileRepository:
         :return: File data if found, otherwise None.
         """
         try:
-            file = self.mongo_db.file.find_one({"file_name": file_name})
+            file = self.mongo_db.files.find_one({"file_name": file_name})
             if file:
                 return file
             return None
         except Exception as e:
             return f"Error retrieving file: {str(e)}"
 
-    def retrieve_file(self, file_name):
+    @timed("gridfs")
+    def open_file(self, file_id):
         """
-        Retrieve a file from GridFS storage.
-        :param file_name: Name of the file to retrieve.
-        :return: File content if found, otherwise None.
+        Open a GridFS file for streaming reads.
+        :param file_id: GridFS ID of the file.
+        :return: GridOut handle; nothing is read until it is iterated.
+        """
+        return self.fs.get(ObjectId(file_id))
+
+    @staticmethod
+    def iter_file(grid_out, start=0, end=None, chunk_size=download_chunk_size):
         """
+        Yield the bytes of a GridFS file between two offsets.
+        :param grid_out: GridOut handle returned by ``open_file``.
+        :param start: First byte to yield.
+        :param end: Last byte to yield (inclusive); defaults to the end of the file.
+        :param chunk_size: Maximum number of bytes per yielded chunk.
+        :return: Generator of byte strings.
+        """
+        end = grid_out.length - 1 if end is None else end
+        remaining = end - start + 1
+        grid_out.seek(start)
         try:
-            file = self.fs.find_one({"filename": file_name})
-            if file:
-                return file.read()
-            return None
-        except Exception as e:
-            return f"Error retrieving file from GridFS: {str(e)}"
-        
-    def delete_file(self, file_name, file_id):
+            while remaining > 0:
+                chunk = grid_out.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                count_gridfs_bytes("out", len(chunk))
+                yield chunk
+        finally:
+            grid_out.close()
+
+    @timed("mongo")
+    def delete_file(self, file_name, file_id, checksum=None, user_id=None, directory_name=None):
         """
         Delete a file from the database.
+        The stored content is only removed once no other file references it.
         :param file_name: Name of the file to delete.
+        :param file_id: GridFS ID of the file content.
+        :param checksum: SHA-256 of the content, if known.
+        :param user_id: Owner of the file.
+        :param directory_name: Directory of the file, to tell apart deduplicated copies.
         :return: Confirmation of deletion.
         """
         try:
-            result = self.mongo_db.files.delete_one({"file_name": file_name})
-            if result.deleted_count > 0 and not self.fs.delete(file_id):
-                return None
+            query = self.file_filter({
+                "file_name": file_name, "file_id": file_id, "user_id": user_id, "directory_name": directory_name,
+            })
+            result = self.mongo_db.files.delete_one(query)
+            if result.deleted_count > 0:
+                self.release_blob(checksum, file_id)
+            return None
         except Exception as e:
             return f"Error deleting file: {str(e)}"
         
-    def update_file(self, file_name, new_file_data):
+    @timed("mongo")
+    def update_file(self, file_name, new_file_data, user_id=None, file_id=None, directory_name=None):
         """
         Update a file's metadata in the database.
         :param file_name: Name of the file to update.
         :param new_file_data: New data for the file.
+        :param user_id: Owner of the file.
+        :param file_id: GridFS ID of the file content, to tell apart files of the same name.
+        :param directory_name: Directory of the file, to tell apart deduplicated copies.
         :return: Confirmation of update.
         """
         try:
-            result = self.mongo_db.files.update_one({"file_name": file_name}, {"$set": new_file_data})
+            query = {"file_name": file_name}
+            if file_id:
+                query["file_id"] = str(file_id)
+            if user_id:
+                query["user_id"] = user_id
+            if directory_name:
+                query["directory_name"] = directory_name
+            result = self.mongo_db.files.update_one(query, {"$set": new_file_data})
             if result.modified_count > 0:
                 return f"File '{file_name}' updated successfully."
             return "No changes made to the file."
         except Exception as e:
             return f"Error updating file: {str(e)}"
-
-
-    def find_directory(self, directory_name, user_id):
-        """
-        Find a directory in the database.
-        :param directory_name: Name of the directory to find.
-        :return: Directory data if found, otherwise None.
-        """
-        try:
-            directory = self.mongo_db.directories.find_one({"directory_name": directory_name, "user_id": user_id})
-            if directory:
-                return directory
-            return None
-        except Exception as e:
-            return f"Error finding directory: {str(e)}"
-        
-    def create_directory(self, directory_model):
-        """
-        Create a new directory in the database.
-        :param directory_model: Directory model containing directory data.
-        :return: Confirmation of directory creation.
-        """
-        try:
-            directory_data = directory_model.to_dict()
-            self.mongo_db.directories.insert_one(directory_data)
-            return f"Directory '{directory_data['directory_name']}' created successfully."
-        except Exception as e:
-            return f"Error saving directory: {str(e)}"
-        
-    def get_user_directories(self, user_id):
-        """
-        Retrieve all directories for a specific user.
-        :param user_id: ID of the user whose directories to retrieve.
-        :return: List of directories for the user.
-        """
-        try:
-            directories = list(self.mongo_db.directories.find({"user_id": user_id}))
-            return directories
-        except Exception as e:
-            return f"Error retrieving user directories: {str(e)}"
-        
\ No newline at end of file
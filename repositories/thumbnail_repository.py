@@ -0,0 +1,78 @@
+from storage.database import Database
+from bson import ObjectId
+from gridfs import GridFS
+from utils.metrics import count_gridfs_bytes, timed
+
+
+class ThumbnailRepository:
+    """
+    Repository for generated thumbnails.
+    Thumbnails live in their own GridFS collection and are keyed by the
+    GridFS ID of the source file.
+    """
+
+    def __init__(self):
+        self.db = Database()
+        self.mongo_db = self.db.get_mongo_db("vault")
+        self.fs = GridFS(self.mongo_db, collection="thumbnails")
+
+    @timed("gridfs")
+    def save_thumbnail(self, source_id, data, content_type, size):
+        """
+        Store a thumbnail, replacing any previous one for the same source and size.
+        :param source_id: GridFS ID of the source file.
+        :param data: Encoded thumbnail bytes.
+        :param content_type: MIME type of the thumbnail.
+        :param size: Bounding box edge in pixels.
+        :return: GridFS ID of the stored thumbnail.
+        """
+        query = {"metadata.source_id": str(source_id), "metadata.size": size, "contentType": content_type}
+        for old in self.fs.find(query):
+            self.fs.delete(old._id)
+        count_gridfs_bytes("in", len(data), bucket="thumbnails")
+        return self.fs.put(
+            data,
+            filename=f"{source_id}_{size}",
+            content_type=content_type,
+            metadata={"source_id": str(source_id), "size": size},
+        )
+
+    @timed("gridfs")
+    def delete_thumbnails(self, source_id):
+        """
+        Delete every thumbnail generated for a source file.
+        :param source_id: GridFS ID of the source file.
+        :return: Number of deleted thumbnails.
+        """
+        deleted = 0
+        for thumbnail in self.fs.find({"metadata.source_id": str(source_id)}):
+            self.fs.delete(thumbnail._id)
+            deleted += 1
+        return deleted
+
+    @timed("gridfs")
+    def find_thumbnail(self, source_id, size, content_type=None):
+        """
+        Find a stored thumbnail.
+        :param source_id: GridFS ID of the source file.
+        :param size: Bounding box edge in pixels.
+        :param content_type: MIME type to match, if any.
+        :return: GridOut handle or None.
+        """
+        query = {"metadata.source_id": str(source_id), "metadata.size": size}
+        if content_type:
+            query["contentType"] = content_type
+        return self.fs.find_one(query)
+
+    def get_source_names(self, source_ids):
+        """
+        Look up the stored file names of several source files in one query.
+        IDs that are not valid ObjectIds are ignored, like IDs that do not exist.
+        :param source_ids: GridFS IDs of the source files.
+        :return: Dictionary of source ID to file name for the IDs that exist.
+        """
+        documents = self.mongo_db["files.files"].find(
+            {"_id": {"$in": [ObjectId(source_id) for source_id in source_ids if ObjectId.is_valid(source_id)]}},
+            {"filename": 1},
+        )
+        return {str(document["_id"]): document["filename"] for document in documents}
@@ -1,4 +1,5 @@
 from storage.database import Database
+from utils.metrics import timed
 
 
 class UserRepository:
@@ -9,9 +10,22 @@ class UserRepository:
     
     def __init__(self):
         self.db = Database()
-        self.mongo_db = self.db.get_mongo_db("vault")
-        self.redis = self.db.get_redis_client()
 
+    @property
+    def mongo_db(self):
+        """
+        The vault database; MongoDB is only connected to by calls that use it.
+        """
+        return self.db.get_mongo_db("vault")
+
+    @property
+    def redis(self):
+        """
+        The Redis client; Redis is only connected to by calls that use it.
+        """
+        return self.db.get_redis_client()
+
+    @timed("mongo")
     def find_by_email(self, email):
         """
         Find a user by email
@@ -22,6 +36,7 @@ class UserRepository:
         except Exception as e:
             return f"Error finding user: {e}"
         
+    @timed("mongo")
     def create_user(self, user_data):
         """
         Create an entry with the user data in the database
@@ -32,6 +47,7 @@ class UserRepository:
         except Exception as e:
             return f"Error creating user in the database: {e}"
 
+    @timed("mongo")
     def find_by_id(self, user_id):
         """
         Find user by id from the database
@@ -42,6 +58,7 @@ class UserRepository:
         except Exception as e:
             return f"Error finding user: {e}"
         
+    @timed("mongo")
     def find_by_username(self, username):
         """
         Find user by username from the database
@@ -52,38 +69,77 @@ class UserRepository:
         except Exception as e:
             return f"Error finding user: {e}"
 
-    def create_session(self, session_data):
+    @timed("mongo")
+    def update_password(self, user_id, password_hash):
         """
-        Create a user session in Redis database
+        Replace the stored password hash of a user
         """
         try:
-            self.redis.hset("session", mapping=session_data)
+            self.mongo_db.users.update_one({"id": user_id}, {"$set": {"password": password_hash}})
+            return None
+        except Exception as e:
+            return f"Error updating password: {e}"
+
+    @timed("redis")
+    def create_session(self, token, session_data, ttl):
+        """
+        Create a user session in Redis keyed by its token.
+        The token is also indexed under the user so all sessions can be revoked.
+        """
+        try:
+            user_sessions = f"user_sessions:{session_data['user_id']}"
+            pipeline = self.redis.pipeline()
+            pipeline.hset(f"session:{token}", mapping=session_data)
+            pipeline.expire(f"session:{token}", ttl)
+            pipeline.sadd(user_sessions, token)
+            pipeline.expire(user_sessions, ttl)
+            pipeline.execute()
             return None
         except Exception as e:
             return f"Error creating user session: {e}"
 
-    def get_session(self):
+    @timed("redis")
+    def get_session(self, token, ttl):
         """
-        Get a user session from Redis using id
+        Get a user session from Redis by token, sliding its expiry forward.
         """
         try:
-            session = self.redis.hgetall("session")
-            return session.items()
+            pipeline = self.redis.pipeline()
+            pipeline.hgetall(f"session:{token}")
+            pipeline.expire(f"session:{token}", ttl)
+            session, _ = pipeline.execute()
+            session = {k.decode('utf-8'): v.decode('utf-8') for k, v in session.items()}
+            if session.get("user_id"):
+                self.redis.expire(f"user_sessions:{session['user_id']}", ttl)
+            return session
         except Exception as e:
             return f"Error getting user session: {e}"
         
-    def delete_session(self):
+    @timed("redis")
+    def delete_session(self, token):
         """
-        Delete a session data from Redis database
+        Delete a session from Redis database
         """
         try:
-            self.redis.delete("session")
+            user_id = self.redis.hget(f"session:{token}", "user_id")
+            pipeline = self.redis.pipeline()
+            pipeline.delete(f"session:{token}")
+            if user_id:
+                pipeline.srem(f"user_sessions:{user_id.decode('utf-8')}", token)
+            pipeline.execute()
             return None
         except Exception as e:
             return f"Error deleting session data: {e}"
-        
 
-    
-
-        
-    
+    @timed("redis")
+    def delete_user_sessions(self, user_id):
+        """
+        Delete every session of a user from Redis database
+        """
+        try:
+            user_sessions = f"user_sessions:{user_id}"
+            tokens = [token.decode('utf-8') for token in self.redis.smembers(user_sessions)]
+            self.redis.delete(user_sessions, *[f"session:{token}" for token in tokens])
+            return tokens
+        except Exception as e:
+            return f"Error deleting user sessions: {e}"
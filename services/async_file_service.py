@@ -0,0 +1,343 @@
+from .base_service import BaseService
+import asyncio
+import io
+from utils.helpers import (
+    get_current_time,
+    create_metadata,
+    find_metadata_page,
+    update_metadata_many,
+    delete_metadata_many,
+    get_metadata,
+    get_cached_metadata,
+    get_metadata_cache,
+    load_metadata,
+)
+from storage.models import FileModel, FileMetadata
+from services.file_service import FileService
+from services.async_user_service import AsyncUserService
+from repositories.async_file_repository import AsyncFileRepository
+from repositories.async_directory_repository import AsyncDirectoryRepository
+
+
+class AsyncFileService(BaseService):
+    """
+    Async service for file operations used by the API.
+    MongoDB and GridFS calls are awaited; metadata store access and other
+    blocking work is pushed to worker threads so the event loop stays free.
+    """
+
+    def __init__(self, context=None):
+        """
+        :param context: RequestContext of the caller; resolved from the request's token when omitted.
+        """
+        self.context = context
+        self._repository = None
+
+    @property
+    def repository(self):
+        """
+        File repository shared by every call made through this service.
+        """
+        if self._repository is None:
+            self._repository = AsyncFileRepository()
+        return self._repository
+
+    async def get_user_id(self):
+        """
+        Get the caller's user ID, resolving the session at most once per service.
+        :return: User ID or None.
+        """
+        if self.context is None:
+            self.context = await AsyncUserService.get_context()
+        return self.context.user_id
+
+    def help(self):
+        """
+        Display help information for file operations.
+        """
+        return """
+            AsyncFileService: Non-blocking file operations for the API."""
+
+    async def get_metadata(self, file_name):
+        """
+        Get metadata for a file, touching the store only on a cache miss.
+        The caller's own file is preferred over a public file of the same name.
+        Local cache hits are served inline; anything that may block (the
+        Redis tier or the store) runs in a worker thread.
+        :param file_name: Name of the file.
+        :return: Metadata dictionary or None.
+        """
+        user_id = await self.get_user_id()
+        if get_metadata_cache().redis is not None:
+            return await asyncio.to_thread(get_metadata, file_name, user_id)
+        metadata = get_cached_metadata(file_name, user_id)
+        if metadata is None:
+            metadata = await asyncio.to_thread(load_metadata, file_name, user_id)
+        return metadata
+
+    async def get_readable_metadata(self, file_name):
+        """
+        Get metadata for a file the current user may read.
+        :param file_name: Name of the file.
+        :return: Metadata dictionary.
+        :raises FileNotFoundError: If the file does not exist.
+        :raises PermissionError: If the file is private to another user.
+        """
+        metadata = await self.get_metadata(file_name)
+        user_id = await self.get_user_id()
+        if not metadata:
+            raise FileNotFoundError(f"No metadata found for file '{file_name}'.")
+        if metadata.get("user_id") != user_id and metadata.get("visibility") != 'public':
+            raise PermissionError(f"Unauthorized access to file '{file_name}'.")
+        return metadata
+
+    async def open_file_stream(self, file_name):
+        """
+        Open a file for streaming after checking access to it.
+        :param file_name: Name of the file to open.
+        :return: Tuple of the file's metadata and an AsyncGridOut handle.
+        """
+        metadata = await self.get_readable_metadata(file_name)
+        return metadata, await self.repository.open_file(metadata["file_id"])
+
+    async def upload_file(self, file_name, data, user_id=None, directory_name='root'):
+        """
+        Upload a file to the server.
+        :param file_name: Name of the file to upload.
+        :param data: File content as bytes or text.
+        :param user_id: ID of the user uploading the file.
+        :param directory_name: Name of the directory to upload into.
+        :return: Confirmation of upload.
+        """
+        try:
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            user_id = user_id or await self.get_user_id()
+            if not user_id:
+                raise ValueError("No user session found. Cannot upload file.")
+            directory = await AsyncDirectoryRepository().create_directory(
+                user_id, directory_name, get_current_time(), parents=True
+            )
+            directory_name = directory["directory_path"]
+            path = f"{directory_name}/{file_name}"
+            type = FileService.get_file_type(file_name)
+
+            repository = self.repository
+            stored = await repository.upload_stream(io.BytesIO(data), file_name)
+            file_id = str(stored["file_id"])
+            created_at = get_current_time()
+
+            file_metadata = FileMetadata(
+                file_name=file_name,
+                file_size=stored["file_size"],
+                path=path,
+                user_id=user_id,
+                file_id=file_id,
+                type=type,
+                directory_name=directory_name,
+                checksum=stored["checksum"],
+                created_at=created_at
+            )
+            file_model = FileModel(
+                user_id=user_id,
+                file_name=file_name,
+                file_size=stored["file_size"],
+                file_id=file_id,
+                directory_name=directory_name,
+                type=type,
+                checksum=stored["checksum"],
+                created_at=created_at
+            )
+            await repository.save_file(file_model)
+            result = await asyncio.to_thread(create_metadata, file_id, file_metadata.to_dict())
+            if type in ['image', 'video'] and not stored["deduplicated"]:
+                from tasks.thumbnail import generate_thumbnail
+                await asyncio.to_thread(generate_thumbnail.delay, file_id, file_name)
+            return result
+        except Exception as e:
+            raise ValueError(f"Error uploading file: {str(e)}")
+
+    async def list_files(self, owner=None, visibility=None, file_type=None, directory_name=None, recursive=False,
+                         sort='created_at', descending=False, limit=None, cursor=None):
+        """
+        List one page of the files visible to the current user.
+        :param owner: See ``FileService.listing_filters``.
+        :param cursor: Cursor of the page to fetch, as returned with the previous page.
+        :return: Dictionary with the page's files (file ID to metadata) and the next page's cursor.
+        """
+        try:
+            user_id = await self.get_user_id()
+            filters = FileService.listing_filters(user_id, owner, visibility, file_type, directory_name, recursive)
+            if limit:
+                filters["limit"] = limit
+            files, next_cursor = await asyncio.to_thread(
+                find_metadata_page, sort=sort, descending=descending, cursor=cursor, **filters
+            )
+            return {"files": files, "next_cursor": next_cursor}
+        except Exception as e:
+            raise ValueError(f"Error listing files: {str(e)}")
+
+    async def read_metadata(self, file_name):
+        """
+        Read metadata for a specific file.
+        :param file_name: Name of the file to read metadata for.
+        :return: Metadata dictionary for the specified file.
+        """
+        try:
+            metadata = await self.get_metadata(file_name)
+            user_id = await self.get_user_id()
+            if not metadata:
+                raise ValueError(f"No metadata found for file '{file_name}'.")
+            if metadata.get("user_id") != user_id and metadata.get("visibility") != 'public':
+                raise ValueError(f"Unauthorized access to metadata for file '{file_name}'.")
+            return metadata
+        except Exception as e:
+            raise ValueError(f"Error reading metadata for file '{file_name}': {str(e)}")
+
+    async def set_visibility(self, file_name, visibility):
+        """
+        Change the visibility of a file owned by the current user.
+        :param file_name: Name of the file to update.
+        :param visibility: Either 'public' or 'private'.
+        :return: Updated metadata.
+        """
+        metadata = await self.get_metadata(file_name)
+        user_id = await self.get_user_id()
+        if not user_id:
+            raise ValueError("No user session found.")
+        if not metadata:
+            raise ValueError(f"No metadata found for file '{file_name}'.")
+        if metadata.get("user_id") != user_id:
+            raise ValueError(f"Unauthorized access to file '{file_name}'.")
+
+        metadata['visibility'] = visibility
+        await asyncio.to_thread(create_metadata, file_name, metadata)
+        await self.repository.update_file(
+            metadata["file_name"], {"visibility": visibility}, user_id=user_id,
+            file_id=metadata.get("file_id"), directory_name=metadata.get("directory_name"),
+        )
+        return metadata
+
+    async def publish_file(self, file_name):
+        """
+        Publish a file to make it accessible to all users.
+        :param file_name: Name of the file to publish.
+        :return: Updated metadata.
+        """
+        try:
+            return await self.set_visibility(file_name, 'public')
+        except Exception as e:
+            raise ValueError(f"Error publishing file '{file_name}': {str(e)}")
+
+    async def unpublish_file(self, file_name):
+        """
+        Unpublish a file to restrict access to the owner only.
+        :param file_name: Name of the file to unpublish.
+        :return: Updated metadata.
+        """
+        try:
+            return await self.set_visibility(file_name, 'private')
+        except Exception as e:
+            raise ValueError(f"Error unpublishing file '{file_name}': {str(e)}")
+
+    async def set_visibility_many(self, visibility, targets=(), directory_name=None, recursive=False):
+        """
+        Change the visibility of many files owned by the current user.
+        Each batch costs one bulk write to MongoDB and one metadata store transaction.
+        :param visibility: Either 'public' or 'private'.
+        :param targets: File names, file IDs or glob patterns; see ``FileService.select_files``.
+        :return: Dictionary with the matched and changed counts and the names not found.
+        """
+        try:
+            user_id = await self.get_user_id()
+            if not user_id:
+                raise ValueError("No user session found.")
+            selected, missing = await asyncio.to_thread(
+                FileService.select_files, user_id, targets, directory_name, recursive
+            )
+            changed = 0
+            for batch in FileService.batches(selected):
+                records = {
+                    key: {**metadata, "visibility": visibility}
+                    for key, metadata in batch if metadata.get("visibility") != visibility
+                }
+                if records:
+                    await self.repository.set_visibility_many(records.values(), visibility)
+                    await asyncio.to_thread(update_metadata_many, records)
+                    changed += len(records)
+            return {"matched": len(selected), "changed": changed, "missing": missing}
+        except Exception as e:
+            raise ValueError(f"Error changing visibility to '{visibility}': {str(e)}")
+
+    async def delete_files(self, targets=(), directory_name=None, recursive=False):
+        """
+        Delete many files owned by the current user, one bulk write and one
+        metadata store transaction per batch.
+        :param targets: File names, file IDs or glob patterns; see ``FileService.select_files``.
+        :return: Dictionary with the matched and deleted counts and the names not found.
+        """
+        try:
+            user_id = await self.get_user_id()
+            if not user_id:
+                raise ValueError("No user session found.")
+            selected, missing = await asyncio.to_thread(
+                FileService.select_files, user_id, targets, directory_name, recursive
+            )
+            deleted = 0
+            for batch in FileService.batches(selected):
+                records = dict(batch)
+                await self.repository.delete_files(records.values())
+                deleted += await asyncio.to_thread(delete_metadata_many, records)
+            return {"matched": len(selected), "deleted": deleted, "missing": missing}
+        except Exception as e:
+            raise ValueError(f"Error deleting files: {str(e)}")
+
+    async def dedup_report(self, scope='user'):
+        """
+        Report how much storage content-addressing saves.
+        :param scope: 'user' for the current user's files, 'global' for all files.
+        :return: Dictionary with logical and stored bytes and the dedup ratio.
+        """
+        try:
+            user_id = await self.get_user_id()
+            if not user_id:
+                raise ValueError("No user session found.")
+            if scope != 'user':
+                if not self.context.is_admin:
+                    raise PermissionError("Only administrators can report on all files.")
+                user_id = None
+            return await self.repository.dedup_report(user_id)
+        except Exception as e:
+            raise ValueError(f"Error building dedup report: {str(e)}")
+
+    async def create_directory(self, directory_path, user_id=None, parents=False):
+        """
+        Create a new directory.
+        :param directory_path: Path of the directory to create, e.g. 'photos/2024'.
+        :param user_id: Owner of the directory; defaults to the current user.
+        :param parents: Also create missing parent directories.
+        :return: Confirmation of directory creation.
+        """
+        try:
+            user_id = user_id or await self.get_user_id()
+            if not user_id:
+                raise ValueError("No user session found. Cannot create directory.")
+            directory = await AsyncDirectoryRepository().create_directory(user_id, directory_path, get_current_time(), parents)
+            return f"Directory '{directory['directory_path']}' created successfully."
+        except Exception as e:
+            raise ValueError(f"Error making directory '{directory_path}': {str(e)}")
+
+    async def get_directory(self, directory_name, user_id=None):
+        """
+        Get details of a specific directory.
+        :param directory_name: Path or name of the directory to retrieve.
+        :return: Details of the specified directory.
+        """
+        try:
+            user_id = user_id or await self.get_user_id()
+            directory = await AsyncDirectoryRepository().find_by_path(user_id, directory_name)
+            if not directory:
+                raise ValueError(f"Directory '{directory_name}' not found.")
+            return directory
+        except Exception as e:
+            raise ValueError(f"Error retrieving directory '{directory_name}': {str(e)}")
@@ -0,0 +1,250 @@
+from .base_service import BaseService
+from repositories.async_user_repository import AsyncUserRepository
+from storage.models import UserModel, SessionModel, TokenModel
+from utils.helpers import get_current_time
+from utils.context import RequestContext
+from utils.passwords import hash_password_async, verify_password_async, needs_rehash
+from utils.rate_limit import RateLimiter, RateLimitExceeded, login_rate_limit, login_ip_rate_limit, login_rate_window
+from utils.tokens import InvalidToken, auth_mode, decode_token, is_signed_token, issue_token_pair, revocation_list
+from utils.session import get_session_token, new_session_token, session_cache, session_ttl
+from uuid import uuid4
+
+
+class AsyncUserService(BaseService):
+    """
+    Async service for user operations used by the API.
+    Redis and MongoDB calls are awaited; bcrypt runs on the bounded password pool.
+    """
+
+    @classmethod
+    def help(cls):
+        """
+        Display help information for user operations.
+        """
+        return """
+            AsyncUserService: Non-blocking user operations for the API.
+            """
+
+    @classmethod
+    async def create_user(cls, user: UserModel):
+        """
+        Create a new user.
+        :param user: User model with the registration details.
+        :return: The created user.
+        """
+        try:
+            user_data = user.to_dict()
+            repository = AsyncUserRepository()
+            existing_user = await repository.find_by_email(user_data["email"])
+            if existing_user:
+                raise ValueError("A user with that email already exists")
+
+            user_data['password'] = await hash_password_async(user_data['password'])
+            user_data['id'] = str(uuid4())
+            await repository.create_user(user_data)
+            return UserModel(**user_data)
+        except Exception as e:
+            raise ValueError(f"Error creating user: {str(e)}")
+
+    @classmethod
+    async def get_current_user(cls, token=None):
+        """
+        Get the current user from the session.
+        :param token: Session token; defaults to the current request's token.
+        :return: User information if session exists, otherwise None.
+        """
+        try:
+            user_id = await cls.get_user_id(token)
+            if user_id:
+                user_data = await AsyncUserRepository().find_by_id(user_id)
+                if user_data:
+                    return UserModel(**user_data)
+            return None
+        except Exception as e:
+            return f"Error retrieving user: {str(e)}"
+
+    @classmethod
+    async def authenticate_user(cls, username: str, password: str):
+        """
+        Authenticate a user with username and password.
+        Hashes made with an outdated cost are upgraded on success.
+        :param username: Username of the user.
+        :param password: Password of the user.
+        :return: User information if authentication is successful, otherwise None.
+        """
+        try:
+            repository = AsyncUserRepository()
+            user_data = await repository.find_by_username(username)
+            if not user_data or not await verify_password_async(password, user_data['password']):
+                return None
+            if needs_rehash(user_data['password']):
+                user_data['password'] = await hash_password_async(password)
+                await repository.update_password(user_data['id'], user_data['password'])
+            return UserModel(**user_data)
+        except Exception as e:
+            raise ValueError(f"Error authenticating user: {str(e)}")
+
+    @classmethod
+    async def check_login_rate(cls, username: str, client_ip: str = None):
+        """
+        Count a login attempt against the username and client IP limits.
+        :raises RateLimitExceeded: If either limit is exceeded.
+        """
+        redis = AsyncUserRepository().redis
+        await RateLimiter(redis, "login:user", login_rate_limit, login_rate_window).hit_async(username.lower())
+        if client_ip:
+            await RateLimiter(redis, "login:ip", login_ip_rate_limit, login_rate_window).hit_async(client_ip)
+
+    @classmethod
+    async def login_user(cls, username: str, password: str, client_ip: str = None):
+        """
+        Log in a user by creating a new session, or by issuing signed tokens
+        when AUTH_MODE is 'token'.
+        Attempts are rate limited per username and client IP before any
+        password hashing is done.
+        :param username: Username of the user.
+        :param password: Password of the user.
+        :param client_ip: Address the attempt came from, if known.
+        :return: Session with its token, token pair, or error message.
+        """
+        try:
+            await cls.check_login_rate(username, client_ip)
+            user = await cls.authenticate_user(username, password)
+            if user:
+                await RateLimiter(AsyncUserRepository().redis, "login:user", login_rate_limit, login_rate_window).reset(username.lower())
+                if auth_mode == 'token':
+                    return TokenModel(user=user, **issue_token_pair(user.id))
+                token = new_session_token()
+                session_data = {"user_id": user.id, "created_at": get_current_time()}
+                error = await AsyncUserRepository().create_session(token, session_data, session_ttl)
+                if error:
+                    raise ValueError(error)
+                session_cache.set(token, user.id)
+                return SessionModel(token=token, user=user, expires_in=session_ttl)
+            else:
+                return "Invalid username or password."
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            raise ValueError(f"Error logging in user: {str(e)}")
+
+    @classmethod
+    async def logout_user(cls, token=None, refresh_token=None):
+        """
+        Log out the current user by deleting the session or revoking its signed tokens.
+        :param token: Session or access token; defaults to the current request's token.
+        :param refresh_token: Refresh token to revoke along with a signed access token.
+        :return: Confirmation of logout.
+        """
+        try:
+            token = token or get_session_token()
+            if is_signed_token(token):
+                redis = AsyncUserRepository().redis
+                for value, token_type in [(token, "access"), (refresh_token, "refresh")]:
+                    if value:
+                        try:
+                            await revocation_list.revoke_async(redis, decode_token(value, token_type))
+                        except InvalidToken:
+                            pass
+            elif token:
+                session_cache.delete(token)
+                await AsyncUserRepository().delete_session(token)
+            return "User logged out successfully."
+        except Exception as e:
+            raise ValueError(f"Error logging out user: {str(e)}")
+
+    @classmethod
+    async def revoke_user_sessions(cls, user_id):
+        """
+        Log a user out everywhere by deleting all of their sessions and
+        revoking every signed token issued to them so far.
+        :param user_id: ID of the user.
+        :return: Number of revoked sessions.
+        """
+        repository = AsyncUserRepository()
+        tokens = await repository.delete_user_sessions(user_id)
+        if isinstance(tokens, str):
+            raise ValueError(tokens)
+        await revocation_list.revoke_user_async(repository.redis, user_id)
+        for token in tokens:
+            session_cache.delete(token)
+        return len(tokens)
+
+    @classmethod
+    async def verify_access_token(cls, token):
+        """
+        Validate a signed access token locally.
+        Only the revocation snapshot is ever fetched, at most every few seconds.
+        :param token: Encoded access token.
+        :return: Token claims.
+        :raises InvalidToken: If the token is invalid, expired or revoked.
+        """
+        claims = decode_token(token, "access")
+        if revocation_list.is_stale():
+            await revocation_list.refresh_async(AsyncUserRepository().redis)
+        if revocation_list.is_revoked(claims):
+            raise InvalidToken("Token has been revoked.")
+        return claims
+
+    @classmethod
+    async def refresh_tokens(cls, refresh_token: str):
+        """
+        Exchange a refresh token for a new token pair.
+        The refresh token is single use: it is revoked once exchanged.
+        :param refresh_token: Encoded refresh token.
+        :return: New token pair.
+        :raises InvalidToken: If the refresh token is invalid, expired or revoked.
+        """
+        claims = decode_token(refresh_token, "refresh")
+        repository = AsyncUserRepository()
+        if await revocation_list.is_user_revoked_async(repository.redis, claims):
+            raise InvalidToken("Token has been revoked.")
+        if not await revocation_list.claim_async(repository.redis, claims):
+            raise InvalidToken("Token has been revoked.")
+        if not await repository.find_by_id(claims["sub"]):
+            raise InvalidToken("User no longer exists.")
+        return TokenModel(**issue_token_pair(claims["sub"]))
+
+    @classmethod
+    async def get_user_id(cls, token=None):
+        """
+        Get the user ID from the current session or signed access token.
+        Signed tokens are verified locally; session tokens are cached in
+        process for a few seconds. With AUTH_MODE 'token' session tokens are
+        not accepted.
+        :param token: Session or access token; defaults to the current request's token.
+        :return: User ID if the token is valid, otherwise None.
+        """
+        try:
+            token = token or get_session_token()
+            if not token:
+                return None
+            if is_signed_token(token):
+                try:
+                    return (await cls.verify_access_token(token))["sub"]
+                except InvalidToken:
+                    return None
+            if auth_mode == 'token':
+                return None
+            user_id = session_cache.get(token)
+            if user_id:
+                return user_id
+            session = await AsyncUserRepository().get_session(token, session_ttl)
+            if isinstance(session, str):
+                raise ValueError(session)
+            user_id = session.get("user_id")
+            if user_id:
+                session_cache.set(token, user_id)
+            return user_id
+        except Exception as e:
+            raise ValueError(f"Error retrieving user ID: {str(e)}")
+
+    @classmethod
+    async def get_context(cls, token=None):
+        """
+        Build the request context for a session token, resolving the user once.
+        :param token: Session token; defaults to the current request's token.
+        :return: RequestContext with the user ID already resolved.
+        """
+        token = token or get_session_token()
+        return RequestContext(token=token, user_id=await cls.get_user_id(token) if token else None)
@@ -1,11 +1,32 @@
 from .base_service import BaseService
+import fnmatch
+import glob
+import hashlib
+import io
 import os
-from utils.helpers import get_current_time, create_metadata, list_metadata, get_metadata, delete_metadata
-from storage.models import FileModel, FileMetadata, FolderModel
-from tempfile import NamedTemporaryFile
+from utils.helpers import (
+    get_current_time,
+    create_metadata,
+    find_metadata_page,
+    get_metadata,
+    get_metadata_many,
+    update_metadata_many,
+    delete_metadata,
+    delete_metadata_many,
+    move_metadata_directory,
+)
+from storage.models import FileModel, FileMetadata
+from storage.metadata_store import MetadataStore, default_page_size, max_page_size
+from utils.files import hash_file, walk_sources
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from services.user_service import UserService
-from repositories.file_repository import FileRepository
-from tasks.thumbnail import generate_thumbnail
+from repositories.file_repository import FileRepository, download_chunk_size
+from repositories.directory_repository import DirectoryRepository
+
+
+upload_workers = int(os.getenv("UPLOAD_WORKERS", 8))
+download_workers = int(os.getenv("DOWNLOAD_WORKERS", 8))
+bulk_batch_size = int(os.getenv("BULK_BATCH_SIZE", 1000))
 
 
 class FileService(BaseService):
@@ -14,6 +35,32 @@ class FileService(BaseService):
     Inherits from BaseService to provide common functionality.
     """
 
+    def __init__(self, context=None):
+        """
+        :param context: RequestContext of the caller; defaults to the current CLI session.
+        """
+        self.context = context or UserService.get_context()
+        self._repository = None
+        self._directories = None
+
+    @property
+    def repository(self):
+        """
+        File repository shared by every call made through this service.
+        """
+        if self._repository is None:
+            self._repository = FileRepository()
+        return self._repository
+
+    @property
+    def directories(self):
+        """
+        Directory tree repository shared by every call made through this service.
+        """
+        if self._directories is None:
+            self._directories = DirectoryRepository()
+        return self._directories
+
     def help(self):
         """
         Display help information for file operations.
@@ -24,105 +71,365 @@ class FileService(BaseService):
     def read_file(self, file_name):
         """
         Read the contents of a file.
+        Content is resolved through the metadata's GridFS ID, which stays
+        correct when deduplicated uploads share one stored copy.
         :param file_path: Name of the file to read.
         :return: Content of the file.
         """
         try:
-            metadata = get_metadata(file_name)
-            user_id = UserService.get_user_id()
-            if not metadata:
-                raise ValueError(f"No metadata found for file '{file_name}'.")
-            if metadata.get("user_id") != user_id and metadata.get("visibility") != 'public':
-                raise ValueError(f"Unauthorized access to file '{file_name}'.")
-            
-            with NamedTemporaryFile('+w', delete=True) as temp_file:
-                temp_file = FileRepository().retrieve_file(file_name)
-                if temp_file:
-                    content = temp_file.decode('utf-8')
-                else:
-                    return ValueError(f"File '{file_name}' not found in the database.")
-            return content
-        
+            _, grid_out = self.open_file_stream(file_name)
+            return b"".join(self.repository.iter_file(grid_out)).decode('utf-8')
         except Exception as e:
             raise ValueError(f"Error reading file '{file_name}': {str(e)}")
 
 
-    def upload_file(self, file_name, data, user_id, directory_name='root'):
+    @staticmethod
+    def get_file_type(file_name):
+        """
+        Classify a file by its extension.
+        :param file_name: Name of the file.
+        :return: One of 'file', 'image', 'video' or 'other'.
+        """
+        file_extension = os.path.splitext(file_name)[1].lower()
+        if file_extension in ['.txt', '.pdf', '.docx', '.md']:
+            return 'file'
+        elif file_extension in ['.jpg', '.jpeg', '.png', '.gif']:
+            return 'image'
+        elif file_extension in ['.mp4', '.avi', '.mov']:
+            return 'video'
+        return 'other'
+
+    def open_file_stream(self, file_name):
+        """
+        Open a file for streaming after checking access to it.
+        :param file_name: Name of the file to open.
+        :return: Tuple of the file's metadata and a GridOut handle.
+        """
+        user_id = self.context.user_id
+        metadata = get_metadata(file_name, user_id)
+        if not metadata:
+            raise FileNotFoundError(f"No metadata found for file '{file_name}'.")
+        if metadata.get("user_id") != user_id and metadata.get("visibility") != 'public':
+            raise PermissionError(f"Unauthorized access to file '{file_name}'.")
+        return metadata, self.repository.open_file(metadata["file_id"])
+
+    def upload_file(self, file_name, data, user_id=None, directory_name='root'):
         """
         Upload a file to the server.
-        :param file_path: Path to the file to upload.
+        :param file_name: Name of the file to upload.
+        :param data: File content as bytes or text.
+        :return: Confirmation of upload.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return self.upload_file_stream(file_name, io.BytesIO(data), user_id, directory_name)
+
+    def upload_file_stream(self, file_name, stream, user_id=None, directory_name='root'):
+        """
+        Upload a file to the server from a binary file object.
+        The content is streamed into GridFS in fixed-size chunks while its
+        size and checksum are computed, so memory use stays constant.
+        :param file_name: Name of the file to upload.
+        :param stream: Readable binary file object.
+        :param user_id: ID of the user uploading the file.
+        :param directory_name: Name of the directory to upload into.
         :return: Confirmation of upload.
         """
         try:
-            directory = self.get_directory(directory_name, user_id=user_id)
-            if not isinstance(directory, dict):
-                FileService().create_directory(directory_name)
-                path = f"{directory_name}/{file_name}"
-
-
-            file_size = os.path.getsize(data)
-            file_extension = os.path.splitext(file_name)[1].lower()
-            if file_extension in ['.txt', '.pdf', '.docx', '.md']:
-                type = 'file'
-            elif file_extension in ['.jpg', '.jpeg', '.png', '.gif']:
-                type = 'image'
-                generate_thumbnail.delay(data, file_name)
-            elif file_extension in ['.mp4', '.avi', '.mov']:
-                type = 'video'
-                generate_thumbnail.delay(data, file_name)
-            else:
-                type = 'other'
+            user_id = user_id or self.context.require_user("upload file")
+            directory_name = self.directories.create_directory(
+                user_id, directory_name, get_current_time(), parents=True
+            )["directory_path"]
+            stored = self.repository.upload_stream(stream, file_name)
+            return self.record_upload(file_name, stored, user_id, directory_name)
+        except Exception as e:
+            raise ValueError(f"Error uploading file: {str(e)}")
+
+    def record_upload(self, file_name, stored, user_id, directory_name):
+        """
+        Save the file record and metadata for content already in GridFS.
+        :param file_name: Name of the file.
+        :param stored: Storage result as returned by ``FileRepository.upload_stream``.
+        :param user_id: ID of the user uploading the file.
+        :param directory_name: Materialised path of an existing directory.
+        :return: Stored metadata as a JSON string.
+        """
+        path = f"{directory_name}/{file_name}"
+        type = self.get_file_type(file_name)
+        file_id = str(stored["file_id"])
+        created_at = get_current_time()
 
+        file_metadata = FileMetadata(
+            file_name=file_name,
+            file_size=stored["file_size"],
+            path=path,
+            user_id=user_id,
+            file_id=file_id,
+            type=type,
+            directory_name=directory_name,
+            checksum=stored["checksum"],
+            created_at=created_at
+        )
+        file_model = FileModel(
+            user_id=user_id,
+            file_name=file_name,
+            file_size=stored["file_size"],
+            file_id=file_id,
+            directory_name=directory_name,
+            type=type,
+            checksum=stored["checksum"],
+            created_at=created_at
+        )
+        self.repository.save_file(file_model)
+        result = create_metadata(file_id, file_metadata.to_dict())
+        if type in ['image', 'video'] and not stored["deduplicated"]:
+            # Celery is only loaded by uploads that need a thumbnail.
+            from tasks.thumbnail import generate_thumbnail
+            generate_thumbnail.delay(file_id, file_name)
+        return result
 
-            file_id = FileRepository().upload_file(data, file_name)
+    def upload_many(self, sources, directory_name='root', workers=None):
+        """
+        Upload files, directory trees and glob matches with a pool of worker threads.
+        Local subdirectories are mirrored below ``directory_name``. Every file is
+        hashed first: files already stored under the same name and checksum are
+        skipped, and content the vault already holds is linked without sending it.
+        All workers share the process-wide MongoDB connection pool.
+        :param sources: Local paths or glob patterns.
+        :param directory_name: Vault directory to upload into.
+        :param workers: Number of concurrent uploads; defaults to UPLOAD_WORKERS.
+        :return: Generator of per-file results (path, directory, status, size,
+                 sent bytes and error), in completion order.
+        """
+        user_id = self.context.require_user("upload files")
+        base = DirectoryRepository.normalise_path(directory_name)
+        files = [(path, f"{base}/{relative}" if relative else base) for path, relative in walk_sources(sources)]
+        if not files:
+            raise ValueError("No files to upload.")
 
+        directories = sorted({directory for _, directory in files})
+        created_at = get_current_time()
+        for directory in directories:
+            self.directories.create_directory(user_id, directory, created_at, parents=True)
+        existing = self.repository.find_checksums(user_id, directories)
 
-            file_metadata = FileMetadata(
-                file_name=file_name,
-                file_size=file_size,
-                path = path,
-                user_id=user_id,
-                file_id=str(file_id),
-                type=type,
-                directory_name=directory_name,
-                created_at=get_current_time()
-            )
-            file_model = FileModel(
-                user_id=user_id,
-                file_name=file_name,
-                file_size=file_size,
-                file_id=str(file_id),
-                directory_name=directory_name,
-                type=type,
-                created_at=get_current_time()
-            )
-            FileRepository().save_file(file_model)
-            result = create_metadata(file_id, file_metadata.to_dict())
-            
-            return result
-        except Exception as e:
-            raise ValueError(f"Error uploading file: {str(e)}")
-        
-    def list_files(self, user_id=None):
+        with ThreadPoolExecutor(max_workers=workers or upload_workers) as pool:
+            futures = [pool.submit(self._upload_path, user_id, path, directory, existing) for path, directory in files]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def _upload_path(self, user_id, path, directory_name, existing):
         """
-        List the metadata of all files in the uploads directory.
-        :return: List of files in the uploads directory.
+        Upload one local file for ``upload_many``.
         """
+        result = {"path": path, "directory": directory_name, "status": "uploaded", "size": 0, "sent": 0, "error": None}
         try:
-            metadata = list_metadata()
-            if not metadata:
-                raise ValueError("No files found.")
-            
-            user_id = UserService.get_user_id()
-            if user_id:
-                metadata = {k: v for k, v in metadata.items() if (v.get("user_id") == user_id or v.get("visibility") == 'public')}
+            file_name = os.path.basename(path)
+            result["size"] = os.path.getsize(path)
+            checksum = hash_file(path)
+            if checksum in existing.get((directory_name, file_name), ()):
+                result["status"] = "skipped"
+                return result
+
+            blob = self.repository.reference_blob(checksum)
+            if blob:
+                stored = {"file_id": blob["file_id"], "file_size": blob["size"], "checksum": checksum, "deduplicated": True}
+                result["status"] = "linked"
             else:
-                metadata = {k: v for k, v in metadata.items() if v.get("visibility") == 'public'}
+                with open(path, 'rb') as stream:
+                    stored = self.repository.upload_stream(stream, file_name)
+                result["sent"] = stored["file_size"]
+            self.record_upload(file_name, stored, user_id, directory_name)
+        except Exception as e:
+            result["status"], result["error"] = "failed", str(e)
+        return result
 
-            return metadata
+    def plan_downloads(self, destination='.', file_name=None, directory_name=None, recursive=True, **filters):
+        """
+        Decide which files to download and where each one goes locally.
+        Files in a directory keep their path relative to it; files matched by
+        a listing filter keep their whole vault path below ``destination``.
+        :param destination: Local directory to download into.
+        :param file_name: Download this one file.
+        :param directory_name: Download the files of this directory.
+        :param recursive: Include subdirectories of ``directory_name``.
+        :param filters: Listing filters (owner, visibility, file_type); see ``list_files``.
+        :return: List of (metadata, local path) tuples.
+        """
+        if file_name:
+            metadata = get_metadata(file_name, self.context.user_id)
+            if not metadata:
+                raise ValueError(f"No metadata found for file '{file_name}'.")
+            if metadata.get("user_id") != self.context.user_id and metadata.get("visibility") != 'public':
+                raise ValueError(f"Unauthorized access to file '{file_name}'.")
+            return [(metadata, os.path.join(destination, self.local_name(metadata["file_name"])))]
+
+        base = DirectoryRepository.normalise_path(directory_name) if directory_name else 'root'
+        if directory_name:
+            # Directories belong to one user; never mix in other users' public files.
+            filters.setdefault("owner", "me")
+            if base != 'root':
+                self.get_directory(base)
+        plan, taken = [], set()
+        for page in self.iter_files(directory_name=directory_name, recursive=recursive, **filters):
+            for metadata in page["files"].values():
+                relative = (metadata.get("directory_name") or base)[len(base):].strip('/')
+                local_path = os.path.join(destination, *relative.split('/'), self.local_name(metadata["file_name"]))
+                if local_path in taken:
+                    stem, extension = os.path.splitext(local_path)
+                    local_path = f"{stem}.{metadata['file_id']}{extension}"
+                taken.add(local_path)
+                plan.append((metadata, local_path))
+        return plan
+
+    @staticmethod
+    def local_name(file_name):
+        """
+        Get a safe local file name for a stored file name.
+        """
+        name = os.path.basename((file_name or '').replace('\\', '/'))
+        if name in ('', '.', '..'):
+            raise ValueError(f"Cannot save file '{file_name}' locally.")
+        return name
+
+    def download_many(self, plan, workers=None):
+        """
+        Download files in parallel, each streamed from GridFS straight to disk.
+        Files whose local size and checksum already match are skipped, and an
+        interrupted download continues from its ``.part`` file.
+        :param plan: List of (metadata, local path) tuples from ``plan_downloads``.
+        :param workers: Number of concurrent downloads; defaults to DOWNLOAD_WORKERS.
+        :return: Generator of per-file results (file name, path, status, size,
+                 received bytes and error), in completion order.
+        """
+        with ThreadPoolExecutor(max_workers=workers or download_workers) as pool:
+            futures = [pool.submit(self._download_file, metadata, local_path) for metadata, local_path in plan]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def _download_file(self, metadata, local_path):
+        """
+        Download one file for ``download_many``.
+        """
+        size, checksum = metadata.get("file_size"), metadata.get("checksum")
+        result = {"file_name": metadata.get("file_name"), "path": local_path, "status": "downloaded",
+                  "size": size or 0, "received": 0, "error": None}
+        try:
+            if checksum and os.path.isfile(local_path) and os.path.getsize(local_path) == size \
+                    and hash_file(local_path) == checksum:
+                result["status"] = "skipped"
+                return result
+
+            os.makedirs(os.path.dirname(local_path) or '.', exist_ok=True)
+            part_path = f"{local_path}.part"
+            offset = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+            if offset > (size or 0) or not checksum:
+                offset = 0
+            digest = hashlib.sha256()
+            if offset:
+                with open(part_path, 'rb') as part:
+                    for chunk in iter(lambda: part.read(download_chunk_size), b''):
+                        digest.update(chunk)
+                result["status"] = "resumed"
+
+            grid_out = self.repository.open_file(metadata["file_id"])
+            with open(part_path, 'ab' if offset else 'wb') as part:
+                for chunk in self.repository.iter_file(grid_out, start=offset):
+                    part.write(chunk)
+                    digest.update(chunk)
+                    result["received"] += len(chunk)
+
+            if checksum and digest.hexdigest() != checksum:
+                os.remove(part_path)
+                if offset:
+                    # The partial file was left by a different version; start over.
+                    return self._download_file(metadata, local_path)
+                raise ValueError("Checksum mismatch; the download was discarded.")
+            os.replace(part_path, local_path)
+        except Exception as e:
+            result["status"], result["error"] = "failed", str(e)
+        return result
+
+    @staticmethod
+    def listing_filters(user_id, owner=None, visibility=None, file_type=None, directory_name=None, recursive=False):
+        """
+        Turn listing options into metadata store filters that only match files the caller may see.
+        :param user_id: ID of the caller, or None for anonymous callers.
+        :param owner: None for the caller's and public files, 'me' for the caller's
+                      files only, or another user's ID for that user's public files.
+        :param visibility: 'public' or 'private'.
+        :param file_type: File type, e.g. 'image'.
+        :param directory_name: Directory to list.
+        :param recursive: Include subdirectories of ``directory_name``.
+        :return: Keyword arguments for ``find_metadata_page``.
+        """
+        if visibility not in (None, 'public', 'private'):
+            raise ValueError("Visibility must be 'public' or 'private'.")
+        if owner in (None, ''):
+            filters = {"user_id": user_id, "visibility": visibility, "include_public": True}
+        elif owner == 'me' or owner == user_id:
+            if not user_id:
+                raise ValueError("No user session found. Cannot list your files.")
+            filters = {"user_id": user_id, "visibility": visibility}
+        elif visibility == 'private':
+            raise ValueError("Cannot list another user's private files.")
+        else:
+            filters = {"user_id": owner, "visibility": 'public'}
+        if directory_name:
+            filters["directory_name"] = DirectoryRepository.normalise_path(directory_name)
+            filters["recursive"] = recursive
+        filters["file_type"] = file_type
+        return filters
+
+    def list_files(self, owner=None, visibility=None, file_type=None, directory_name=None, recursive=False,
+                   sort='created_at', descending=False, limit=None, cursor=None):
+        """
+        List one page of the files visible to the current user.
+        :param owner: See ``listing_filters``.
+        :param visibility: 'public' or 'private'.
+        :param file_type: File type, e.g. 'image'.
+        :param directory_name: Directory to list.
+        :param recursive: Include subdirectories of ``directory_name``.
+        :param sort: 'name', 'size' or 'created_at'.
+        :param descending: Sort in descending order.
+        :param limit: Page size.
+        :param cursor: Cursor of the page to fetch, as returned with the previous page.
+        :return: Dictionary with the page's files (file ID to metadata) and the next page's cursor.
+        """
+        try:
+            filters = self.listing_filters(
+                self.context.user_id, owner, visibility, file_type, directory_name, recursive
+            )
+            if limit:
+                filters["limit"] = limit
+            files, next_cursor = find_metadata_page(sort=sort, descending=descending, cursor=cursor, **filters)
+            return {"files": files, "next_cursor": next_cursor}
         except Exception as e:
             raise ValueError(f"Error listing files: {str(e)}")
 
+    def iter_files(self, limit=None, page_size=None, cursor=None, **options):
+        """
+        Walk the pages of a listing.
+        :param limit: Stop after this many files; None walks every page.
+        :param page_size: Number of files fetched per request.
+        :param cursor: Cursor to start from, or None for the first page.
+        :param options: Listing options; see ``list_files``.
+        :return: Generator of pages as returned by ``list_files``. The last page's
+                 cursor is set when ``limit`` stopped the walk early.
+        """
+        page_size = page_size or default_page_size
+        remaining = limit
+        while True:
+            page = self.list_files(
+                limit=min(page_size, remaining) if remaining else page_size, cursor=cursor, **options
+            )
+            yield page
+            cursor = page["next_cursor"]
+            if remaining:
+                remaining -= len(page["files"])
+            if not cursor or (limit and remaining <= 0):
+                return
+
     def read_metadata(self, file_name):
         """
         Read metadata for a specific file.
@@ -130,8 +437,8 @@ class FileService(BaseService):
         :return: Metadata dictionary for the specified file.
         """
         try:
-            metadata = get_metadata(file_name)
-            user_id = UserService.get_user_id()
+            user_id = self.context.user_id
+            metadata = get_metadata(file_name, user_id)
             if not metadata:
                 raise ValueError(f"No metadata found for file '{file_name}'.")
             if metadata.get("user_id") != user_id and metadata.get("visibility") != 'public':
@@ -147,8 +454,8 @@ class FileService(BaseService):
         :return: Confirmation of deletion.
         """
         try:
-            metadata = get_metadata(file_name)
-            user_id = UserService.get_user_id()
+            user_id = self.context.user_id
+            metadata = get_metadata(file_name, user_id)
             if not user_id:
                 return "No user session found. Cannot delete file."
             if not metadata:
@@ -158,10 +465,13 @@ class FileService(BaseService):
             
             file_id = metadata.get("file_id")
             if file_id:
-                FileRepository().delete_file(file_name, file_id)
+                self.repository.delete_file(
+                    metadata["file_name"], file_id, metadata.get("checksum"),
+                    user_id=user_id, directory_name=metadata.get("directory_name"),
+                )
             else:
                 return f"File '{file_name}' does not exist."
-            delete_metadata(file_name)
+            delete_metadata(MetadataStore.record_key(file_name, metadata), user_id=user_id)
             return f"File '{file_name}' deleted successfully."
 
         except Exception as e:
@@ -175,8 +485,8 @@ class FileService(BaseService):
         :return: Confirmation of publication.
         """
         try:
-            metadata = get_metadata(file_name)
-            user_id = UserService.get_user_id()
+            user_id = self.context.user_id
+            metadata = get_metadata(file_name, user_id)
             if not user_id:
                 raise ValueError("No user session found. Cannot publish file.")
             if not metadata:
@@ -187,7 +497,10 @@ class FileService(BaseService):
             metadata['visibility'] = 'public'
             create_metadata(file_name, metadata)
             
-            FileRepository().update_file(file_name, metadata)
+            self.repository.update_file(
+                metadata["file_name"], metadata, user_id=user_id,
+                file_id=metadata.get("file_id"), directory_name=metadata.get("directory_name"),
+            )
             return metadata
         
         except Exception as e:
@@ -200,8 +513,8 @@ class FileService(BaseService):
         :return: Confirmation of unpublication.
         """
         try:
-            metadata = get_metadata(file_name)
-            user_id = UserService.get_user_id()
+            user_id = self.context.user_id
+            metadata = get_metadata(file_name, user_id)
             if not user_id:
                 raise ValueError("No user session found. Cannot unpublish file.")
             if not metadata:
@@ -212,36 +525,157 @@ class FileService(BaseService):
             metadata['visibility'] = 'private'
             create_metadata(file_name, metadata)
             
-            FileRepository().update_file(file_name, metadata)
+            self.repository.update_file(
+                metadata["file_name"], metadata, user_id=user_id,
+                file_id=metadata.get("file_id"), directory_name=metadata.get("directory_name"),
+            )
             return metadata
         
         except Exception as e:
             raise ValueError(f"Error unpublishing file '{file_name}': {str(e)}")
 
-    def create_directory(self, directory_name, parent_id, directory_path='root/'):
+    @staticmethod
+    def select_files(user_id, targets=(), directory_name=None, recursive=False):
+        """
+        Resolve a bulk operation's targets to files owned by a user.
+        Exact names are looked up with one query; glob patterns are matched
+        against the file names in ``directory_name`` (default: every
+        directory), and a directory on its own selects all of its files.
+        :param user_id: Owner of the files.
+        :param targets: File names, file IDs or glob patterns.
+        :param directory_name: Directory to select from.
+        :param recursive: Include subdirectories of ``directory_name``.
+        :return: Tuple of a dictionary of file ID to metadata and the list of names not found.
+        """
+        names = [target for target in targets if not glob.has_magic(target)]
+        patterns = [target for target in targets if glob.has_magic(target)]
+        if not names and not patterns and not directory_name:
+            raise ValueError("No files selected. Give file names, glob patterns or a directory.")
+
+        selected = get_metadata_many(names, user_id=user_id) if names else {}
+        found = set(selected) | {metadata.get("file_name") for metadata in selected.values()}
+        missing = [name for name in names if name not in found]
+
+        if patterns or (directory_name and not names):
+            filters = FileService.listing_filters(
+                user_id, owner='me', directory_name=directory_name or 'root', recursive=recursive or not directory_name
+            )
+            cursor = None
+            while True:
+                files, cursor = find_metadata_page(sort='name', limit=max_page_size, cursor=cursor, **filters)
+                for key, metadata in files.items():
+                    if not patterns or any(fnmatch.fnmatchcase(metadata.get("file_name", ""), p) for p in patterns):
+                        selected[key] = metadata
+                if not cursor:
+                    break
+        return selected, missing
+
+    @staticmethod
+    def batches(records, size=None):
+        """
+        Split selected records into batches of at most BULK_BATCH_SIZE.
+        :param records: Dictionary of file ID to metadata.
+        :return: Generator of lists of (file ID, metadata) tuples.
+        """
+        items = list(records.items())
+        size = size or bulk_batch_size
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
+
+    def set_visibility_many(self, visibility, targets=(), directory_name=None, recursive=False):
+        """
+        Change the visibility of many files owned by the current user.
+        Each batch costs one bulk write to MongoDB and one metadata store transaction.
+        :param visibility: Either 'public' or 'private'.
+        :param targets: File names, file IDs or glob patterns; see ``select_files``.
+        :param directory_name: Directory to select from.
+        :param recursive: Include subdirectories of ``directory_name``.
+        :return: Dictionary with the matched and changed counts and the names not found.
+        """
+        try:
+            user_id = self.context.require_user("change file visibility")
+            selected, missing = self.select_files(user_id, targets, directory_name, recursive)
+            changed = 0
+            for batch in self.batches(selected):
+                records = {
+                    key: {**metadata, "visibility": visibility}
+                    for key, metadata in batch if metadata.get("visibility") != visibility
+                }
+                if records:
+                    self.repository.set_visibility_many(records.values(), visibility)
+                    update_metadata_many(records)
+                    changed += len(records)
+            return {"matched": len(selected), "changed": changed, "missing": missing}
+        except Exception as e:
+            raise ValueError(f"Error changing visibility to '{visibility}': {str(e)}")
+
+    def publish_files(self, targets=(), directory_name=None, recursive=False):
+        """
+        Publish many files at once; see ``set_visibility_many``.
+        """
+        return self.set_visibility_many('public', targets, directory_name, recursive)
+
+    def unpublish_files(self, targets=(), directory_name=None, recursive=False):
+        """
+        Unpublish many files at once; see ``set_visibility_many``.
+        """
+        return self.set_visibility_many('private', targets, directory_name, recursive)
+
+    def delete_files(self, targets=(), directory_name=None, recursive=False):
+        """
+        Delete many files owned by the current user.
+        Each batch costs one bulk delete in MongoDB, one bulk update of the blob
+        reference counts and one metadata store transaction; content is then
+        removed for blobs that lost their last reference.
+        :param targets: File names, file IDs or glob patterns; see ``select_files``.
+        :param directory_name: Directory to select from.
+        :param recursive: Include subdirectories of ``directory_name``.
+        :return: Dictionary with the matched and deleted counts and the names not found.
+        """
+        try:
+            user_id = self.context.require_user("delete files")
+            selected, missing = self.select_files(user_id, targets, directory_name, recursive)
+            deleted = 0
+            for batch in self.batches(selected):
+                records = dict(batch)
+                self.repository.delete_files(records.values())
+                deleted += delete_metadata_many(records)
+            return {"matched": len(selected), "deleted": deleted, "missing": missing}
+        except Exception as e:
+            raise ValueError(f"Error deleting files: {str(e)}")
+
+    def dedup_report(self, scope='user'):
+        """
+        Report how much storage content-addressing saves.
+        :param scope: 'user' for the current user's files, 'global' for all files.
+        :return: Dictionary with logical and stored bytes and the dedup ratio.
+        """
+        try:
+            user_id = self.context.user_id
+            if not user_id:
+                raise ValueError("No user session found.")
+            if scope != 'user':
+                if not self.context.is_admin:
+                    raise PermissionError("Only administrators can report on all files.")
+                user_id = None
+            return self.repository.dedup_report(user_id)
+        except Exception as e:
+            raise ValueError(f"Error building dedup report: {str(e)}")
+
+    def create_directory(self, directory_path, user_id=None, parents=False):
         """
         Create a new directory.
-        :param directory_name: Name of the directory to create.
+        :param directory_path: Path of the directory to create, e.g. 'photos/2024'.
+        :param user_id: Owner of the directory; defaults to the current user.
+        :param parents: Also create missing parent directories.
         :return: Confirmation of directory creation.
         """
         try:
-            user_id = UserService.get_user_id()
-            directory = FileRepository().find_directory(directory_name, user_id)
-            if directory and directory.parent_id == parent_id:
-                raise ValueError(f"Directory '{directory_name}' already exists.")
-            
-            directory_path = directory_path if directory_path or directory_path == 'root/' else f'root/{directory_name}'
-            new_directory = FolderModel(
-                user_id=user_id,
-                folder_name=directory_name,
-                parent_id=parent_id,
-                directory_path=directory_path,
-                created_at=get_current_time()
-            )
-            FileRepository().create_directory(new_directory)
-            return f"Directory '{directory_name}' created successfully."
+            user_id = user_id or self.context.require_user("create directory")
+            directory = self.directories.create_directory(user_id, directory_path, get_current_time(), parents)
+            return f"Directory '{directory['directory_path']}' created successfully."
         except Exception as e:
-            raise ValueError(f"Error making directory '{directory_name}': {str(e)}")
+            raise ValueError(f"Error making directory '{directory_path}': {str(e)}")
 
     def list_directories(self, user_id=None):
         """
@@ -250,8 +684,8 @@ class FileService(BaseService):
         :return: List of directories.
         """
         try:
-            user_id = UserService.get_user_id() if not user_id else user_id
-            directories = FileRepository().get_user_directories(user_id)
+            user_id = user_id or self.context.user_id
+            directories = self.directories.get_user_directories(user_id)
             if not directories:
                 return "No directories found."
             return directories
@@ -261,37 +695,46 @@ class FileService(BaseService):
     def get_directory(self, directory_name, user_id=None):
         """
         Get details of a specific directory.
-        :param directory_name: Name of the directory to retrieve.
+        :param directory_name: Path or name of the directory to retrieve.
         :return: Details of the specified directory.
         """
         try:
-            user_id = UserService.get_user_id()
-            directory = FileRepository().find_directory(directory_name, user_id)
+            user_id = user_id or self.context.user_id
+            directory = self.directories.find_by_path(user_id, directory_name)
             if not directory:
                 raise ValueError(f"Directory '{directory_name}' not found.")
             return directory
         except Exception as e:
             raise ValueError(f"Error retrieving directory '{directory_name}': {str(e)}")
-        
-    
-    def get_folder_files(self, directory_name):
+
+    def move_directory(self, source, destination):
         """
-        Get all files in a specific directory.
-        :param directory_name: Name of the directory to retrieve files from.
-        :return: List of files in the specified directory.
+        Move or rename a directory with everything below it.
+        :param source: Path of the directory to move.
+        :param destination: New path of the directory.
+        :return: Confirmation of the move.
         """
         try:
-            user_id = UserService.get_user_id()
-            metadata = list_metadata()
-
-            if user_id:
-                metadata = {k: v for k, v in metadata.items() if v.get("directory_name") == directory_name and (v.get("user_id") == user_id or v.get("visibility") == 'public')}
-            else:
-                metadata = {k: v for k, v in metadata.items() if v.get("directory_name") == directory_name and v.get("visibility") == 'public'}
+            user_id = self.context.require_user("move directory")
+            source = DirectoryRepository.normalise_path(source)
+            destination = DirectoryRepository.normalise_path(destination)
+            moved = self.directories.move_directory(user_id, source, destination)
+            move_metadata_directory(user_id, source, destination)
+            return (
+                f"Moved '{source}' to '{destination}' "
+                f"({moved['directories']} directories, {moved['files']} files)."
+            )
+        except Exception as e:
+            raise ValueError(f"Error moving directory '{source}': {str(e)}")
 
-            return metadata
-        
+    def directory_usage(self, directory_name='root'):
+        """
+        Get the recursive size of a directory.
+        :param directory_name: Path of the directory.
+        :return: Dictionary with file count, total bytes and directory count.
+        """
+        try:
+            user_id = self.context.require_user("measure directory")
+            return self.directories.subtree_usage(user_id, DirectoryRepository.normalise_path(directory_name))
         except Exception as e:
-            return f"Error retrieving files from directory '{directory_name}': {str(e)}"
-        
-    
\ No newline at end of file
+            raise ValueError(f"Error measuring directory '{directory_name}': {str(e)}")
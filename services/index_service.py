@@ -0,0 +1,46 @@
+from .base_service import BaseService
+from storage.database import Database
+from storage.indexes import ensure_indexes, check_query_plans
+from repositories.directory_repository import DirectoryRepository
+from utils.helpers import get_current_time, rename_metadata_directories
+
+
+class IndexService(BaseService):
+    """
+    Service for creating the declared MongoDB indexes and checking that
+    repository queries use them.
+    """
+
+    def __init__(self):
+        self.mongo_db = Database().get_mongo_db("vault")
+
+    def help(self):
+        """
+        Display help information for index operations.
+        """
+        return """
+            IndexService: Create the declared MongoDB indexes and report
+            repository queries that fall back to a collection scan.
+        """
+
+    def ensure(self):
+        """
+        Migrate legacy directories, then create any missing indexes.
+        :return: Dictionary of collection name to its declared index names.
+        """
+        try:
+            renames = DirectoryRepository().migrate_legacy(get_current_time())
+            rename_metadata_directories(renames)
+            return ensure_indexes(self.mongo_db)
+        except Exception as e:
+            raise ValueError(f"Error creating indexes: {str(e)}")
+
+    def check(self):
+        """
+        Explain every repository query.
+        :return: List of query plan summaries; see ``check_query_plans``.
+        """
+        try:
+            return check_query_plans(self.mongo_db)
+        except Exception as e:
+            raise ValueError(f"Error checking query plans: {str(e)}")
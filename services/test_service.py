@@ -20,5 +20,4 @@ class TestService(BaseService):
         Execute a test operation.
         This is a placeholder method for demonstration purposes.
         """
-        print("Running test operation...")
         return "Test operation completed successfully."
\ No newline at end of file
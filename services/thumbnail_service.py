@@ -0,0 +1,217 @@
+from .base_service import BaseService
+from PIL import Image
+from bson import ObjectId
+from redis.exceptions import LockError
+from storage.database import Database
+from repositories.thumbnail_repository import ThumbnailRepository
+from tempfile import NamedTemporaryFile
+import io
+import os
+import shutil
+import subprocess
+import time
+
+
+THUMBNAIL_SIZES = sorted(int(size) for size in os.getenv("THUMBNAIL_SIZES", "64,128,256").split(","))
+THUMBNAIL_WEBP = os.getenv("THUMBNAIL_WEBP", "true").lower() in ("1", "true", "yes")
+THUMBNAIL_LOCK_TIMEOUT = int(os.getenv("THUMBNAIL_LOCK_TIMEOUT", 60))
+
+IMAGE_FORMATS = {
+    '.jpg': ('JPEG', 'image/jpeg'),
+    '.jpeg': ('JPEG', 'image/jpeg'),
+    '.png': ('PNG', 'image/png'),
+    '.gif': ('GIF', 'image/gif'),
+}
+VIDEO_EXTENSIONS = ['.mp4', '.avi', '.mov']
+FORMAT_CONTENT_TYPES = {
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+}
+
+
+class ThumbnailService(BaseService):
+    """
+    Service for generating and serving thumbnails.
+    Every configured size (and its WebP variant) is produced from a single
+    decode of the source, and missing thumbnails are generated on demand
+    with a Redis lock so concurrent requests only render once.
+    """
+
+    def help(self):
+        """
+        Display help information for thumbnail operations.
+        """
+        return """
+            ThumbnailService: Use this service to generate and fetch thumbnails in several sizes."""
+
+    @staticmethod
+    def supports(file_name):
+        """
+        Check whether thumbnails can be generated for a file.
+        :param file_name: Name of the file.
+        :return: True for supported images and videos.
+        """
+        extension = os.path.splitext(file_name)[1].lower()
+        return extension in IMAGE_FORMATS or extension in VIDEO_EXTENSIONS
+
+    @staticmethod
+    def native_format(file_name):
+        """
+        Get the thumbnail format matching a file's own format.
+        :param file_name: Name of the file.
+        :return: Format name, e.g. 'jpeg' or 'png'.
+        """
+        extension = os.path.splitext(file_name)[1].lower()
+        return IMAGE_FORMATS.get(extension, ('JPEG', 'image/jpeg'))[0].lower()
+
+    @staticmethod
+    def snap_size(size):
+        """
+        Map a requested size to the smallest configured size that covers it.
+        :param size: Requested bounding box edge in pixels.
+        :return: A size from THUMBNAIL_SIZES.
+        """
+        for candidate in THUMBNAIL_SIZES:
+            if candidate >= size:
+                return candidate
+        return THUMBNAIL_SIZES[-1]
+
+    @staticmethod
+    def _flatten(image):
+        """
+        Convert an image to RGB, compositing transparency onto white.
+        """
+        if image.mode in ['RGBA', 'LA']:
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.split()[-1])
+            return background
+        return image.convert("RGB")
+
+    @classmethod
+    def render(cls, image, pillow_format, sizes=None, webp=None):
+        """
+        Encode an already opened image at every configured size.
+        Sizes are produced largest first, each downscaled from the previous
+        one, so the source is decoded only once.
+        :param image: Opened Pillow image.
+        :param pillow_format: Pillow format name for the native variant.
+        :param sizes: Sizes to render; defaults to THUMBNAIL_SIZES.
+        :param webp: Also render WebP variants; defaults to THUMBNAIL_WEBP.
+        :return: List of (size, content_type, bytes) tuples.
+        """
+        sizes = sorted(sizes or THUMBNAIL_SIZES, reverse=True)
+        webp = THUMBNAIL_WEBP if webp is None else webp
+        if pillow_format == 'JPEG':
+            image.draft('RGB', (sizes[0], sizes[0]))
+        image.load()
+
+        rendered = []
+        current = image
+        for size in sizes:
+            current = current.copy()
+            current.thumbnail((size, size))
+            native = cls._flatten(current) if pillow_format == 'JPEG' else current
+            output = io.BytesIO()
+            native.save(output, pillow_format)
+            rendered.append((size, FORMAT_CONTENT_TYPES[pillow_format.lower()], output.getvalue()))
+            if webp:
+                output = io.BytesIO()
+                has_alpha = 'A' in current.mode or 'transparency' in current.info
+                current.convert('RGBA' if has_alpha else 'RGB').save(output, "WEBP")
+                rendered.append((size, FORMAT_CONTENT_TYPES['webp'], output.getvalue()))
+        return rendered
+
+    @classmethod
+    def render_source(cls, source, file_name, sizes=None, webp=None):
+        """
+        Decode a source file stream and render all thumbnails for it.
+        :param source: Readable binary stream of the source file.
+        :param file_name: Name of the file, used to pick the decoder.
+        :return: List of (size, content_type, bytes) tuples.
+        """
+        extension = os.path.splitext(file_name)[1].lower()
+        if extension in IMAGE_FORMATS:
+            with Image.open(source) as image:
+                return cls.render(image, IMAGE_FORMATS[extension][0], sizes, webp)
+
+        largest = max(sizes or THUMBNAIL_SIZES)
+        with NamedTemporaryFile(suffix=extension) as video, NamedTemporaryFile(suffix='.png') as frame:
+            shutil.copyfileobj(source, video)
+            video.flush()
+            try:
+                subprocess.run([
+                    'ffmpeg', '-y', '-i', video.name, '-ss', '00:00:01.000', '-vframes', '1',
+                    '-vf', f'scale={largest}:{largest}:force_original_aspect_ratio=decrease', frame.name
+                ], check=True, capture_output=True)
+            except subprocess.CalledProcessError as e:
+                raise ValueError(e.stderr.decode())
+            with Image.open(frame.name) as image:
+                return cls.render(image, 'JPEG', sizes, webp)
+
+    def generate(self, file_id, file_name):
+        """
+        Render and store every thumbnail variant for a file.
+        :param file_id: GridFS ID of the source file.
+        :param file_name: Name of the file.
+        :return: Number of stored thumbnails.
+        """
+        source = Database().fs.get(ObjectId(file_id))
+        try:
+            rendered = self.render_source(source, file_name)
+        finally:
+            source.close()
+        repository = ThumbnailRepository()
+        for size, content_type, data in rendered:
+            repository.save_thumbnail(file_id, data, content_type, size)
+        return len(rendered)
+
+    def get_thumbnail(self, file_id, file_name, size, format=None):
+        """
+        Get a stored thumbnail, generating the whole set on a miss.
+        Only one process renders a given file at a time; others wait for it.
+        :param file_id: GridFS ID of the source file.
+        :param file_name: Name of the file.
+        :param size: Requested size; snapped to a configured size.
+        :param format: 'webp' or the file's native format (default).
+        :return: GridOut handle of the thumbnail.
+        """
+        if not self.supports(file_name):
+            raise ValueError(f"Thumbnails are not available for '{file_name}'.")
+        format = format or self.native_format(file_name)
+        if format == 'webp' and not THUMBNAIL_WEBP:
+            raise ValueError("WebP thumbnails are disabled.")
+        if format not in ['webp', self.native_format(file_name)]:
+            raise ValueError(f"Unsupported thumbnail format '{format}'.")
+        size = self.snap_size(size)
+        content_type = FORMAT_CONTENT_TYPES[format]
+
+        repository = ThumbnailRepository()
+        thumbnail = repository.find_thumbnail(file_id, size, content_type)
+        if thumbnail:
+            return thumbnail
+
+        # The lock holds a token unique to this holder and is released with a
+        # compare-and-delete, so a render that outlives the lock's expiry
+        # never releases the lock another process has taken since.
+        lock = Database().get_redis_client().lock(f"thumbnail:lock:{file_id}", timeout=THUMBNAIL_LOCK_TIMEOUT)
+        deadline = time.monotonic() + THUMBNAIL_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            if lock.acquire(blocking=False):
+                try:
+                    thumbnail = repository.find_thumbnail(file_id, size, content_type)
+                    if not thumbnail:
+                        self.generate(file_id, file_name)
+                        thumbnail = repository.find_thumbnail(file_id, size, content_type)
+                    return thumbnail
+                finally:
+                    try:
+                        lock.release()
+                    except LockError:
+                        pass
+            time.sleep(0.1)
+            thumbnail = repository.find_thumbnail(file_id, size, content_type)
+            if thumbnail:
+                return thumbnail
+        raise TimeoutError(f"Timed out waiting for thumbnail of '{file_name}'.")
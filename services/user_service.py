@@ -1,8 +1,13 @@
 from .base_service import BaseService
 from repositories.user_repository import UserRepository
-from storage.models import UserModel
+from storage.models import UserModel, SessionModel
+from utils.helpers import get_current_time
+from utils.context import RequestContext
+from utils.passwords import hash_password, verify_password, needs_rehash
+from utils.rate_limit import RateLimiter, RateLimitExceeded, login_rate_limit, login_ip_rate_limit, login_rate_window
+from utils.tokens import InvalidToken, decode_token, is_signed_token, revocation_list
+from utils.session import get_session_token, new_session_token, session_cache, session_ttl
 from uuid import uuid4
-import bcrypt
 
 
 class UserService(BaseService):
@@ -34,8 +39,7 @@ class UserService(BaseService):
             if existing_user:
                 raise("A user with that email already exists")
             
-            hash = bcrypt.hashpw(user_data['password'].encode('utf-8'), bcrypt.gensalt())
-            user_data['password'] = hash.decode('utf-8')
+            user_data['password'] = hash_password(user_data['password'])
             user_data['id'] = id
             user_data['created_at'] = user_data.get('created_at', str(uuid4()))
             UserRepository().create_user(user_data)
@@ -44,19 +48,18 @@ class UserService(BaseService):
             raise ValueError(f"Error creating user: {str(e)}")
         
     @classmethod
-    def get_current_user(cls):
+    def get_current_user(cls, token=None):
         """
         Get the current user from the session.
+        :param token: Session token; defaults to the current request or CLI session.
         :return: User information if session exists, otherwise None.
         """
         try:
-            session = {k.decode('utf-8'): v.decode('utf-8') for k, v in UserRepository().get_session()}
-            if session:
-                user_id = session.get("user_id")
-                if user_id:
-                    user_data = UserRepository().find_by_id(user_id)
-                    if user_data:
-                        return UserModel(**user_data)
+            user_id = cls.get_user_id(token)
+            if user_id:
+                user_data = UserRepository().find_by_id(user_id)
+                if user_data:
+                    return UserModel(**user_data)
             return None
         except Exception as e:
             return f"Error retrieving user: {str(e)}"
@@ -65,59 +68,155 @@ class UserService(BaseService):
     def authenticate_user(cls, username: str, password: str):
         """
         Authenticate a user with username and password.
+        Hashes made with an outdated cost are upgraded on success.
         :param username: Username of the user.
         :param password: Password of the user.
         :return: User information if authentication is successful, otherwise None.
         """
         try:
-            user_data = UserRepository().find_by_username(username)
-            if user_data and bcrypt.checkpw(password.encode('utf-8'), user_data['password'].encode('utf-8')):
-                return UserModel(**user_data)
-            return None
+            repository = UserRepository()
+            user_data = repository.find_by_username(username)
+            if not user_data or not verify_password(password, user_data['password']):
+                return None
+            if needs_rehash(user_data['password']):
+                user_data['password'] = hash_password(password)
+                repository.update_password(user_data['id'], user_data['password'])
+            return UserModel(**user_data)
         except Exception as e:
-            raise ValueError("Error authenticating user: {str(e)}")
+            raise ValueError(f"Error authenticating user: {str(e)}")
+
+    @classmethod
+    def check_login_rate(cls, username: str, client_ip: str = None):
+        """
+        Count a login attempt against the username and client IP limits.
+        :raises RateLimitExceeded: If either limit is exceeded.
+        """
+        redis = UserRepository().redis
+        RateLimiter(redis, "login:user", login_rate_limit, login_rate_window).hit(username.lower())
+        if client_ip:
+            RateLimiter(redis, "login:ip", login_ip_rate_limit, login_rate_window).hit(client_ip)
         
     @classmethod
-    def login_user(cls, username: str, password: str):
+    def login_user(cls, username: str, password: str, client_ip: str = None):
         """
-        Log in a user by setting the session.
+        Log in a user by creating a new session.
+        Attempts are rate limited per username and client IP before any
+        password hashing is done.
         :param username: Username of the user.
         :param password: Password of the user.
-        :return: Confirmation of login or error message.
+        :param client_ip: Address the attempt came from, if known.
+        :return: Session with its token, or error message.
         """
         try:
+            cls.check_login_rate(username, client_ip)
             user = cls.authenticate_user(username, password)
             if user:
-                session_data = {"user_id": user.id, "token": str(uuid4())}
-                UserRepository().create_session(session_data)
-                return user
+                RateLimiter(UserRepository().redis, "login:user", login_rate_limit, login_rate_window).reset(username.lower())
+                token = new_session_token()
+                session_data = {"user_id": user.id, "created_at": get_current_time()}
+                error = UserRepository().create_session(token, session_data, session_ttl)
+                if error:
+                    raise ValueError(error)
+                session_cache.set(token, user.id)
+                return SessionModel(token=token, user=user, expires_in=session_ttl)
             else:
                 return "Invalid username or password."
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             raise ValueError(f"Error logging in user: {str(e)}")
         
     @classmethod
-    def logout_user(cls):
+    def logout_user(cls, token=None):
         """
-        Log out the current user by clearing the session.
+        Log out the current user by deleting the session or revoking its signed token.
+        :param token: Session or access token; defaults to the current request or CLI session.
         :return: Confirmation of logout.
         """
         try:
-            UserRepository().delete_session()
+            token = token or get_session_token()
+            if is_signed_token(token):
+                try:
+                    revocation_list.revoke(UserRepository().redis, decode_token(token, "access"))
+                except InvalidToken:
+                    pass
+            elif token:
+                session_cache.delete(token)
+                UserRepository().delete_session(token)
             return "User logged out successfully."
         except Exception as e:
             raise ValueError(f"Error logging out user: {str(e)}")
+
+    @classmethod
+    def revoke_user_sessions(cls, user_id):
+        """
+        Log a user out everywhere by deleting all of their sessions and
+        revoking every signed token issued to them so far.
+        :param user_id: ID of the user.
+        :return: Number of revoked sessions.
+        """
+        repository = UserRepository()
+        tokens = repository.delete_user_sessions(user_id)
+        if isinstance(tokens, str):
+            raise ValueError(tokens)
+        revocation_list.revoke_user(repository.redis, user_id)
+        for token in tokens:
+            session_cache.delete(token)
+        return len(tokens)
         
     @classmethod
-    def get_user_id(cls):
+    def verify_access_token(cls, token):
         """
-        Get the user ID from the current session.
-        :return: User ID if session exists, otherwise None.
+        Validate a signed access token locally.
+        Only the revocation snapshot is ever fetched, at most every few seconds.
+        :param token: Encoded access token.
+        :return: Token claims.
+        :raises InvalidToken: If the token is invalid, expired or revoked.
+        """
+        claims = decode_token(token, "access")
+        if revocation_list.is_stale():
+            revocation_list.refresh(UserRepository().redis)
+        if revocation_list.is_revoked(claims):
+            raise InvalidToken("Token has been revoked.")
+        return claims
+
+    @classmethod
+    def get_user_id(cls, token=None):
+        """
+        Get the user ID from the current session or signed access token.
+        Signed tokens are verified locally; session tokens are cached in
+        process for a few seconds.
+        :param token: Session or access token; defaults to the current request or CLI session.
+        :return: User ID if the token is valid, otherwise None.
         """
         try:
-            session = {k.decode('utf-8'): v.decode('utf-8') for k, v in UserRepository().get_session()}
-            if session:
-                return session.get("user_id")
-            return None
+            token = token or get_session_token()
+            if not token:
+                return None
+            if is_signed_token(token):
+                try:
+                    return cls.verify_access_token(token)["sub"]
+                except InvalidToken:
+                    return None
+            user_id = session_cache.get(token)
+            if user_id:
+                return user_id
+            session = UserRepository().get_session(token, session_ttl)
+            if isinstance(session, str):
+                raise ValueError(session)
+            user_id = session.get("user_id")
+            if user_id:
+                session_cache.set(token, user_id)
+            return user_id
         except Exception as e:
             raise ValueError(f"Error retrieving user ID: {str(e)}")
+
+    @classmethod
+    def get_context(cls, token=None):
+        """
+        Build the request context for a session token.
+        The user is looked up on first use and then remembered for the context's lifetime.
+        :param token: Session token; defaults to the current request or CLI session.
+        :return: RequestContext.
+        """
+        return RequestContext(token=token or get_session_token(), resolver=cls.get_user_id)
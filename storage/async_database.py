@@ -0,0 +1,151 @@
+from pymongo import AsyncMongoClient, errors
+from redis.asyncio import ConnectionPool, Redis
+from redis import exceptions as redis_exceptions
+from gridfs import AsyncGridFSBucket
+import threading
+import time
+from storage.database import (
+    mongo_uri,
+    redis_host,
+    redis_port,
+    mongo_max_pool_size,
+    mongo_min_pool_size,
+    redis_max_connections,
+    health_check_interval,
+)
+
+
+class AsyncDatabase:
+    """
+    Asyncio counterpart of ``Database`` used by the API.
+    Shares the same settings and per-process pooling, but its clients never
+    block the event loop.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __new__(cls, mongo_uri=mongo_uri, redis_host=redis_host, redis_port=redis_port):
+        key = (mongo_uri, redis_host, redis_port)
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = super().__new__(cls)
+                instance._initialised = False
+                cls._instances[key] = instance
+            return instance
+
+    def __init__(self, mongo_uri=mongo_uri, redis_host=redis_host, redis_port=redis_port):
+        """
+        Configure the shared async database connections.
+        Nothing is opened here; clients are created on first use.
+
+        :param mongo_uri: URI for MongoDB connection.
+        :param redis_host: Host for Redis connection.
+        :param redis_port: Port for Redis connection.
+        """
+        if self._initialised:
+            return
+        self.mongo_uri = mongo_uri
+        self.redis_host = redis_host
+        self.redis_port = redis_port
+        self.health_check_interval = health_check_interval
+        self._reset()
+        self._initialised = True
+
+    def _reset(self):
+        self._mongo_client = None
+        self._bucket = None
+        self._redis_pool = None
+        self._redis_client = None
+        self._mongo_checked_at = 0.0
+
+    @property
+    def mongo_client(self):
+        """
+        Get the pooled async MongoDB client, creating it on first use.
+        """
+        if self._mongo_client is None:
+            self._mongo_client = AsyncMongoClient(
+                self.mongo_uri,
+                serverSelectionTimeoutMS=5000,
+                maxPoolSize=mongo_max_pool_size,
+                minPoolSize=mongo_min_pool_size,
+            )
+        return self._mongo_client
+
+    @property
+    def redis_client(self):
+        """
+        Get the async Redis client backed by the shared connection pool.
+        """
+        if self._redis_client is None:
+            self._redis_pool = ConnectionPool(
+                host=self.redis_host,
+                port=self.redis_port,
+                db=0,
+                max_connections=redis_max_connections,
+                socket_connect_timeout=5,
+                health_check_interval=int(self.health_check_interval),
+            )
+            self._redis_client = Redis(connection_pool=self._redis_pool)
+        return self._redis_client
+
+    @property
+    def bucket(self):
+        """
+        Get the async GridFS bucket for the vault database.
+        Uses the same ``files`` collections as the synchronous GridFS.
+        """
+        if self._bucket is None:
+            self._bucket = AsyncGridFSBucket(self.get_mongo_db("vault"), bucket_name="files")
+        return self._bucket
+
+    def get_mongo_db(self, db_name):
+        """
+        Get an async MongoDB database instance.
+
+        :param db_name: Name of the database to connect to.
+        :return: AsyncDatabase instance from pymongo.
+        """
+        return self.mongo_client[db_name]
+
+    def get_redis_client(self):
+        """
+        Get the async Redis client instance.
+
+        :return: redis.asyncio client instance.
+        """
+        return self.redis_client
+
+    async def check_health(self):
+        """
+        Ping MongoDB and Redis if the last successful check is older than the interval.
+
+        :return: True if both backends answered, False otherwise.
+        """
+        now = time.monotonic()
+        if now - self._mongo_checked_at < self.health_check_interval:
+            return True
+        try:
+            await self.mongo_client.admin.command('ping')
+            await self.redis_client.ping()
+            self._mongo_checked_at = now
+            return True
+        except errors.ConnectionFailure as e:
+            print(f"MongoDB connection failed: {e}")
+        except redis_exceptions.ConnectionError as e:
+            print(f"Redis connection failed: {e}")
+        return False
+
+    async def close_connections(self):
+        """
+        Close the async database connections.
+        """
+        if self._mongo_client is not None:
+            await self._mongo_client.close()
+        if self._redis_client is not None:
+            await self._redis_client.aclose()
+        if self._redis_pool is not None:
+            await self._redis_pool.disconnect()
+        self._reset()
@@ -1,51 +1,172 @@
 from pymongo import MongoClient, errors
-from redis import Redis, exceptions as redis_exceptions
 import os
+import threading
+import time
 from dotenv import load_dotenv
-from gridfs import GridFS
 
 
 load_dotenv()
 mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
 redis_host = os.getenv("REDIS_HOST", "localhost")
 redis_port = int(os.getenv("REDIS_PORT", 6379))
+mongo_max_pool_size = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+mongo_min_pool_size = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+redis_max_connections = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+health_check_interval = float(os.getenv("DB_HEALTH_CHECK_INTERVAL", 30))
+
 
 class Database:
     """
     Database class to manage connections to Redis and MongoDB.
+
+    Instances are shared per process: constructing ``Database()`` with the same
+    connection settings always returns the same object, so every repository
+    reuses one MongoDB connection pool and one Redis connection pool.
+    Connections are opened lazily on first use and their health is checked at
+    most once per ``health_check_interval`` seconds.
     """
 
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __new__(cls, mongo_uri=mongo_uri, redis_host=redis_host, redis_port=redis_port):
+        key = (mongo_uri, redis_host, redis_port)
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = super().__new__(cls)
+                instance._initialised = False
+                cls._instances[key] = instance
+            return instance
+
     def __init__(self, mongo_uri=mongo_uri, redis_host=redis_host, redis_port=redis_port):
         """
-        Initialize the database connections.
-        
+        Configure the shared database connections.
+        Nothing is opened here; clients are created on first use.
+
         :param mongo_uri: URI for MongoDB connection.
         :param redis_host: Host for Redis connection.
         :param redis_port: Port for Redis connection.
         """
+        if self._initialised:
+            return
+        self.mongo_uri = mongo_uri
+        self.redis_host = redis_host
+        self.redis_port = redis_port
+        self.health_check_interval = health_check_interval
+        self._lock = threading.RLock()
+        self._reset()
+        self._initialised = True
+
+    def _reset(self):
+        """
+        Forget every open client so the next access reconnects.
+        """
+        self._pid = os.getpid()
+        self._mongo_client = None
+        self._fs = None
+        self._redis_pool = None
+        self._redis_client = None
+        self._mongo_checked_at = 0.0
+        self._redis_checked_at = 0.0
+
+    def _ensure_process(self):
+        """
+        Drop clients inherited from a parent process.
+        MongoClient and Redis pools are not fork-safe, so a forked worker
+        must open its own connections.
+        """
+        if self._pid != os.getpid():
+            self._reset()
+
+    @property
+    def mongo_client(self):
+        """
+        Get the pooled MongoDB client, connecting on first use.
+        """
+        self._ensure_process()
+        if self._mongo_client is None:
+            with self._lock:
+                if self._mongo_client is None:
+                    self._mongo_client = MongoClient(
+                        self.mongo_uri,
+                        serverSelectionTimeoutMS=5000,
+                        maxPoolSize=mongo_max_pool_size,
+                        minPoolSize=mongo_min_pool_size,
+                    )
+        self._check_mongo()
+        return self._mongo_client
+
+    @property
+    def redis_client(self):
+        """
+        Get the Redis client backed by the shared connection pool.
+        """
+        self._ensure_process()
+        if self._redis_client is None:
+            with self._lock:
+                if self._redis_client is None:
+                    # Imported here so commands that never touch Redis do not pay for loading it.
+                    from redis import ConnectionPool, Redis
+
+                    self._redis_pool = ConnectionPool(
+                        host=self.redis_host,
+                        port=self.redis_port,
+                        db=0,
+                        max_connections=redis_max_connections,
+                        socket_connect_timeout=5,
+                        health_check_interval=int(self.health_check_interval),
+                    )
+                    self._redis_client = Redis(connection_pool=self._redis_pool)
+        self._check_redis()
+        return self._redis_client
+
+    @property
+    def fs(self):
+        """
+        Get the GridFS instance for the vault database.
+        """
+        self._ensure_process()
+        if self._fs is None:
+            with self._lock:
+                if self._fs is None:
+                    from gridfs import GridFS
+
+                    self._fs = GridFS(self.get_mongo_db("vault"), collection="files")
+        return self._fs
+
+    def _check_mongo(self):
+        """
+        Ping MongoDB if the last successful check is older than the interval.
+        """
+        now = time.monotonic()
+        if now - self._mongo_checked_at < self.health_check_interval:
+            return
         try:
-            self.mongo_client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
-            self.mongo_client.admin.command('ping')
-            self.fs = GridFS(self.get_mongo_db("vault"), collection="files")
-            print("MongoDB and GridFs connected successfully.")
+            self._mongo_client.admin.command('ping')
+            self._mongo_checked_at = now
         except errors.ConnectionFailure as e:
             print(f"MongoDB connection failed: {e}")
-            self.mongo_client = None
+
+    def _check_redis(self):
+        """
+        Ping Redis if the last successful check is older than the interval.
+        """
+        now = time.monotonic()
+        if now - self._redis_checked_at < self.health_check_interval:
+            return
+        from redis import exceptions as redis_exceptions
 
         try:
-            self.redis_client = Redis(host=redis_host, port=redis_port, db=0, socket_connect_timeout=5)
-            self.redis_client.ping()
-            print("Redis connected successfully.")
+            self._redis_client.ping()
+            self._redis_checked_at = now
         except redis_exceptions.ConnectionError as e:
             print(f"Redis connection failed: {e}")
-            self.redis_client = None
-            
-
 
     def get_mongo_db(self, db_name):
         """
         Get a MongoDB database instance.
-        
+
         :param db_name: Name of the database to connect to.
         :return: MongoDB database instance.
         """
@@ -54,14 +175,40 @@ class Database:
     def get_redis_client(self):
         """
         Get the Redis client instance.
-        
+
         :return: Redis client instance.
         """
         return self.redis_client
-    
+
+    def is_connected(self):
+        """
+        Check whether any client has been opened in this process.
+
+        :return: True if MongoDB or Redis has been connected, False otherwise.
+        """
+        return self._mongo_client is not None or self._redis_client is not None
+
     def close_connections(self):
         """
         Close the database connections.
+        Safe to call when nothing was ever opened; later access reconnects.
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                if self._mongo_client is not None:
+                    self._mongo_client.close()
+                if self._redis_client is not None:
+                    self._redis_client.close()
+                if self._redis_pool is not None:
+                    self._redis_pool.disconnect()
+            self._reset()
+
+    @classmethod
+    def close_all(cls):
+        """
+        Close the connections of every shared instance in this process.
         """
-        self.mongo_client.close()
-        self.redis_client.close()
+        with cls._instances_lock:
+            instances = list(cls._instances.values())
+        for instance in instances:
+            instance.close_connections()
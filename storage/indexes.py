@@ -0,0 +1,127 @@
+# Declared MongoDB indexes for the vault database and a query plan check against them.
+from pymongo import ASCENDING, IndexModel
+
+
+INDEXES = {
+    "users": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("username", ASCENDING)], unique=True),
+    ],
+    "files": [
+        IndexModel([("file_name", ASCENDING), ("file_id", ASCENDING)]),
+        # Also serves the (user, directory) prefix queries of listings and checksum lookups.
+        IndexModel([("user_id", ASCENDING), ("directory_name", ASCENDING), ("file_name", ASCENDING), ("file_id", ASCENDING)]),
+        IndexModel([("checksum", ASCENDING)]),
+    ],
+    "directories": [
+        IndexModel([("user_id", ASCENDING), ("directory_path", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING), ("parent_id", ASCENDING)]),
+    ],
+    "thumbnails.files": [
+        IndexModel([("metadata.source_id", ASCENDING), ("metadata.size", ASCENDING), ("contentType", ASCENDING)]),
+    ],
+}
+
+# Representative filters of every repository query, checked with explain().
+QUERIES = [
+    ("UserRepository.find_by_email", "users", {"email": ""}),
+    ("UserRepository.find_by_id", "users", {"id": ""}),
+    ("UserRepository.find_by_username", "users", {"username": ""}),
+    ("FileRepository.get_file", "files", {"file_name": ""}),
+    ("FileRepository.delete_file", "files", {"user_id": "", "directory_name": "root", "file_name": "", "file_id": ""}),
+    ("FileRepository.find_checksums", "files", {"user_id": "", "directory_name": {"$in": ["root"]}}),
+    ("FileRepository.dedup_report", "files", {"user_id": ""}),
+    ("FileRepository.register_blob", "blobs", {"_id": ""}),
+    ("DirectoryRepository.find_by_path", "directories", {"user_id": "", "directory_path": "root"}),
+    ("DirectoryRepository.list_children", "directories", {"user_id": "", "parent_id": ""}),
+    ("DirectoryRepository.list_subtree", "directories", {"user_id": "", "directory_path": {"$regex": "^root/a(/|$)"}}),
+    ("DirectoryRepository.subtree_usage", "files", {"user_id": "", "directory_name": {"$regex": "^root/a(/|$)"}}),
+    ("ThumbnailRepository.save_thumbnail", "thumbnails.files", {"metadata.source_id": "", "metadata.size": 0, "contentType": ""}),
+    ("ThumbnailRepository.find_thumbnail", "thumbnails.files", {"metadata.source_id": "", "metadata.size": 0}),
+    ("ThumbnailRepository.delete_thumbnails", "thumbnails.files", {"metadata.source_id": ""}),
+]
+
+
+def ensure_indexes(mongo_db):
+    """
+    Create every declared index that does not exist yet.
+    Index names are derived from their keys, so MongoDB treats indexes that
+    already exist as no-ops and this is safe to run on every start.
+
+    :param mongo_db: Database to index.
+    :return: Dictionary of collection name to the names of its declared indexes.
+    """
+    created = {}
+    for collection, indexes in INDEXES.items():
+        created[collection] = mongo_db[collection].create_indexes(indexes)
+    return created
+
+
+async def ensure_indexes_async(mongo_db):
+    """
+    Create every declared index using an async database handle.
+
+    :param mongo_db: AsyncDatabase handle to index.
+    :return: Dictionary of collection name to the names of its declared indexes.
+    """
+    created = {}
+    for collection, indexes in INDEXES.items():
+        created[collection] = await mongo_db[collection].create_indexes(indexes)
+    return created
+
+
+def plan_stages(plan):
+    """
+    Collect the stage names of a query plan tree.
+
+    :param plan: ``winningPlan`` document from explain().
+    :return: List of stage names, outermost first.
+    """
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for key in ("queryPlan", "inputStage"):
+            stages.extend(plan_stages(plan.get(key)))
+        for child in plan.get("inputStages", []):
+            stages.extend(plan_stages(child))
+    return stages
+
+
+def plan_indexes(plan):
+    """
+    Collect the names of the indexes used by a query plan tree.
+    """
+    names = []
+    if isinstance(plan, dict):
+        if plan.get("indexName"):
+            names.append(plan["indexName"])
+        for key in ("queryPlan", "inputStage"):
+            names.extend(plan_indexes(plan.get(key)))
+        for child in plan.get("inputStages", []):
+            names.extend(plan_indexes(child))
+    return names
+
+
+def check_query_plans(mongo_db, queries=QUERIES):
+    """
+    Explain every repository query and flag the ones that scan a whole collection.
+
+    :param mongo_db: Database to check.
+    :param queries: List of (name, collection, filter) tuples.
+    :return: List of dictionaries with the query name, collection, plan stages,
+             indexes used and whether it is a collection scan.
+    """
+    report = []
+    for name, collection, query in queries:
+        plan = mongo_db[collection].find(query).explain()["queryPlanner"]["winningPlan"]
+        stages = plan_stages(plan)
+        report.append({
+            "query": name,
+            "collection": collection,
+            "stages": stages,
+            "indexes": plan_indexes(plan),
+            "collscan": "COLLSCAN" in stages,
+        })
+    return report
@@ -0,0 +1,629 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dotenv import load_dotenv
+import base64
+import heapq
+import json
+import os
+import sqlite3
+import threading
+
+
+load_dotenv()
+metadata_backend = os.getenv("METADATA_BACKEND", "sqlite")
+# Resolved once, so the store keeps its files however the working directory changes later.
+metadata_db_path = os.path.abspath(os.getenv("METADATA_DB_PATH", "storage/metadata.db"))
+legacy_metadata_path = os.path.abspath(os.getenv("LEGACY_METADATA_PATH", "storage/metadata.json"))
+default_page_size = int(os.getenv("PAGE_SIZE", 100))
+max_page_size = int(os.getenv("MAX_PAGE_SIZE", 1000))
+
+# Sort keys accepted by listings, mapped to the metadata field they order by.
+SORT_FIELDS = {"name": "file_name", "size": "file_size", "created_at": "created_at"}
+
+
+class MetadataStore(ABC):
+    """
+    Abstract base class for file metadata backends.
+    Records are keyed by their record ID and looked up by file name.
+    Deduplicated uploads share a GridFS file ID, so it cannot key them; older
+    records without a record ID keep their file ID as key.
+    """
+
+    @staticmethod
+    def record_key(key, value):
+        """
+        Get the primary key for a metadata record.
+
+        :param key: Key passed by the caller.
+        :param value: Metadata dictionary.
+        :return: The record's ID, else its file ID, else the given key.
+        """
+        return str(value.get("record_id") or value.get("file_id") or key)
+
+    @abstractmethod
+    def put(self, key, value):
+        """
+        Insert or replace the metadata record for a file.
+        """
+        pass
+
+    @abstractmethod
+    def put_many(self, items):
+        """
+        Insert or replace several records in a single transaction.
+        """
+        pass
+
+    @abstractmethod
+    def get(self, file_name, user_id=None, visibility=None):
+        """
+        Get the metadata record for a file name or key.
+
+        :param file_name: File name or record key.
+        :param user_id: Only match records owned by this user.
+        :param visibility: Only match records with this visibility.
+        :return: Metadata dictionary, or None if nothing matches.
+        """
+        pass
+
+    @abstractmethod
+    def get_many(self, file_names, user_id=None):
+        """
+        Get the records for several file names or keys with one query.
+
+        :return: Dictionary of record key to metadata.
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, file_name, user_id=None):
+        """
+        Delete the metadata record for a file name or key, optionally scoped to an owner.
+
+        :return: The deleted metadata, or None if nothing matched.
+        """
+        pass
+
+    @abstractmethod
+    def delete_many(self, keys):
+        """
+        Delete several records by key in a single transaction.
+
+        :return: Number of deleted records.
+        """
+        pass
+
+    @abstractmethod
+    def find(self, user_id=None, directory_name=None, visibility=None, include_public=False):
+        """
+        Find records matching the given filters.
+
+        :param user_id: Owner to match.
+        :param directory_name: Directory to match.
+        :param visibility: Visibility to match.
+        :param include_public: Also match public records not owned by ``user_id``.
+        :return: Dictionary of record key to metadata.
+        """
+        pass
+
+    def find_page(self, user_id=None, directory_name=None, visibility=None, file_type=None,
+                  include_public=False, recursive=False, sort="created_at", descending=False,
+                  limit=default_page_size, cursor=None):
+        """
+        Get one page of records matching the given filters, in a stable order.
+        Pages are fetched by keyset: each query seeks past the last record of
+        the previous page on an index, so the cost of a page does not grow
+        with the number of records before it.
+
+        :param user_id: Owner to match.
+        :param directory_name: Directory to match.
+        :param visibility: Visibility to match.
+        :param file_type: File type to match, e.g. 'image'.
+        :param include_public: Also match public records not owned by ``user_id``.
+        :param recursive: Also match records in subdirectories of ``directory_name``.
+        :param sort: One of ``SORT_FIELDS``.
+        :param descending: Sort in descending order.
+        :param limit: Page size, capped at MAX_PAGE_SIZE.
+        :param cursor: Cursor returned with the previous page, or None for the first page.
+        :return: Tuple of an ordered dictionary of record key to metadata and the
+                 cursor of the next page (None on the last page).
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by '{sort}'. Use one of: {', '.join(SORT_FIELDS)}.")
+        limit = max(1, min(int(limit), max_page_size))
+        after = decode_cursor(cursor, sort, descending) if cursor else None
+        field = SORT_FIELDS[sort]
+        common = {"directory_name": directory_name, "file_type": file_type, "recursive": recursive}
+
+        if user_id and include_public and visibility is None:
+            branches = [{"user_id": user_id}, {"visibility": "public", "exclude_user_id": user_id}]
+        elif include_public and visibility in (None, "public"):
+            branches = [{"visibility": "public"}]
+        else:
+            branches = [{"user_id": user_id, "visibility": visibility}]
+
+        # Owned and public records are read from their own indexes and merged,
+        # so the OR of the two never forces a scan and sort of both sets.
+        pages = [self._seek({**common, **branch}, field, descending, after, limit + 1) for branch in branches]
+        records = list(heapq.merge(*pages, key=lambda record: (record[2], record[0]), reverse=descending))
+        records = records[:limit + 1]
+
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            key, _, value = records[-1]
+            next_cursor = encode_cursor(sort, descending, value, key)
+        return {key: value for key, value, _ in records}, next_cursor
+
+    @abstractmethod
+    def _seek(self, where, field, descending, after, limit):
+        """
+        Read up to ``limit`` records ordered by (``field``, key) past a position.
+
+        :param where: Filters: user_id, exclude_user_id, visibility, directory_name,
+                      file_type and recursive; None values do not filter.
+        :param field: Metadata field to order by.
+        :param descending: Order descending.
+        :param after: (value, key) of the last record already returned, or None.
+        :param limit: Maximum number of records.
+        :return: List of (key, metadata, sort value) tuples in order.
+        """
+        pass
+
+    @abstractmethod
+    def move_directory(self, user_id, old_path, new_path):
+        """
+        Re-home every record under a directory subtree to a new path.
+
+        :param user_id: Owner of the directory.
+        :param old_path: Materialised path of the directory being moved.
+        :param new_path: Materialised path it moves to.
+        :return: List of (key, file_name) pairs of the moved records.
+        """
+        pass
+
+    @abstractmethod
+    def count(self):
+        """
+        Count the stored records.
+        """
+        pass
+
+    def all(self):
+        """
+        Get every stored record.
+
+        :return: Dictionary of record key to metadata.
+        """
+        return self.find()
+
+
+class SQLiteMetadataStore(MetadataStore):
+    """
+    Metadata store backed by an embedded SQLite database in WAL mode.
+    Each thread gets its own connection; writes are single transactions.
+    """
+
+    def __init__(self, path=metadata_db_path):
+        """
+        Open the database and make sure the schema exists.
+
+        :param path: Path to the SQLite database file.
+        """
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS metadata (
+                key TEXT PRIMARY KEY,
+                file_name TEXT NOT NULL,
+                user_id TEXT,
+                directory_name TEXT,
+                visibility TEXT,
+                created_at TEXT,
+                data TEXT NOT NULL
+            );
+        """)
+        self._migrate()
+        self.connection.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_metadata_file_name ON metadata (file_name);
+            CREATE INDEX IF NOT EXISTS idx_metadata_user_id ON metadata (user_id);
+            CREATE INDEX IF NOT EXISTS idx_metadata_directory ON metadata (directory_name, user_id);
+            CREATE INDEX IF NOT EXISTS idx_metadata_visibility ON metadata (visibility);
+            CREATE INDEX IF NOT EXISTS idx_metadata_user_name ON metadata (user_id, file_name, key);
+            CREATE INDEX IF NOT EXISTS idx_metadata_user_size ON metadata (user_id, file_size, key);
+            CREATE INDEX IF NOT EXISTS idx_metadata_user_created ON metadata (user_id, created_at, key);
+            CREATE INDEX IF NOT EXISTS idx_metadata_public_name ON metadata (visibility, file_name, key);
+            CREATE INDEX IF NOT EXISTS idx_metadata_public_size ON metadata (visibility, file_size, key);
+            CREATE INDEX IF NOT EXISTS idx_metadata_public_created ON metadata (visibility, created_at, key);
+        """)
+
+    def _migrate(self):
+        """
+        Add the sortable columns to databases created before listings were paginated,
+        filling them in from the stored JSON.
+        """
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(metadata)")}
+        with self.transaction() as conn:
+            if "file_size" not in columns:
+                conn.execute("ALTER TABLE metadata ADD COLUMN file_size INTEGER NOT NULL DEFAULT 0")
+                conn.execute("UPDATE metadata SET file_size = COALESCE(json_extract(data, '$.file_size'), 0)")
+            if "type" not in columns:
+                conn.execute("ALTER TABLE metadata ADD COLUMN type TEXT")
+                conn.execute("UPDATE metadata SET type = json_extract(data, '$.type')")
+            conn.execute("UPDATE metadata SET created_at = '' WHERE created_at IS NULL")
+
+    @property
+    def connection(self):
+        """
+        Get the SQLite connection for the current thread.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run the enclosed statements in one write transaction.
+        """
+        conn = self.connection
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _row(key, value):
+        return (
+            key,
+            value.get("file_name"),
+            value.get("user_id"),
+            value.get("directory_name"),
+            value.get("visibility"),
+            value.get("created_at") or "",
+            value.get("file_size") or 0,
+            value.get("type"),
+            json.dumps(value),
+        )
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def put_many(self, items):
+        rows = [self._row(self.record_key(key, value), value) for key, value in items]
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO metadata "
+                "(key, file_name, user_id, directory_name, visibility, created_at, file_size, type, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def _select_one(self, file_name, user_id, visibility=None):
+        query = "SELECT key, data FROM metadata WHERE (file_name = ? OR key = ?)"
+        params = [file_name, file_name]
+        if user_id:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        if visibility:
+            query += " AND visibility = ?"
+            params.append(visibility)
+        # A name can match several records; always pick the same one.
+        return self.connection.execute(query + " ORDER BY key LIMIT 1", params).fetchone()
+
+    def get(self, file_name, user_id=None, visibility=None):
+        row = self._select_one(file_name, user_id, visibility)
+        return json.loads(row[1]) if row else None
+
+    def get_many(self, file_names, user_id=None):
+        file_names = list(file_names)
+        records = {}
+        # Stay well below SQLite's limit on bound parameters.
+        for start in range(0, len(file_names), 400):
+            chunk = file_names[start:start + 400]
+            marks = ", ".join("?" * len(chunk))
+            query = f"SELECT key, data FROM metadata WHERE (file_name IN ({marks}) OR key IN ({marks}))"
+            params = chunk + chunk
+            if user_id:
+                query += " AND user_id = ?"
+                params.append(user_id)
+            records.update({key: json.loads(data) for key, data in self.connection.execute(query, params)})
+        return records
+
+    def delete(self, file_name, user_id=None):
+        with self.transaction() as conn:
+            row = self._select_one(file_name, user_id)
+            if not row:
+                return None
+            conn.execute("DELETE FROM metadata WHERE key = ?", (row[0],))
+            return json.loads(row[1])
+
+    def delete_many(self, keys):
+        with self.transaction() as conn:
+            return conn.executemany("DELETE FROM metadata WHERE key = ?", [(key,) for key in keys]).rowcount
+
+    def find(self, user_id=None, directory_name=None, visibility=None, include_public=False):
+        clauses, params = [], []
+        if user_id and include_public:
+            clauses.append("(user_id = ? OR visibility = 'public')")
+            params.append(user_id)
+        elif user_id:
+            clauses.append("user_id = ?")
+            params.append(user_id)
+        elif include_public:
+            clauses.append("visibility = 'public'")
+        if directory_name is not None:
+            clauses.append("directory_name = ?")
+            params.append(directory_name)
+        if visibility is not None:
+            clauses.append("visibility = ?")
+            params.append(visibility)
+
+        query = "SELECT key, data FROM metadata"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        rows = self.connection.execute(query, params)
+        return {key: json.loads(data) for key, data in rows}
+
+    def _seek(self, where, field, descending, after, limit):
+        clauses, params = [], []
+        for column, param in (("user_id", "user_id"), ("visibility", "visibility"), ("type", "file_type")):
+            if where.get(param) is not None:
+                clauses.append(f"{column} = ?")
+                params.append(where[param])
+        if where.get("exclude_user_id"):
+            clauses.append("user_id IS NOT ?")
+            params.append(where["exclude_user_id"])
+        directory_name = where.get("directory_name")
+        if directory_name is not None and where.get("recursive"):
+            clauses.append("(directory_name = ? OR substr(directory_name, 1, ?) = ?)")
+            params.extend([directory_name, len(directory_name) + 1, f"{directory_name}/"])
+        elif directory_name is not None:
+            clauses.append("directory_name = ?")
+            params.append(directory_name)
+        operator, order = ("<", "DESC") if descending else (">", "ASC")
+        if after:
+            clauses.append(f"({field} {operator} ? OR ({field} = ? AND key {operator} ?))")
+            params.extend([after[0], after[0], after[1]])
+
+        query = f"SELECT key, data, {field} FROM metadata"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += f" ORDER BY {field} {order}, key {order} LIMIT ?"
+        rows = self.connection.execute(query, params + [limit])
+        return [(key, json.loads(data), value) for key, data, value in rows]
+
+    def move_directory(self, user_id, old_path, new_path):
+        subtree = "user_id = ? AND (directory_name = ? OR substr(directory_name, 1, ?) = ?)"
+        params = (user_id, old_path, len(old_path) + 1, f"{old_path}/")
+        with self.transaction() as conn:
+            moved = conn.execute(f"SELECT key, file_name FROM metadata WHERE {subtree}", params).fetchall()
+            conn.execute(
+                "UPDATE metadata SET "
+                "directory_name = ? || substr(directory_name, ?), "
+                "data = json_set(data, "
+                "'$.directory_name', ? || substr(directory_name, ?), "
+                "'$.file_path', ? || substr(json_extract(data, '$.file_path'), ?)) "
+                f"WHERE {subtree}",
+                (new_path, len(old_path) + 1) * 3 + params,
+            )
+        return moved
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM metadata").fetchone()[0]
+
+
+class MongoMetadataStore(MetadataStore):
+    """
+    Metadata store backed by the ``metadata`` collection of the vault database.
+    """
+
+    def __init__(self, collection=None):
+        """
+        Bind to the metadata collection and make sure its indexes exist.
+
+        :param collection: Collection to use; defaults to ``vault.metadata``.
+        """
+        if collection is None:
+            from storage.database import Database
+            collection = Database().get_mongo_db("vault").metadata
+        self.collection = collection
+        self.collection.create_index("file_name")
+        self.collection.create_index("user_id")
+        self.collection.create_index([("directory_name", 1), ("user_id", 1)])
+        self.collection.create_index("visibility")
+        for field in SORT_FIELDS.values():
+            self.collection.create_index([("user_id", 1), (field, 1), ("_id", 1)])
+            self.collection.create_index([("visibility", 1), (field, 1), ("_id", 1)])
+
+    @staticmethod
+    def _strip(document):
+        if document:
+            document.pop("_id", None)
+        return document
+
+    def _match(self, file_name, user_id, visibility=None):
+        query = {"$or": [{"file_name": file_name}, {"_id": file_name}]}
+        if user_id:
+            query["user_id"] = user_id
+        if visibility:
+            query["visibility"] = visibility
+        return query
+
+    def put(self, key, value):
+        key = self.record_key(key, value)
+        self.collection.replace_one({"_id": key}, {**value, "_id": key}, upsert=True)
+
+    def put_many(self, items):
+        from pymongo import ReplaceOne
+
+        operations = []
+        for key, value in items:
+            key = self.record_key(key, value)
+            operations.append(ReplaceOne({"_id": key}, {**value, "_id": key}, upsert=True))
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+
+    def get(self, file_name, user_id=None, visibility=None):
+        return self._strip(self.collection.find_one(self._match(file_name, user_id, visibility), sort=[("_id", 1)]))
+
+    def get_many(self, file_names, user_id=None):
+        file_names = list(file_names)
+        query = {"$or": [{"file_name": {"$in": file_names}}, {"_id": {"$in": file_names}}]}
+        if user_id:
+            query["user_id"] = user_id
+        return {str(document.pop("_id")): document for document in self.collection.find(query)}
+
+    def delete(self, file_name, user_id=None):
+        return self._strip(self.collection.find_one_and_delete(self._match(file_name, user_id), sort=[("_id", 1)]))
+
+    def delete_many(self, keys):
+        return self.collection.delete_many({"_id": {"$in": list(keys)}}).deleted_count
+
+    def find(self, user_id=None, directory_name=None, visibility=None, include_public=False):
+        query = {}
+        if user_id and include_public:
+            query["$or"] = [{"user_id": user_id}, {"visibility": "public"}]
+        elif user_id:
+            query["user_id"] = user_id
+        elif include_public:
+            query["visibility"] = "public"
+        if directory_name is not None:
+            query["directory_name"] = directory_name
+        if visibility is not None:
+            query["visibility"] = visibility
+        return {str(document.pop("_id")): document for document in self.collection.find(query)}
+
+    def _seek(self, where, field, descending, after, limit):
+        import re
+
+        query = {}
+        for key, param in (("user_id", "user_id"), ("visibility", "visibility"), ("type", "file_type")):
+            if where.get(param) is not None:
+                query[key] = where[param]
+        if where.get("exclude_user_id"):
+            query.setdefault("user_id", {"$ne": where["exclude_user_id"]})
+        directory_name = where.get("directory_name")
+        if directory_name is not None and where.get("recursive"):
+            query["directory_name"] = {"$regex": f"^{re.escape(directory_name)}(/|$)"}
+        elif directory_name is not None:
+            query["directory_name"] = directory_name
+        operator, direction = ("$lt", -1) if descending else ("$gt", 1)
+        if after:
+            query["$or"] = [{field: {operator: after[0]}}, {field: after[0], "_id": {operator: after[1]}}]
+
+        documents = self.collection.find(query).sort([(field, direction), ("_id", direction)]).limit(limit)
+        return [(str(document.pop("_id")), document, document.get(field)) for document in documents]
+
+    def move_directory(self, user_id, old_path, new_path):
+        import re
+
+        query = {"user_id": user_id, "directory_name": {"$regex": f"^{re.escape(old_path)}(/|$)"}}
+        moved = [(str(doc["_id"]), doc.get("file_name")) for doc in self.collection.find(query, {"file_name": 1})]
+        self.collection.update_many(query, [{"$set": {
+            "directory_name": replace_path_prefix("$directory_name", old_path, new_path),
+            "file_path": replace_path_prefix("$file_path", old_path, new_path),
+        }}])
+        return moved
+
+    def count(self):
+        return self.collection.estimated_document_count()
+
+
+def replace_path_prefix(field, old_path, new_path):
+    """
+    Build an aggregation expression swapping the leading ``old_path`` of a
+    path field for ``new_path``; used in pipeline updates that move subtrees.
+
+    :param field: Field reference, e.g. ``"$directory_path"``.
+    :return: Aggregation expression.
+    """
+    return {"$concat": [new_path, {"$substrCP": [field, len(old_path), {"$strLenCP": field}]}]}
+
+
+def encode_cursor(sort, descending, value, key):
+    """
+    Build the opaque cursor pointing just past a record.
+
+    :param sort: Sort key the page was ordered by.
+    :param descending: Whether the page was in descending order.
+    :param value: Sort value of the last record on the page.
+    :param key: Key of the last record on the page.
+    :return: URL-safe cursor string.
+    """
+    payload = json.dumps([sort, bool(descending), value, key], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor, sort, descending):
+    """
+    Read a cursor built by ``encode_cursor``.
+
+    :return: Tuple of the last sort value and key.
+    :raises ValueError: If the cursor is malformed or was made for another order.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, cursor_descending, value, key = json.loads(payload)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor.")
+    if cursor_sort != sort or cursor_descending != bool(descending):
+        raise ValueError("Cursor does not match the requested sort order.")
+    return value, key
+
+
+def migrate_json_metadata(store, json_path=legacy_metadata_path):
+    """
+    Import records from the legacy metadata JSON file into a store.
+    The JSON file is renamed to ``<name>.migrated`` so the import runs once.
+
+    :param store: Metadata store to import into.
+    :param json_path: Path to the legacy metadata JSON file.
+    :return: Number of imported records.
+    """
+    if not os.path.exists(json_path):
+        return 0
+    try:
+        with open(json_path, 'r') as file:
+            data = json.load(file)
+        store.put_many(data.items())
+        os.replace(json_path, f"{json_path}.migrated")
+        return len(data)
+    except Exception as e:
+        raise ValueError(f"Error migrating metadata file '{json_path}': {str(e)}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_metadata_store():
+    """
+    Get the process-wide metadata store selected by ``METADATA_BACKEND``.
+    Legacy JSON metadata is migrated the first time the store is opened.
+
+    :return: MetadataStore instance.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if metadata_backend == "mongo":
+                    store = MongoMetadataStore()
+                elif metadata_backend == "sqlite":
+                    store = SQLiteMetadataStore()
+                else:
+                    raise ValueError(f"Unknown metadata backend: {metadata_backend}")
+                migrate_json_metadata(store)
+                _store = store
+    return _store
@@ -1,5 +1,6 @@
 # Create basic database models for MongoDB
-from pydantic import BaseModel, Field, Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from uuid import uuid4
 
 
@@ -43,6 +44,7 @@ class FileModel(BaseModel):
     visibility: str = Field(default='private', description="Visibility of the file (private/public)")
     type: str = Field(default='file', description="Type of the file")
     directory_name: str = Field(default=None, description="Name of the directory where the file is stored")
+    checksum: Optional[str] = Field(default=None, description="SHA-256 checksum of the file content")
 
     def to_dict(self):
         """
@@ -57,7 +59,8 @@ class FileModel(BaseModel):
             "created_at": self.created_at,
             "visibility": self.visibility,
             "type": self.type,
-            "directory_name": self.directory_name
+            "directory_name": self.directory_name,
+            "checksum": self.checksum
         }
 
 
@@ -73,9 +76,11 @@ class FileMetadata(BaseModel):
     user_id: str = Field(..., description="ID of the user who uploaded the file")
     file_id: str = Field(..., description="File ID from GridFS")
     visibility: str = Field(default='private', description="Visibility of the file (private/public)")
-    created_at: str = Field(..., description="Creation timestamp of the file"),
+    created_at: str = Field(..., description="Creation timestamp of the file")
     type: str = Field(default='file', description="Type of the file")
     directory_name: str = Field(default=None, description="Name of the directory where the file is stored")
+    checksum: Optional[str] = Field(default=None, description="SHA-256 checksum of the file content")
+    record_id: str = Field(default_factory=lambda: str(uuid4()), description="Key of the metadata record")
 
     def to_dict(self):
         """
@@ -85,13 +90,15 @@ class FileMetadata(BaseModel):
         return {
             "file_name": self.file_name,
             "file_size": self.file_size,
-            "file_path": self.file_path,
+            "file_path": self.path,
             "user_id": self.user_id,
             "file_id": self.file_id,
             "visibility": self.visibility,
             "created_at": self.created_at,
             "type": self.type,
-            "directory_name": self.directory_name
+            "directory_name": self.directory_name,
+            "checksum": self.checksum,
+            "record_id": self.record_id
         }
     
 class FolderModel(BaseModel):
@@ -103,8 +110,9 @@ class FolderModel(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid4()), description="Unique identifier for the folder")
     user_id: str = Field(..., description="ID of the user who created the folder")
     folder_name: str = Field(..., description="Name of the folder")
-    parent_id: str = Field(default=None, description="ID of the parent folder (if any)")
-    directory_path: str = Field(..., description="Path to the folder in the storage system")
+    parent_id: Optional[str] = Field(default=None, description="ID of the parent folder (if any)")
+    directory_path: str = Field(..., description="Materialised path of the folder, e.g. root/photos/2024")
+    depth: int = Field(default=0, description="Number of ancestors of the folder (0 for root)")
     created_at: str = Field(..., description="Creation timestamp of the folder")
     visibility: str = Field(default='private', description="Visibility of the folder (private/public)")
     
@@ -119,6 +127,7 @@ class FolderModel(BaseModel):
             "folder_name": self.folder_name,
             "parent_id": self.parent_id,
             "directory_path": self.directory_path,
+            "depth": self.depth,
             "created_at": self.created_at,
             "visibility": self.visibility
         }
@@ -166,6 +175,69 @@ class LoginModel(BaseModel):
         }
 
 
+class SessionModel(BaseModel):
+    """
+    User session model.
+    Represents a logged in session and the token that identifies it.
+    """
+
+    token: str = Field(..., description="Opaque session token")
+    user: UserModel = Field(..., description="User the session belongs to")
+    expires_in: int = Field(..., description="Seconds of inactivity before the session expires")
+
+    def to_dict(self):
+        """
+        Convert the session model to a dictionary, without the user's password.
+        :return: Dictionary representation of the session model.
+        """
+        user_data = self.user.to_dict()
+        del user_data['password']
+        return {
+            "token": self.token,
+            "user": user_data,
+            "expires_in": self.expires_in
+        }
+
+
+class RefreshModel(BaseModel):
+    """
+    Token refresh model.
+    Represents the data required to renew an access token.
+    """
+
+    refresh_token: str = Field(..., description="Refresh token issued at login")
+
+
+class TokenModel(BaseModel):
+    """
+    Signed token pair model.
+    Represents the access and refresh tokens issued in stateless auth mode.
+    """
+
+    access_token: str = Field(..., description="Short-lived signed access token")
+    refresh_token: str = Field(..., description="Signed token used to obtain a new access token")
+    token_type: str = Field("bearer", description="Authorization scheme of the access token")
+    expires_in: int = Field(..., description="Lifetime of the access token in seconds")
+    user: Optional[UserModel] = Field(None, description="User the tokens were issued to")
+
+    def to_dict(self):
+        """
+        Convert the token model to a dictionary, without the user's password.
+        :return: Dictionary representation of the token model.
+        """
+        token_data = {
+            "access_token": self.access_token,
+            "refresh_token": self.refresh_token,
+            "token_type": self.token_type,
+            "expires_in": self.expires_in
+        }
+        if self.user:
+            user_data = self.user.to_dict()
+            del user_data['password']
+            token_data["user"] = user_data
+        return token_data
+
+
 class CreateFileOrFolderModel(BaseModel):
     """
     Model for creating a file or folder.
@@ -173,11 +245,11 @@ class CreateFileOrFolderModel(BaseModel):
     """
 
     name: str = Field(..., description="Name of the file or folder")
-    data: str = Optional(Field(default=None, description="Data to be stored in the file (if applicable)"))
+    data: Optional[str] = Field(default=None, description="Data to be stored in the file (if applicable)")
     type: str = Field(..., description="Type of the item (file/folder)")
     parent_name: str = Field(default=None, description="Name of the parent folder (if any)")
     visibility: str = Field(default='private', description="Visibility of the item (private/public)")
-    directory_name: str = Optional(Field(default=None, description="Name of the directory where the item should be stored"))
+    directory_name: Optional[str] = Field(default=None, description="Name of the directory where the item should be stored")
 
     def to_dict(self):
         """
@@ -216,4 +288,15 @@ class CreateFileOrFolderModel(BaseModel):
             "parent_name": self.parent_name,
             "directory_name": self.directory_name,
             "visibility": self.visibility
-        }
\ No newline at end of file
+        }
+
+
+class BatchFilesModel(BaseModel):
+    """
+    Model for bulk file operations.
+    Selects files by exact name or ID, by glob pattern and/or by directory.
+    """
+
+    files: List[str] = Field(default_factory=list, description="File names, file IDs or glob patterns")
+    directory_name: Optional[str] = Field(default=None, description="Directory to select files from")
+    recursive: bool = Field(default=False, description="Include subdirectories of the directory")
@@ -1,59 +1,76 @@
 from utils.celery import app
-from PIL import Image
+from services.thumbnail_service import ThumbnailService
+from repositories.thumbnail_repository import ThumbnailRepository
+from bson import ObjectId
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import os
-import subprocess
+
+THUMBNAIL_BATCH_WORKERS = int(os.getenv("THUMBNAIL_BATCH_WORKERS", os.cpu_count() or 1))
+
 
 @app.task
-def generate_thumbnail(data, file_name):
+def generate_thumbnail(file_id, file_name):
+    """
+    Generate every configured thumbnail size for a file stored in GridFS.
+    Only the file ID travels through the broker; the worker streams the
+    source from GridFS and stores the results back keyed by that ID.
+    
+    :param file_id: GridFS ID of the source file.
+    :param file_name: Name of the file, used to pick the decoder and output format.
+    """
+    try:
+        count = ThumbnailService().generate(file_id, file_name)
+    except Exception as e:
+        return f"Error generating thumbnail for {file_name}: {str(e)}"
+    return f"{count} thumbnails for {file_name} generated successfully."
+
+
+def generate_item(file_id, file_name):
     """
-    Generate a thumbnail for the given file.
+    Generate thumbnails for one file inside a batch pool process.
+    Each pool process keeps its own Database pool across items.
     
-    :param file_path: Path to the file for which the thumbnail is to be generated.
+    :param file_id: GridFS ID of the source file.
     :param file_name: Name of the file.
+    :return: Per-item status dictionary.
     """
-    thumbnails_path = 'storage/thumbnails/'
-    os.makedirs(thumbnails_path, exist_ok=True)
-    file_path = f"{thumbnails_path}{file_name}"
-    with open(file_path, 'wb') as f:
-        f.write(data)
-
-    file_extension = os.path.splitext(file_name)[1].lower()
-    base_name = os.path.splitext(file_name)[0]
-
-    if file_extension in ['.jpg', '.jpeg', '.png', '.gif']:
-        try:
-            image = Image.open(file_path)
-            image.thumbnail((128, 128))
-
-            if file_extension in ['.jpg', '.jpeg']:
-                thumbnail_path = f"{thumbnails_path}{base_name}_thumbnail.jpg"
-                if image.mode in ['RGBA', 'LA']:
-                    background = Image.new("RGB", image.size, (255, 255, 255))
-                    background.paste(image, mask=image.split()[-1])
-                    image = background
-                else:
-                    image = image.convert("RGB")
-                image.save(thumbnail_path, "JPEG")
-
-            elif file_extension == '.png':
-                thumbnail_path = f"{thumbnails_path}{base_name}_thumbnail.png"
-                image.save(thumbnail_path, "PNG")
-
-            elif file_extension == '.gif':
-                thumbnail_path = f"{thumbnails_path}{base_name}_thumbnail.gif"
-                image.save(thumbnail_path, "GIF")
-
-        except Exception as e:
-            return f"Error generating thumbnail for {file_name}: {str(e)}"
-
-    else:
-        try:
-            thumbnail_path = f"{thumbnails_path}{base_name}_thumbnail.jpg"
-            subprocess.run([
-                'ffmpeg', '-i', file_path, '-ss', '00:00:01.000',
-                '-vframes', '1', '-s', '128x128', thumbnail_path
-            ], check=True, capture_output=True)
-        except subprocess.CalledProcessError as e:
-            return f"Error generating thumbnail for {file_name}: {e.stderr.decode()}"
-
-    return f"Thumbnail for {file_name} generated successfully."
+    try:
+        count = ThumbnailService().generate(file_id, file_name)
+        return {"file_id": file_id, "file_name": file_name, "status": "ok", "thumbnails": count}
+    except Exception as e:
+        return {"file_id": file_id, "file_name": file_name, "status": "error", "error": str(e)}
+
+
+@app.task(bind=True)
+def generate_thumbnails_batch(self, file_ids, workers=None):
+    """
+    Generate thumbnails for many files in one task using a process pool.
+    Meant for bulk imports; route it to a worker started with
+    ``--pool threads`` or ``--pool solo`` because prefork children are
+    daemonic and cannot start their own processes.
+    
+    :param file_ids: GridFS IDs of the source files.
+    :param workers: Number of pool processes; defaults to THUMBNAIL_BATCH_WORKERS.
+    :return: List of per-item status dictionaries.
+    """
+    names = ThumbnailRepository().get_source_names(file_ids)
+    results = [
+        {
+            "file_id": file_id,
+            "status": "error",
+            "error": "File not found." if ObjectId.is_valid(file_id) else "Invalid file ID.",
+        }
+        for file_id in file_ids if file_id not in names
+    ]
+    pending = {file_id: name for file_id, name in names.items() if ThumbnailService.supports(name)}
+    results += [
+        {"file_id": file_id, "file_name": name, "status": "skipped", "error": "Unsupported file type."}
+        for file_id, name in names.items() if file_id not in pending
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers or THUMBNAIL_BATCH_WORKERS) as pool:
+        futures = [pool.submit(generate_item, file_id, name) for file_id, name in pending.items()]
+        for done, future in enumerate(as_completed(futures), start=1):
+            results.append(future.result())
+            self.update_state(state='PROGRESS', meta={"done": done, "total": len(futures)})
+    return results
@@ -0,0 +1,250 @@
+# In-process LRU/TTL cache with an optional shared Redis tier.
+from collections import OrderedDict
+import json
+import threading
+import time
+
+
+_MISSING = object()
+
+# Named process-wide caches, reported by the metrics exporter.
+caches = {}
+
+
+def register_cache(name, cache):
+    """
+    Make a cache's counters visible to the metrics exporter.
+
+    :param name: Name to report the cache under.
+    :param cache: TTLCache or TieredCache.
+    :return: The cache.
+    """
+    caches[name] = cache
+    return cache
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a fixed time-to-live.
+    Keeps hit/miss counters so the cache can be sized from real traffic.
+    """
+
+    def __init__(self, max_size=1024, ttl=60):
+        """
+        :param max_size: Maximum number of entries kept before evicting the least recently used.
+        :param ttl: Seconds an entry stays valid.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every delete, so fills read before one can be refused.
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """
+        Get a cached value, counting the lookup as a hit or a miss.
+
+        :param key: Cache key.
+        :param default: Value returned when the key is absent or expired.
+        :return: Cached value or ``default``.
+        """
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not _MISSING:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, generation=None):
+        """
+        Store a value, evicting the least recently used entry when full.
+
+        :param generation: ``generation`` seen before the value was read; the value
+                           is dropped if anything was deleted since.
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        """
+        Remove a key if present.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self.generation += 1
+
+    def clear(self):
+        """
+        Remove every entry.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        """
+        Get the cache counters.
+
+        :return: Dictionary with hits, misses, evictions, size and hit ratio.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Store a value only if the key's version is still the one the reader saw.
+_SET_IF_VERSION = """
+if (redis.call('GET', KEYS[2]) or '0') == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+"""
+
+
+class TieredCache:
+    """
+    Two-level cache: a local TTLCache in front of an optional Redis tier.
+    Values must be JSON-serialisable to be stored in Redis.
+
+    Invalidation bumps a version per key. Readers that fill the cache from
+    the backing store take a ``version`` first and pass it to ``set``, so a
+    value read before a concurrent write and invalidation is never cached.
+    """
+
+    def __init__(self, namespace, max_size=1024, ttl=60, redis_client=None, redis_ttl=None):
+        """
+        :param namespace: Prefix for Redis keys.
+        :param max_size: Size of the local tier.
+        :param ttl: Time-to-live of the local tier in seconds.
+        :param redis_client: Redis client for the shared tier, or None to disable it.
+        :param redis_ttl: Time-to-live of the Redis tier; defaults to ``ttl``.
+        """
+        self.namespace = namespace
+        self.local = TTLCache(max_size=max_size, ttl=ttl)
+        self.redis = redis_client
+        self.redis_ttl = redis_ttl or ttl
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self._set_if_version = None
+
+    def _redis_key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def _version_key(self, key):
+        return f"{self.namespace}:version:{key}"
+
+    def version(self, key):
+        """
+        Take the version of a key before reading its value from the backing store.
+
+        :return: Opaque version to pass to ``set``.
+        """
+        redis_version = None
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(self._version_key(key))
+                redis_version = raw.decode('utf-8') if isinstance(raw, bytes) else str(raw or 0)
+            except Exception:
+                pass
+        return self.local.generation, redis_version
+
+    def get(self, key):
+        """
+        Get a value from the local tier, then from Redis.
+
+        :return: Cached value or None.
+        """
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.get(self._redis_key(key))
+        except Exception:
+            return None
+        if raw is None:
+            self.redis_misses += 1
+            return None
+        self.redis_hits += 1
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+
+    def set(self, key, value, version=None):
+        """
+        Store a value in both tiers.
+
+        :param version: Result of ``version`` taken before the value was read; each
+                        tier skips the value if the key was invalidated since.
+        """
+        if version is None:
+            self.local.set(key, value)
+            if self.redis is not None:
+                try:
+                    self.redis.set(self._redis_key(key), json.dumps(value), ex=int(self.redis_ttl))
+                except Exception:
+                    pass
+            return
+
+        generation, redis_version = version
+        self.local.set(key, value, generation)
+        if self.redis is not None and redis_version is not None:
+            try:
+                if self._set_if_version is None:
+                    self._set_if_version = self.redis.register_script(_SET_IF_VERSION)
+                self._set_if_version(
+                    keys=[self._redis_key(key), self._version_key(key)],
+                    args=[redis_version, json.dumps(value), int(self.redis_ttl)],
+                )
+            except Exception:
+                pass
+
+    def invalidate(self, *keys):
+        """
+        Drop keys from both tiers and bump their versions.
+        Call it after the write to the backing store has committed.
+        """
+        for key in keys:
+            self.local.delete(key)
+        if self.redis is not None and keys:
+            try:
+                pipeline = self.redis.pipeline(transaction=False)
+                for key in keys:
+                    pipeline.incr(self._version_key(key))
+                    # Versions only have to outlive the values they guard.
+                    pipeline.expire(self._version_key(key), int(self.redis_ttl))
+                pipeline.delete(*[self._redis_key(key) for key in keys])
+                pipeline.execute()
+            except Exception:
+                pass
+
+    def stats(self):
+        """
+        Get the counters of both tiers.
+
+        :return: Dictionary with local stats plus Redis hits and misses.
+        """
+        stats = self.local.stats()
+        stats["redis_hits"] = self.redis_hits
+        stats["redis_misses"] = self.redis_misses
+        return stats
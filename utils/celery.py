@@ -1,4 +1,5 @@
 from celery import Celery
+from utils.metrics import instrument_celery
 import os
 
 os.environ.setdefault('CELERY_CONFIG', 'vault')
@@ -6,4 +7,5 @@ os.environ.setdefault('CELERY_CONFIG', 'vault')
 app = Celery('vault')
 
 app.config_from_object('utils.celeryconfig')
-app.autodiscover_tasks(['tasks'])
\ No newline at end of file
+app.autodiscover_tasks(['tasks'])
+instrument_celery(app)
\ No newline at end of file
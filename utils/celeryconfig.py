@@ -6,4 +6,7 @@ accept_content = ['json']
 result_serializer = 'json'
 enable_utc = True
 worker_hijack_root_logger = False
-imports = ('tasks.thumbnail',)
\ No newline at end of file
+imports = ('tasks.thumbnail',)
+task_routes = {
+    'tasks.thumbnail.generate_thumbnails_batch': {'queue': 'thumbnails-batch'},
+}
\ No newline at end of file
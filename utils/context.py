@@ -0,0 +1,68 @@
+# Per-request (API) or per-command (CLI) state shared across the service layers.
+import os
+
+_UNRESOLVED = object()
+# Users allowed to see vault-wide reports, as a comma-separated list of user IDs.
+admin_user_ids = frozenset(user_id.strip() for user_id in os.getenv("ADMIN_USER_IDS", "").split(",") if user_id.strip())
+
+
+class RequestContext:
+    """
+    Identity of the caller for one API request or CLI command.
+    The session token is resolved to a user ID at most once, however many
+    services and repository calls the request goes through.
+    """
+
+    def __init__(self, token=None, user_id=_UNRESOLVED, resolver=None, cwd=None):
+        """
+        :param token: Session token of the caller, or None for anonymous callers.
+        :param user_id: Already resolved user ID; skips the resolver.
+        :param resolver: Callable mapping a token to a user ID, used on first access.
+        :param cwd: Working directory of the caller, when it is not this process's own.
+        """
+        self.token = token
+        self._user_id = user_id
+        self._resolver = resolver
+        self.cwd = cwd
+
+    @property
+    def user_id(self):
+        """
+        ID of the authenticated user, or None for anonymous callers.
+        """
+        if self._user_id is _UNRESOLVED:
+            self._user_id = self._resolver(self.token) if self.token and self._resolver else None
+        return self._user_id
+
+    @property
+    def is_authenticated(self):
+        return self.user_id is not None
+
+    @property
+    def is_admin(self):
+        """
+        Whether the caller is listed in ADMIN_USER_IDS.
+        """
+        return self.user_id is not None and self.user_id in admin_user_ids
+
+    def require_user(self, action):
+        """
+        Get the user ID, failing if the caller is not logged in.
+
+        :param action: What the caller tried to do, for the error message.
+        :return: User ID.
+        """
+        if not self.user_id:
+            raise ValueError(f"No user session found. Cannot {action}.")
+        return self.user_id
+
+    def local_path(self, path):
+        """
+        Resolve a local path given by the caller against their working directory.
+
+        :param path: Path as typed by the caller.
+        :return: The path, made absolute when the caller runs in another directory.
+        """
+        if self.cwd is None:
+            return path
+        return os.path.join(self.cwd, os.path.expanduser(path))
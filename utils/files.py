@@ -0,0 +1,58 @@
+# Local filesystem helpers for bulk transfers.
+import glob
+import hashlib
+import os
+
+
+hash_chunk_size = int(os.getenv("HASH_CHUNK_SIZE", 1024 * 1024))
+
+
+def hash_file(path, chunk_size=hash_chunk_size):
+    """
+    Compute the SHA-256 checksum of a local file without loading it into memory.
+
+    :param path: Path of the file.
+    :param chunk_size: Number of bytes to read per iteration.
+    :return: Hex digest.
+    """
+    checksum = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def walk_sources(sources):
+    """
+    Expand files, directories and glob patterns into the files they contain.
+    Directories are walked recursively and keep their own name, so uploading
+    ``photos`` mirrors ``photos/2024/a.jpg`` as ``photos/2024``.
+
+    :param sources: Paths or glob patterns (``**`` matches any depth).
+    :return: Generator of (file path, relative directory) tuples; the relative
+             directory uses '/' and is empty for files matched directly.
+    """
+    seen = set()
+    for source in sources:
+        matches = sorted(glob.glob(source, recursive=True)) if glob.has_magic(source) else [source]
+        if not matches:
+            raise ValueError(f"No files match '{source}'.")
+        for match in matches:
+            if os.path.isdir(match):
+                root = os.path.normpath(match)
+                base = os.path.basename(os.path.abspath(root))
+                for directory, subdirectories, files in os.walk(root):
+                    subdirectories.sort()
+                    relative = os.path.relpath(directory, root)
+                    target = base if relative == os.curdir else f"{base}/{relative.replace(os.sep, '/')}"
+                    for name in sorted(files):
+                        path = os.path.join(directory, name)
+                        if os.path.isfile(path) and os.path.realpath(path) not in seen:
+                            seen.add(os.path.realpath(path))
+                            yield path, target
+            elif os.path.isfile(match):
+                if os.path.realpath(match) not in seen:
+                    seen.add(os.path.realpath(match))
+                    yield match, ''
+            else:
+                raise ValueError(f"File does not exist: {match}")
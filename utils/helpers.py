@@ -1,61 +1,271 @@
 
-# Take a json file, convert it to a python dictionary, add a new key-value pair, and convert it back to json format.
+# Thin wrappers around the configured metadata store (see storage/metadata_store.py),
+# with a read-through cache in front of single-file lookups.
 import json
 import os
+from storage.metadata_store import get_metadata_store
+from utils.cache import TieredCache, register_cache
+
+
+_metadata_cache = None
+
+
+def get_metadata_cache():
+    """
+    Get the process-wide metadata cache.
+    The Redis tier is enabled when METADATA_CACHE_REDIS is set.
+    
+    :return: TieredCache instance.
+    """
+    global _metadata_cache
+    if _metadata_cache is None:
+        redis_client = None
+        if os.getenv("METADATA_CACHE_REDIS", "").lower() in ("1", "true", "yes"):
+            from storage.database import Database
+            redis_client = Database().get_redis_client()
+        _metadata_cache = register_cache("metadata", TieredCache(
+            "metadata",
+            max_size=int(os.getenv("METADATA_CACHE_SIZE", 4096)),
+            ttl=float(os.getenv("METADATA_CACHE_TTL", 5)),
+            redis_client=redis_client,
+            redis_ttl=float(os.getenv("METADATA_CACHE_REDIS_TTL", 300)),
+        ))
+    return _metadata_cache
+
+def metadata_cache_stats():
+    """
+    Get hit/miss counters of the metadata cache.
+    
+    :return: Dictionary of cache statistics.
+    """
+    return get_metadata_cache().stats()
+
+def metadata_cache_key(file_name, user_id=None):
+    """
+    Get the cache key of a metadata lookup.
+    Lookups are cached per owner, and public lookups separately, so one
+    user's record is never served for another user's file of the same name.
+    
+    :param file_name: File name or record key.
+    :param user_id: Owner the lookup is scoped to, or None for public records.
+    :return: Cache key.
+    """
+    return f"user:{user_id}:{file_name}" if user_id else f"public:{file_name}"
+
+def invalidate_metadata(*records):
+    """
+    Drop every cached lookup that may return the given records.
+    
+    :param records: (record key, metadata) pairs.
+    """
+    keys = set()
+    for key, value in records:
+        for name in (key, value.get("file_name"), value.get("file_id")):
+            if name:
+                keys.update((metadata_cache_key(name, value.get("user_id")), metadata_cache_key(name)))
+    get_metadata_cache().invalidate(*keys)
 
 
 def create_metadata(file_id, value):
     """
-    Update a JSON file by adding a new key-value pair.
+    Insert or replace the metadata record for a file.
     
-    :param file_path: Path to the JSON file.
-    :param file_name: File name to add or update in the JSON file.
-    :param value: Value to set for the specified key.
-    :return: Updated JSON data as a string.
+    :param file_id: GridFS ID of the file (used as key when the value has none).
+    :param value: Metadata dictionary to store.
+    :return: Stored metadata as a JSON string.
     """
-    file_path = 'storage/metadata.json'
     try:
-        with open(file_path, 'r') as file:
-            data = json.load(file)
-        
-        data[str(file_id)] = value
-        
-        with open(file_path, 'w') as file:
-            json.dump(data, file, indent=4)
-        
-        return json.dumps(data, indent=4)
+        get_metadata_store().put(file_id, value)
+        invalidate_metadata((file_id, value))
+        return json.dumps(value, indent=4)
     
     except Exception as e:
-        raise ValueError(f"Error updating the metadata file: {str(e)}")
+        raise ValueError(f"Error updating the metadata store: {str(e)}")
     
 def list_metadata():
     """
-    List all key-value pairs in the metadata JSON file.
+    List all records in the metadata store.
     
-    :return: Dictionary containing all key-value pairs in the metadata file.
+    :return: Dictionary mapping file IDs to metadata.
     """
-    file_path = 'storage/metadata.json'
     try:
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"Metadata file not found: {file_path}")
-        
-        with open(file_path, 'r') as file:
-            data = json.load(file)
-        
-        return data
+        return get_metadata_store().all()
     
     except Exception as e:
         raise ValueError(f"Error listing metadata: {str(e)}")
 
-def get_metadata(file_name):
+def find_metadata(user_id=None, directory_name=None, visibility=None, include_public=False):
+    """
+    Find metadata records using the store's indexes.
+    
+    :param user_id: Owner to match.
+    :param directory_name: Directory to match.
+    :param visibility: Visibility to match.
+    :param include_public: Also match public files not owned by ``user_id``.
+    :return: Dictionary mapping file IDs to metadata.
+    """
+    try:
+        return get_metadata_store().find(
+            user_id=user_id,
+            directory_name=directory_name,
+            visibility=visibility,
+            include_public=include_public,
+        )
+    
+    except Exception as e:
+        raise ValueError(f"Error listing metadata: {str(e)}")
+
+def get_metadata_many(file_names, user_id=None):
+    """
+    Get the metadata records of several files with one store query.
+    
+    :param file_names: File names or IDs.
+    :param user_id: Only return records owned by this user.
+    :return: Dictionary mapping file IDs to metadata.
+    """
+    try:
+        return get_metadata_store().get_many(file_names, user_id=user_id)
+    
+    except Exception as e:
+        raise ValueError(f"Error reading metadata: {str(e)}")
+
+def update_metadata_many(records):
+    """
+    Replace several metadata records in a single store transaction.
+    
+    :param records: Dictionary mapping file IDs to their new metadata.
+    :return: Number of written records.
+    """
+    try:
+        get_metadata_store().put_many(records.items())
+        invalidate_metadata(*records.items())
+        return len(records)
+    
+    except Exception as e:
+        raise ValueError(f"Error updating the metadata store: {str(e)}")
+
+def delete_metadata_many(records):
+    """
+    Delete several metadata records in a single store transaction.
+    
+    :param records: Dictionary mapping file IDs to the metadata being deleted.
+    :return: Number of deleted records.
+    """
+    try:
+        deleted = get_metadata_store().delete_many(records.keys())
+        invalidate_metadata(*records.items())
+        return deleted
+    
+    except Exception as e:
+        raise ValueError(f"Error deleting metadata: {str(e)}")
+
+def find_metadata_page(**filters):
+    """
+    Get one page of metadata records in a stable order.
+    
+    :param filters: Filters, sort order, page size and cursor; see ``MetadataStore.find_page``.
+    :return: Tuple of an ordered dictionary mapping file IDs to metadata and the next page's cursor.
+    """
+    try:
+        return get_metadata_store().find_page(**filters)
+    
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Error listing metadata: {str(e)}")
+
+def move_metadata_directory(user_id, old_path, new_path):
+    """
+    Re-home the metadata of every file under a directory subtree.
+    
+    :param user_id: Owner of the directory.
+    :param old_path: Materialised path of the directory being moved.
+    :param new_path: Materialised path it moves to.
+    :return: Number of moved records.
+    """
+    try:
+        moved = get_metadata_store().move_directory(user_id, old_path, new_path)
+        invalidate_metadata(*[(key, {"file_name": file_name, "user_id": user_id}) for key, file_name in moved])
+        return len(moved)
+    
+    except Exception as e:
+        raise ValueError(f"Error moving metadata: {str(e)}")
+
+def rename_metadata_directories(renames):
+    """
+    Point metadata records at the new paths of renamed directories.
+    Only records in exactly the old directory are touched.
+    
+    :param renames: Dictionary mapping (user_id, old directory name) to the new path.
+    :return: Number of updated records.
+    """
+    try:
+        store = get_metadata_store()
+        records = {}
+        for (user_id, old_name), path in renames.items():
+            if not old_name:
+                continue
+            for key, value in store.find(user_id=user_id, directory_name=old_name).items():
+                records[key] = {**value, "directory_name": path, "file_path": f"{path}/{value.get('file_name')}"}
+        return update_metadata_many(records) if records else 0
+    
+    except Exception as e:
+        raise ValueError(f"Error moving metadata: {str(e)}")
+
+def get_cached_metadata(file_name, user_id=None):
+    """
+    Get metadata for a file from the cache only.
+    
+    :param file_name: Name of the file to retrieve metadata for.
+    :param user_id: Caller; their own file is preferred over a public one.
+    :return: A copy of the cached metadata, or None on a miss.
+    """
+    cache = get_metadata_cache()
+    if user_id:
+        # An empty record means the caller is known to have no file of that name.
+        own = cache.get(metadata_cache_key(file_name, user_id))
+        if own is None:
+            return None
+        if own:
+            return dict(own)
+    metadata = cache.get(metadata_cache_key(file_name))
+    return dict(metadata) if metadata else None
+
+def load_metadata(file_name, user_id=None):
+    """
+    Read metadata for a file from the store and populate the cache.
+    The caller's own file wins; otherwise a public file of that name is used.
+    
+    :param file_name: Name of the file to retrieve metadata for.
+    :param user_id: Caller, or None to only look at public files.
+    :return: Metadata dictionary for the specified file.
+    """
+    store, cache = get_metadata_store(), get_metadata_cache()
+    # Versions are taken before reading, so a record replaced meanwhile is not cached.
+    if user_id:
+        key = metadata_cache_key(file_name, user_id)
+        version = cache.version(key)
+        metadata = store.get(file_name, user_id=user_id)
+        cache.set(key, metadata or {}, version)
+        if metadata:
+            return dict(metadata)
+    key = metadata_cache_key(file_name)
+    version = cache.version(key)
+    metadata = store.get(file_name, visibility='public')
+    if metadata:
+        cache.set(key, metadata, version)
+        return dict(metadata)
+    return None
+
+def get_metadata(file_name, user_id=None):
     """
-    Get metadata for a specific file from the metadata JSON file.
+    Get metadata for a specific file, served from the cache when possible.
     
     :param file_name: Name of the file to retrieve metadata for.
+    :param user_id: Caller; their own file is preferred over a public one.
     :return: Metadata dictionary for the specified file.
     """
-    metadata = list_metadata()
-    return metadata.get(file_name, None)
+    return get_cached_metadata(file_name, user_id) or load_metadata(file_name, user_id)
 
 def get_current_time():
     """
@@ -66,25 +276,19 @@ def get_current_time():
     from datetime import datetime
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-def delete_metadata(file_name):
+def delete_metadata(key, user_id=None):
     """
-    Delete a key-value pair from the metadata JSON file.
+    Delete the metadata record for a file.
     
-    :param file_name: File name to delete from the metadata file.
-    :return: Updated JSON data as a string.
+    :param key: Record key (or file name) to delete from the metadata store.
+    :param user_id: Only delete a record owned by this user.
+    :return: Deleted metadata as a JSON string.
     """
-    file_path = 'storage/metadata.json'
     try:
-        with open(file_path, 'r') as file:
-            data = json.load(file)
-        
-        if file_name in data:
-            del data[file_name]
-        
-        with open(file_path, 'w') as file:
-            json.dump(data, file, indent=4)
-        
-        return json.dumps(data, indent=4)
+        deleted = get_metadata_store().delete(key, user_id=user_id)
+        if deleted:
+            invalidate_metadata((key, deleted))
+        return json.dumps(deleted or {}, indent=4)
     
     except Exception as e:
-        raise ValueError(f"Error deleting metadata: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Error deleting metadata: {str(e)}")
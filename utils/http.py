@@ -0,0 +1,74 @@
+# Helpers for conditional and partial HTTP responses.
+import re
+from urllib.parse import quote
+
+
+BYTE_RANGE = re.compile(r"(\d*)-(\d*)")
+# Characters kept out of the quoted ASCII fallback of the filename parameter.
+UNSAFE_FILENAME = re.compile(r'[^\x20-\x7e]|["\\]')
+
+
+def parse_range(range_header, size):
+    """
+    Parse a single-range ``Range`` header.
+    A header that is not a valid byte range is ignored, as RFC 7233 requires,
+    so the whole resource is sent.
+
+    :param range_header: Value of the Range header, e.g. ``bytes=0-1023``.
+    :param size: Total size of the resource in bytes.
+    :return: Tuple ``(start, end)`` with an inclusive end, or None to send the whole resource.
+    :raises ValueError: If the range is valid but cannot be satisfied.
+    """
+    if not range_header:
+        return None
+    unit, _, spec = range_header.partition('=')
+    match = BYTE_RANGE.fullmatch(spec.strip())
+    if unit.strip().lower() != 'bytes' or not match or match.group() == '-':
+        return None
+
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(f"Unsatisfiable range: {range_header}")
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise ValueError(f"Unsatisfiable range: {range_header}")
+    return start, min(end, size - 1)
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Check whether an ``If-None-Match`` header matches an entity tag.
+
+    :param if_none_match: Value of the If-None-Match header.
+    :param etag: Quoted entity tag of the current representation.
+    :return: True if the client's cached copy is current.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return etag in candidates
+
+
+def content_disposition(file_name, disposition="attachment"):
+    """
+    Build a ``Content-Disposition`` header for a file name (RFC 6266).
+    The quoted ``filename`` is an ASCII fallback with unsafe characters
+    replaced; ``filename*`` carries the exact name, UTF-8 percent-encoded
+    as described in RFC 5987.
+
+    :param file_name: Name of the file, as stored by the user.
+    :param disposition: Either 'attachment' or 'inline'.
+    :return: Header value.
+    """
+    fallback = UNSAFE_FILENAME.sub('_', file_name)
+    encoded = quote(file_name, safe="!#$&+-.^_`|~")
+    return f'{disposition}; filename="{fallback}"; filename*=UTF-8\'\'{encoded}'
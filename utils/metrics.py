@@ -0,0 +1,370 @@
+# Prometheus metrics for the API and the Celery workers.
+# Nothing is recorded, and prometheus_client is not even imported, until a
+# process calls enable_metrics(); the CLI never does, so its commands pay only
+# a None check per instrumented call.
+from pymongo import monitoring
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+
+
+metrics_enabled = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+worker_metrics_port = int(os.getenv("WORKER_METRICS_PORT", 9808))
+# Set by the deployment when several processes (uvicorn or prefork workers) share one exporter.
+multiprocess_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+BACKEND_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+TASK_BUCKETS = (.05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_metrics = None
+_lock = threading.Lock()
+
+
+class Metrics:
+    """
+    The metrics recorded by the instrumented code paths.
+    Gauges use the 'livesum' multiprocess mode so that per-process values add
+    up when PROMETHEUS_MULTIPROC_DIR is set.
+    """
+
+    def __init__(self):
+        from prometheus_client import Counter, Gauge, Histogram
+
+        self.request_latency = Histogram(
+            "vault_http_request_duration_seconds", "Time until the API response starts, per route.",
+            ["method", "route", "status"],
+        )
+        self.requests_in_progress = Gauge(
+            "vault_http_requests_in_progress", "API requests being handled.", ["method"],
+            multiprocess_mode="livesum",
+        )
+        self.operation_latency = Histogram(
+            "vault_backend_operation_duration_seconds", "Duration of MongoDB, GridFS and Redis repository calls.",
+            ["backend", "operation"], buckets=BACKEND_BUCKETS,
+        )
+        self.operation_errors = Counter(
+            "vault_backend_operation_errors", "Repository calls that raised.", ["backend", "operation"],
+        )
+        self.gridfs_bytes = Counter(
+            "vault_gridfs_bytes", "Bytes written to (in) and read from (out) GridFS.", ["bucket", "direction"],
+        )
+        self.mongo_connections = Gauge(
+            "vault_mongo_pool_connections", "Open MongoDB pool connections.", ["address"],
+            multiprocess_mode="livesum",
+        )
+        self.mongo_connections_in_use = Gauge(
+            "vault_mongo_pool_connections_in_use", "MongoDB pool connections checked out.", ["address"],
+            multiprocess_mode="livesum",
+        )
+        self.mongo_checkout_failures = Counter(
+            "vault_mongo_pool_checkout_failures", "Failed MongoDB connection checkouts.", ["address", "reason"],
+        )
+        self.task_latency = Histogram(
+            "vault_celery_task_duration_seconds", "Duration of Celery tasks.", ["task", "state"],
+            buckets=TASK_BUCKETS,
+        )
+        self.tasks_in_progress = Gauge(
+            "vault_celery_tasks_in_progress", "Celery tasks being executed.", ["task"],
+            multiprocess_mode="livesum",
+        )
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """
+    Keep the MongoDB pool gauges up to date from pymongo's pool events.
+    """
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    @staticmethod
+    def _address(event):
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def connection_created(self, event):
+        self.metrics.mongo_connections.labels(self._address(event)).inc()
+
+    def connection_closed(self, event):
+        self.metrics.mongo_connections.labels(self._address(event)).dec()
+
+    def connection_checked_out(self, event):
+        self.metrics.mongo_connections_in_use.labels(self._address(event)).inc()
+
+    def connection_checked_in(self, event):
+        self.metrics.mongo_connections_in_use.labels(self._address(event)).dec()
+
+    def connection_check_out_failed(self, event):
+        self.metrics.mongo_checkout_failures.labels(self._address(event), str(event.reason)).inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+
+class RuntimeCollector:
+    """
+    Read Redis pool usage and cache counters of this process at scrape time.
+    """
+
+    def collect(self):
+        from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+        in_use = GaugeMetricFamily("vault_redis_pool_connections_in_use", "Redis pool connections checked out.", labels=["client"])
+        idle = GaugeMetricFamily("vault_redis_pool_connections_idle", "Idle Redis pool connections.", labels=["client"])
+        limit = GaugeMetricFamily("vault_redis_pool_max_connections", "Redis pool size limit.", labels=["client"])
+        for client, module_name, class_name in (("sync", "storage.database", "Database"),
+                                                ("async", "storage.async_database", "AsyncDatabase")):
+            module = sys.modules.get(module_name)
+            if module is None:
+                continue
+            for database in list(getattr(module, class_name)._instances.values()):
+                pool = database._redis_pool
+                if pool is None:
+                    continue
+                in_use.add_metric([client], len(pool._in_use_connections))
+                idle.add_metric([client], len(pool._available_connections))
+                limit.add_metric([client], pool.max_connections)
+        yield from (in_use, idle, limit)
+
+        from utils.cache import caches
+
+        hits = CounterMetricFamily("vault_cache_hits", "Cache lookups answered from the cache.", labels=["cache", "tier"])
+        misses = CounterMetricFamily("vault_cache_misses", "Cache lookups that missed.", labels=["cache", "tier"])
+        evictions = CounterMetricFamily("vault_cache_evictions", "Entries evicted to make room.", labels=["cache"])
+        entries = GaugeMetricFamily("vault_cache_entries", "Entries held in the local tier.", labels=["cache"])
+        ratio = GaugeMetricFamily("vault_cache_hit_ratio", "Local-tier hit ratio since start.", labels=["cache"])
+        for name, cache in list(caches.items()):
+            stats = cache.stats()
+            hits.add_metric([name, "local"], stats["hits"])
+            misses.add_metric([name, "local"], stats["misses"])
+            if "redis_hits" in stats:
+                hits.add_metric([name, "redis"], stats["redis_hits"])
+                misses.add_metric([name, "redis"], stats["redis_misses"])
+            evictions.add_metric([name], stats["evictions"])
+            entries.add_metric([name], stats["size"])
+            ratio.add_metric([name], stats["hit_ratio"])
+        yield from (hits, misses, evictions, entries, ratio)
+
+
+class QueueDepthCollector:
+    """
+    Report the number of messages waiting in each Celery queue of a Redis broker.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._redis = None
+
+    def queues(self):
+        names = {self.app.conf.task_default_queue}
+        for route in (self.app.conf.task_routes or {}).values():
+            if isinstance(route, dict) and route.get("queue"):
+                names.add(route["queue"])
+        return sorted(names)
+
+    def collect(self):
+        from prometheus_client.core import GaugeMetricFamily
+
+        depth = GaugeMetricFamily("vault_celery_queue_depth", "Messages waiting in a Celery queue.", labels=["queue"])
+        if str(self.app.conf.broker_url).startswith("redis"):
+            try:
+                if self._redis is None:
+                    from redis import Redis
+                    self._redis = Redis.from_url(self.app.conf.broker_url, socket_timeout=2)
+                pipeline = self._redis.pipeline()
+                queues = self.queues()
+                for queue in queues:
+                    pipeline.llen(queue)
+                for queue, length in zip(queues, pipeline.execute()):
+                    depth.add_metric([queue], length)
+            except Exception as e:
+                print(f"Could not read Celery queue depth: {e}")
+        yield depth
+
+
+def get_metrics():
+    """
+    Get the metrics of this process.
+
+    :return: Metrics instance, or None when metrics are not enabled here.
+    """
+    return _metrics
+
+
+def enable_metrics():
+    """
+    Start recording metrics in this process.
+    Safe to call more than once. Must run before the MongoDB clients are
+    created for their pools to be tracked.
+
+    :return: Metrics instance, or None if METRICS_ENABLED is false.
+    """
+    global _metrics
+    if not metrics_enabled:
+        return None
+    with _lock:
+        if _metrics is None:
+            from prometheus_client import REGISTRY
+
+            metrics = Metrics()
+            monitoring.register(MongoPoolListener(metrics))
+            if not multiprocess_dir:
+                REGISTRY.register(RuntimeCollector())
+            _metrics = metrics
+    return _metrics
+
+
+def timed(backend):
+    """
+    Decorate a repository method to record its duration and failures.
+    Works on plain and async methods; the operation is named after the method.
+
+    :param backend: 'mongo', 'gridfs' or 'redis'.
+    """
+    def decorator(func):
+        operation = func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if _metrics is None:
+                    return await func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    _metrics.operation_errors.labels(backend, operation).inc()
+                    raise
+                finally:
+                    _metrics.operation_latency.labels(backend, operation).observe(time.perf_counter() - started)
+            return wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _metrics is None:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                _metrics.operation_errors.labels(backend, operation).inc()
+                raise
+            finally:
+                _metrics.operation_latency.labels(backend, operation).observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def count_gridfs_bytes(direction, size, bucket="files"):
+    """
+    Count bytes moved through GridFS.
+
+    :param direction: 'in' for writes, 'out' for reads.
+    :param size: Number of bytes.
+    :param bucket: GridFS bucket name.
+    """
+    if _metrics is not None and size:
+        _metrics.gridfs_bytes.labels(bucket, direction).inc(size)
+
+
+def observe_request(method, route, status, seconds):
+    """
+    Record one handled API request.
+    """
+    if _metrics is not None:
+        _metrics.request_latency.labels(method, route, str(status)).observe(seconds)
+
+
+def exposition_registry(*collectors):
+    """
+    Get the registry to expose, merging every process's files in multiprocess mode.
+
+    :param collectors: Extra collectors that are independent of the process.
+    :return: CollectorRegistry.
+    """
+    from prometheus_client import REGISTRY, CollectorRegistry
+
+    if multiprocess_dir:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    for collector in collectors:
+        registry.register(collector)
+    return registry
+
+
+def latest_metrics():
+    """
+    Render the metrics in the Prometheus text format.
+
+    :return: Tuple of the payload and its content type.
+    """
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+    return generate_latest(exposition_registry()), CONTENT_TYPE_LATEST
+
+
+def instrument_celery(app):
+    """
+    Record task durations and serve worker metrics on WORKER_METRICS_PORT.
+    Only connects signal handlers, which fire in worker processes; clients
+    that merely send tasks are unaffected. With a prefork pool, set
+    PROMETHEUS_MULTIPROC_DIR so the tasks run by child processes are exported.
+
+    :param app: Celery application.
+    """
+    from celery import signals
+
+    started = {}
+
+    @signals.worker_init.connect(weak=False)
+    def start_exporter(**kwargs):
+        if enable_metrics() is None:
+            return
+        from prometheus_client import start_http_server
+
+        start_http_server(worker_metrics_port, registry=exposition_registry(QueueDepthCollector(app)))
+
+    @signals.worker_process_init.connect(weak=False)
+    def enable_in_child(**kwargs):
+        enable_metrics()
+
+    @signals.worker_process_shutdown.connect(weak=False)
+    def mark_child_dead(pid=None, **kwargs):
+        if multiprocess_dir and _metrics is not None:
+            from prometheus_client import multiprocess
+            multiprocess.mark_process_dead(pid or os.getpid())
+
+    @signals.task_prerun.connect(weak=False)
+    def task_started(task_id=None, task=None, **kwargs):
+        if _metrics is not None:
+            started[task_id] = time.perf_counter()
+            _metrics.tasks_in_progress.labels(task.name).inc()
+
+    @signals.task_postrun.connect(weak=False)
+    def task_finished(task_id=None, task=None, state=None, **kwargs):
+        began = started.pop(task_id, None)
+        if _metrics is not None and began is not None:
+            _metrics.tasks_in_progress.labels(task.name).dec()
+            _metrics.task_latency.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - began)
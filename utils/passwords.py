@@ -0,0 +1,85 @@
+# Password hashing on a bounded worker pool with a configurable bcrypt cost.
+# bcrypt is imported on first use so commands that never hash do not load it.
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
+import threading
+
+
+bcrypt_rounds = int(os.getenv("BCRYPT_ROUNDS", 12))
+password_workers = int(os.getenv("PASSWORD_WORKERS", min(4, os.cpu_count() or 1)))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Get the worker pool that runs bcrypt.
+    bcrypt releases the GIL, so the pool size caps how many cores hashing
+    may use at once, however many logins arrive together.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=password_workers, thread_name_prefix="bcrypt")
+    return _executor
+
+
+def _hash(password):
+    import bcrypt
+
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=bcrypt_rounds)).decode('utf-8')
+
+
+def _verify(password, hashed):
+    import bcrypt
+
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def hash_password(password):
+    """
+    Hash a password with the configured cost.
+
+    :param password: Plain text password.
+    :return: bcrypt hash as a string.
+    """
+    return get_executor().submit(_hash, password).result()
+
+
+def verify_password(password, hashed):
+    """
+    Check a password against a bcrypt hash.
+
+    :return: True if the password matches.
+    """
+    return get_executor().submit(_verify, password, hashed).result()
+
+
+async def hash_password_async(password):
+    """
+    Hash a password without blocking the event loop.
+    """
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), _hash, password)
+
+
+async def verify_password_async(password, hashed):
+    """
+    Check a password against a bcrypt hash without blocking the event loop.
+    """
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), _verify, password, hashed)
+
+
+def needs_rehash(hashed):
+    """
+    Check whether a hash was made with a different cost than the configured one.
+
+    :param hashed: bcrypt hash, e.g. ``$2b$12$...``.
+    :return: True if the password should be hashed again.
+    """
+    try:
+        return int(hashed.split('$')[2]) != bcrypt_rounds
+    except (IndexError, ValueError):
+        return True
@@ -0,0 +1,86 @@
+# Fixed-window rate limiting backed by Redis, shared by every API worker.
+import os
+
+
+login_rate_limit = int(os.getenv("LOGIN_RATE_LIMIT", 10))
+login_ip_rate_limit = int(os.getenv("LOGIN_IP_RATE_LIMIT", 50))
+login_rate_window = int(os.getenv("LOGIN_RATE_WINDOW", 300))
+
+
+class RateLimitExceeded(ValueError):
+    """
+    Raised when a caller has used up its attempts for the current window.
+    """
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """
+    Count attempts per key in Redis and refuse them past a limit.
+    Works with both the sync and the asyncio Redis clients.
+    """
+
+    def __init__(self, redis_client, namespace, limit, window):
+        """
+        :param redis_client: ``redis.Redis`` or ``redis.asyncio.Redis`` client.
+        :param namespace: Prefix for the counter keys.
+        :param limit: Attempts allowed per window.
+        :param window: Window length in seconds.
+        """
+        self.redis = redis_client
+        self.namespace = namespace
+        self.limit = limit
+        self.window = window
+
+    def _key(self, key):
+        return f"ratelimit:{self.namespace}:{key}"
+
+    def _pipeline(self, key):
+        pipeline = self.redis.pipeline()
+        pipeline.incr(self._key(key))
+        pipeline.ttl(self._key(key))
+        return pipeline
+
+    def _check(self, count, ttl):
+        """
+        Raise once the limit for the current window is passed.
+        """
+        if count > self.limit:
+            raise RateLimitExceeded(
+                f"Too many attempts. Try again in {max(ttl, 1)} seconds.",
+                retry_after=max(ttl, 1)
+            )
+
+    def hit(self, key):
+        """
+        Record an attempt for a key.
+
+        :raises RateLimitExceeded: If the key is over its limit.
+        """
+        count, ttl = self._pipeline(key).execute()
+        if ttl < 0:
+            self.redis.expire(self._key(key), self.window)
+            ttl = self.window
+        self._check(count, ttl)
+
+    async def hit_async(self, key):
+        """
+        Record an attempt for a key using an asyncio Redis client.
+
+        :raises RateLimitExceeded: If the key is over its limit.
+        """
+        count, ttl = await self._pipeline(key).execute()
+        if ttl < 0:
+            await self.redis.expire(self._key(key), self.window)
+            ttl = self.window
+        self._check(count, ttl)
+
+    def reset(self, key):
+        """
+        Forget the attempts of a key, e.g. after a successful login.
+        Returns an awaitable when used with an asyncio client.
+        """
+        return self.redis.delete(self._key(key))
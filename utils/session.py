@@ -0,0 +1,101 @@
+# Where the current session token comes from: the API binds it per request,
+# the CLI keeps it in a local credentials file between invocations.
+from contextvars import ContextVar
+from pathlib import Path
+from utils.cache import TTLCache, register_cache
+import os
+import secrets
+
+
+session_file = Path(os.getenv("VAULT_SESSION_FILE", Path.home() / ".vault" / "session"))
+session_ttl = int(os.getenv("SESSION_TTL", 24 * 3600))
+session_cache_ttl = float(os.getenv("SESSION_CACHE_TTL", 5))
+session_cache_size = int(os.getenv("SESSION_CACHE_SIZE", 10000))
+
+# Resolved token -> user ID, so a burst of requests costs one Redis round trip.
+# Revocations in another process take effect within SESSION_CACHE_TTL seconds.
+session_cache = register_cache("session", TTLCache(max_size=session_cache_size, ttl=session_cache_ttl))
+
+_UNSET = object()
+_request_token = ContextVar("session_token", default=_UNSET)
+
+
+def new_session_token():
+    """
+    Generate an unguessable session token.
+    """
+    return secrets.token_urlsafe(32)
+
+
+def bind_session_token(token):
+    """
+    Bind the session token of the request being handled.
+    Once bound, the local credentials file is never consulted.
+    
+    :param token: Token from the request, or None for anonymous requests.
+    :return: Reset token for ``unbind_session_token``.
+    """
+    return _request_token.set(token or None)
+
+
+def unbind_session_token(reset):
+    """
+    Restore the session token binding saved by ``bind_session_token``.
+    """
+    _request_token.reset(reset)
+
+
+def get_session_token():
+    """
+    Get the session token of the current request or CLI user.
+    
+    :return: Token string or None if not logged in.
+    """
+    token = _request_token.get()
+    if token is not _UNSET:
+        return token
+    return load_session_token()
+
+
+def load_session_token():
+    """
+    Read the CLI session token from the local credentials file.
+    
+    :return: Token string or None.
+    """
+    try:
+        return session_file.read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def save_session_token(token):
+    """
+    Store the CLI session token in the local credentials file, readable only by the owner.
+    """
+    session_file.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(session_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as file:
+        file.write(token)
+
+
+def clear_session_token():
+    """
+    Remove the CLI session token.
+    """
+    session_file.unlink(missing_ok=True)
+
+
+def bearer_token(authorization):
+    """
+    Extract the token from an ``Authorization: Bearer`` header.
+    
+    :param authorization: Header value.
+    :return: Token string or None.
+    """
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(' ')
+    if scheme.lower() != 'bearer':
+        return None
+    return token.strip() or None
@@ -0,0 +1,251 @@
+# Stateless signed access/refresh tokens (HS256, JWT compact format) and their revocation list.
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from uuid import uuid4
+
+
+auth_mode = os.getenv("AUTH_MODE", "session").lower()
+token_secret = os.getenv("TOKEN_SECRET")
+access_token_ttl = int(os.getenv("ACCESS_TOKEN_TTL", 15 * 60))
+refresh_token_ttl = int(os.getenv("REFRESH_TOKEN_TTL", 14 * 24 * 3600))
+revocation_refresh_interval = float(os.getenv("REVOCATION_REFRESH_INTERVAL", 5))
+
+REVOKED_TOKENS_KEY = "revoked_tokens"
+# User ID -> time before which every token issued to that user is revoked.
+REVOKED_USERS_KEY = "revoked_users"
+_HEADER = {"alg": "HS256", "typ": "JWT"}
+
+
+class InvalidToken(ValueError):
+    """
+    Raised when a token is malformed, forged, expired, revoked or of the wrong type.
+    """
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def _secret():
+    if not token_secret:
+        raise ValueError("TOKEN_SECRET must be set to use signed tokens.")
+    return token_secret.encode('utf-8')
+
+
+def _sign(signing_input):
+    return _b64encode(hmac.new(_secret(), signing_input, hashlib.sha256).digest())
+
+
+def is_signed_token(token):
+    """
+    Tell signed tokens apart from opaque session tokens.
+    """
+    return bool(token) and token.count('.') == 2
+
+
+def issue_token(user_id, token_type, ttl):
+    """
+    Create a signed token.
+
+    :param user_id: Subject of the token.
+    :param token_type: 'access' or 'refresh'.
+    :param ttl: Lifetime in seconds.
+    :return: Tuple of the encoded token and its claims.
+    """
+    # 'iat' keeps sub-second precision: it is compared with the float
+    # watermark left by revoking all of a user's tokens, and a whole second
+    # would revoke tokens issued right after that.
+    now = time.time()
+    claims = {"sub": user_id, "type": token_type, "iat": now, "exp": int(now) + ttl, "jti": uuid4().hex}
+    signing_input = '.'.join([
+        _b64encode(json.dumps(_HEADER, separators=(',', ':')).encode('utf-8')),
+        _b64encode(json.dumps(claims, separators=(',', ':')).encode('utf-8')),
+    ])
+    return f"{signing_input}.{_sign(signing_input.encode('ascii'))}", claims
+
+
+def issue_token_pair(user_id):
+    """
+    Create an access token and the refresh token that can renew it.
+
+    :return: Dictionary with both tokens and the access token lifetime.
+    """
+    access_token, _ = issue_token(user_id, "access", access_token_ttl)
+    refresh_token, _ = issue_token(user_id, "refresh", refresh_token_ttl)
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "expires_in": access_token_ttl,
+    }
+
+
+def decode_token(token, token_type="access"):
+    """
+    Verify a signed token locally and return its claims.
+    Revocation is not checked here; see ``RevocationList``.
+
+    :param token: Encoded token.
+    :param token_type: Expected value of the 'type' claim.
+    :return: Claims dictionary.
+    :raises InvalidToken: If the token does not verify or has expired.
+    """
+    try:
+        header, payload, signature = token.split('.')
+        expected = _sign(f"{header}.{payload}".encode('ascii'))
+        if not hmac.compare_digest(signature, expected):
+            raise InvalidToken("Invalid token signature.")
+        if json.loads(_b64decode(header)).get("alg") != _HEADER["alg"]:
+            raise InvalidToken("Unsupported token algorithm.")
+        claims = json.loads(_b64decode(payload))
+    except InvalidToken:
+        raise
+    except (ValueError, TypeError, AttributeError) as e:
+        raise InvalidToken(f"Malformed token: {str(e)}")
+    if claims.get("type") != token_type:
+        raise InvalidToken(f"Wrong token type, expected '{token_type}'.")
+    if claims.get("exp", 0) <= time.time():
+        raise InvalidToken("Token has expired.")
+    return claims
+
+
+def _text(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+class RevocationList:
+    """
+    Set of revoked token IDs kept in a Redis sorted set scored by expiry,
+    plus a per-user watermark: tokens issued to a user before it are revoked.
+    Each process checks a local snapshot and reloads it at most every
+    REVOCATION_REFRESH_INTERVAL seconds, so validation stays local; entries
+    drop out once the tokens they revoke would have expired anyway.
+    """
+
+    def __init__(self, refresh_interval=revocation_refresh_interval):
+        self.refresh_interval = refresh_interval
+        self._revoked = frozenset()
+        self._revoked_before = {}
+        self._loaded_at = float('-inf')
+        self._lock = threading.Lock()
+
+    def is_stale(self):
+        return time.monotonic() - self._loaded_at >= self.refresh_interval
+
+    def _load(self, members, watermarks):
+        """
+        Replace the snapshot.
+
+        :return: Users whose watermark is older than any live token and can be dropped.
+        """
+        oldest = time.time() - max(access_token_ttl, refresh_token_ttl)
+        watermarks = {_text(user_id): float(value) for user_id, value in watermarks.items()}
+        with self._lock:
+            self._revoked = frozenset(_text(member) for member in members)
+            self._revoked_before = {user_id: value for user_id, value in watermarks.items() if value >= oldest}
+            self._loaded_at = time.monotonic()
+        return [user_id for user_id, value in watermarks.items() if value < oldest]
+
+    def refresh(self, redis_client):
+        """
+        Reload the snapshot from Redis if it is stale.
+        """
+        if not self.is_stale():
+            return
+        pipeline = redis_client.pipeline()
+        pipeline.zremrangebyscore(REVOKED_TOKENS_KEY, '-inf', time.time())
+        pipeline.zrange(REVOKED_TOKENS_KEY, 0, -1)
+        pipeline.hgetall(REVOKED_USERS_KEY)
+        _, members, watermarks = pipeline.execute()
+        expired = self._load(members, watermarks)
+        if expired:
+            redis_client.hdel(REVOKED_USERS_KEY, *expired)
+
+    async def refresh_async(self, redis_client):
+        """
+        Reload the snapshot from Redis if it is stale, using an asyncio client.
+        """
+        if not self.is_stale():
+            return
+        pipeline = redis_client.pipeline()
+        pipeline.zremrangebyscore(REVOKED_TOKENS_KEY, '-inf', time.time())
+        pipeline.zrange(REVOKED_TOKENS_KEY, 0, -1)
+        pipeline.hgetall(REVOKED_USERS_KEY)
+        _, members, watermarks = await pipeline.execute()
+        expired = self._load(members, watermarks)
+        if expired:
+            await redis_client.hdel(REVOKED_USERS_KEY, *expired)
+
+    def _add(self, jti):
+        with self._lock:
+            self._revoked = self._revoked | {jti}
+
+    def _add_user(self, user_id, revoked_before):
+        with self._lock:
+            self._revoked_before = {**self._revoked_before, user_id: revoked_before}
+
+    def revoke_user(self, redis_client, user_id):
+        """
+        Revoke every token issued to a user so far.
+        """
+        revoked_before = time.time()
+        redis_client.hset(REVOKED_USERS_KEY, user_id, revoked_before)
+        self._add_user(user_id, revoked_before)
+
+    async def revoke_user_async(self, redis_client, user_id):
+        """
+        Revoke every token issued to a user so far, using an asyncio client.
+        """
+        revoked_before = time.time()
+        await redis_client.hset(REVOKED_USERS_KEY, user_id, revoked_before)
+        self._add_user(user_id, revoked_before)
+
+    async def is_user_revoked_async(self, redis_client, claims):
+        """
+        Check a token against its user's watermark in Redis rather than the snapshot.
+
+        :return: True if the token was issued before the user's tokens were revoked.
+        """
+        revoked_before = await redis_client.hget(REVOKED_USERS_KEY, claims.get("sub"))
+        return revoked_before is not None and claims.get("iat", 0) < float(revoked_before)
+
+    def revoke(self, redis_client, claims):
+        """
+        Revoke a token until it expires.
+        """
+        redis_client.zadd(REVOKED_TOKENS_KEY, {claims["jti"]: claims["exp"]})
+        self._add(claims["jti"])
+
+    async def revoke_async(self, redis_client, claims):
+        """
+        Revoke a token until it expires, using an asyncio client.
+        """
+        await redis_client.zadd(REVOKED_TOKENS_KEY, {claims["jti"]: claims["exp"]})
+        self._add(claims["jti"])
+
+    async def claim_async(self, redis_client, claims):
+        """
+        Atomically revoke a single-use token.
+
+        :return: True if this call revoked it, False if it was already revoked.
+        """
+        added = await redis_client.zadd(REVOKED_TOKENS_KEY, {claims["jti"]: claims["exp"]}, nx=True)
+        self._add(claims["jti"])
+        return bool(added)
+
+    def is_revoked(self, claims):
+        if claims.get("jti") in self._revoked:
+            return True
+        return claims.get("iat", 0) < self._revoked_before.get(claims.get("sub"), float('-inf'))
+
+
+revocation_list = RevocationList()